@@ -10,8 +10,9 @@ from logging.handlers import RotatingFileHandler
 from .config import config, LOGS_DIR
 
 
-# 初始化扩展
-db = SQLAlchemy()
+# 初始化扩展（只读接口的查询可路由到只读副本，见 database.RoutingSession）
+from .database import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 def create_app(config_name='default'):
@@ -29,8 +30,19 @@ def create_app(config_name='default'):
     # 加载配置
     app.config.from_object(config[config_name])
 
-    # 初始化扩展
+    # 初始化扩展（按数据库类型设置连接池，SQLite文件数据库在新连接上设置PRAGMA，可选只读副本）
+    from .database import configure_app_database, init_engine_events
+    configure_app_database(app)
     db.init_app(app)
+    with app.app_context():
+        init_engine_events(app, db.engines.values())
+    from .services.cache import response_cache
+    response_cache.init_app(app)
+    # 写入明细的事务提交前重算受影响月份的汇总
+    from .services.rollup import register_rollup_events
+    register_rollup_events()
+    from .services.readmodel import read_models
+    read_models.init_app(app)
     CORS(app, resources={r'/api/*': {'origins': '*'}})
 
     # 设置日志
@@ -39,9 +51,17 @@ def create_app(config_name='default'):
     # 注册蓝图
     register_blueprints(app)
 
+    # 监控指标（/metrics）
+    from .monitoring import init_metrics
+    init_metrics(app)
+
     # 创建数据库表并初始化示例数据
     with app.app_context():
         init_database(app)
+        # 启用列式只读模型时启动即加载
+        if read_models.enabled:
+            from .models import Platform, Bank
+            read_models.load_all(db.session, (Platform, Bank))
 
     return app
 
@@ -97,6 +117,23 @@ def init_database(app):
     PlatformBase.metadata.create_all(db.engine)
     app.logger.info('数据库表创建完成')
 
+    # 为旧数据库补建字段和索引
+    from .models.migrations import ensure_columns, ensure_indexes
+    added_columns = ensure_columns(db.engine)
+    if added_columns:
+        app.logger.info(f'已为现有数据库补建字段: {", ".join(added_columns)}')
+    created_indexes = ensure_indexes(db.engine)
+    if created_indexes:
+        app.logger.info(f'已为现有数据库补建 {len(created_indexes)} 个索引: {", ".join(created_indexes)}')
+
+    # 数据版本号（统计缓存的失效依据）
+    from .services.cache import ensure_data_versions
+    ensure_data_versions(db.session, [Platform.__tablename__, Bank.__tablename__])
+
+    # 月度汇总（升级后首次启动时由明细重建）
+    from .services.rollup import ensure_rollups
+    ensure_rollups(db.session)
+
     # 检查是否需要初始化示例数据
     result = db.session.execute(select(Platform).limit(1))
     if not result.first():
@@ -6,7 +6,7 @@ from flask import Blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
 # 导入路由模块
-from . import platform, bank, export, init, admin
+from . import platform, bank, export, init, admin, jobs, runs
 
 # 注册路由
 def init_routes():
@@ -16,3 +16,5 @@ def init_routes():
     export.init_export_routes(api_bp)
     init.init_init_routes(api_bp)
     admin.init_admin_routes(api_bp)
+    jobs.init_job_routes(api_bp)
+    runs.init_run_routes(api_bp)
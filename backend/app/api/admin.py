@@ -2,21 +2,91 @@
 管理后台API
 提供数据管理、手动更新、批量导入等功能
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from ..models import Platform, Bank
 from .. import db
 from ..services import scheduler
+from ..services.bulk import parse_payload, import_records
+from ..services.cache import bump_data_version, cached_json
+from ..services.rollup import mark_rollup_range
+from .pagination import paginate
 
 # 创建蓝图
 admin_bp = Blueprint('admin', __name__)
 
 
+def _duplicate_key_response(model):
+    """自然键（如名称 + 报告月份）已存在时的响应"""
+    fields = '、'.join(model.__table__.c[field].comment.split('（')[0] for field in model.NATURAL_KEY)
+    return jsonify({
+        'code': -1,
+        'message': f'数据已存在：{fields}相同的记录只能有一条',
+        'data': None
+    }), 409
+
+
+def _batch_import(model):
+    """
+    批量导入的公共逻辑
+
+    请求体:
+        data: 记录列表（report_month 格式为 YYYY-MM）
+        upsert: 自然键已存在时是否更新，默认 false（跳过已存在的记录）
+
+    先整体向量化校验，有错误则不写入任何数据；校验通过后按
+    BATCH_IMPORT_CHUNK_SIZE 分块写入，每块单独提交
+    """
+    payload = request.get_json() or {}
+    data_list = payload.get('data', [])
+    update_existing = bool(payload.get('upsert', False))
+
+    records, errors = parse_payload(model, data_list)
+    if errors:
+        return jsonify({
+            'code': -1,
+            'message': '数据校验失败，未导入任何数据',
+            'data': {'errors': errors}
+        }), 400
+
+    chunk_size = current_app.config.get('BATCH_IMPORT_CHUNK_SIZE', 5000)
+    total = len(records)
+
+    def log_progress(chunk):
+        done = chunk['offset'] + chunk['count']
+        current_app.logger.info(
+            f'批量导入 {model.__tablename__}: {done}/{total}，本块新增 {chunk["inserted"]} 条，'
+            f'更新 {chunk["updated"]} 条，未变化 {chunk["unchanged"]} 条'
+        )
+
+    result = import_records(
+        db.session, model, records,
+        defaults={'data_source': '批量导入'},
+        update_existing=update_existing,
+        chunk_size=chunk_size,
+        progress=log_progress
+    )
+
+    created_count = result['inserted']
+    return jsonify({
+        'code': 0,
+        'message': f'成功导入 {created_count} 条数据，更新 {result["updated"]} 条，未变化 {result["unchanged"]} 条',
+        'data': {
+            'count': created_count,
+            'inserted': result['inserted'],
+            'updated': result['updated'],
+            'unchanged': result['unchanged'],
+            'chunks': result['chunks']
+        }
+    })
+
+
 @admin_bp.route('/admin/platforms', methods=['GET'])
 def get_admin_platforms():
     """
     获取平台数据列表（管理后台）
-    支持分页、筛选、排序
+    支持分页（页码/游标）、筛选、排序
     """
     try:
         # 获取查询参数
@@ -25,10 +95,6 @@ def get_admin_platforms():
         loan_type = request.args.get('loan_type')
         start_month = request.args.get('start_month')
         end_month = request.args.get('end_month')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        sort_by = request.args.get('sort_by', 'created_at')
-        sort_order = request.args.get('sort_order', 'desc')
 
         # 构建查询
         query = db.session.query(Platform)
@@ -41,34 +107,27 @@ def get_admin_platforms():
         if loan_type:
             query = query.filter(Platform.loan_type == loan_type)
         if start_month:
-            start_date = datetime.strptime(start_month, '%Y-%m')
+            start_date = datetime.strptime(start_month, '%Y-%m').date()
             query = query.filter(Platform.report_month >= start_date)
         if end_month:
-            end_date = datetime.strptime(end_month, '%Y-%m')
+            end_date = datetime.strptime(end_month, '%Y-%m').date()
             query = query.filter(Platform.report_month <= end_date)
 
-        # 排序
-        if sort_order == 'desc':
-            query = query.order_by(db.desc(getattr(Platform, sort_by)))
-        else:
-            query = query.order_by(db.asc(getattr(Platform, sort_by)))
-
-        # 分页查询
-        total = query.count()
-        data = query.offset((page - 1) * per_page).limit(per_page).all()
+        # 排序并分页
+        data = paginate(query, Platform, default_sort='created_at')
 
         return jsonify({
             'code': 0,
             'message': 'success',
-            'data': {
-                'items': [item.to_dict() for item in data],
-                'total': total,
-                'page': page,
-                'per_page': per_page,
-                'pages': (total + per_page - 1) // per_page
-            }
+            'data': data
         })
 
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
     except Exception as e:
         return jsonify({
             'code': -1,
@@ -84,6 +143,8 @@ def create_platform():
     """
     try:
         data = request.get_json()
+        if not data.get('name'):
+            return jsonify({'code': -1, 'message': '平台名称不能为空', 'data': None}), 400
 
         # 解析报告月份
         report_month = None
@@ -105,6 +166,7 @@ def create_platform():
         )
 
         db.session.add(platform)
+        bump_data_version(db.session, Platform.__tablename__)
         db.session.commit()
 
         return jsonify({
@@ -113,6 +175,9 @@ def create_platform():
             'data': platform.to_dict()
         })
 
+    except IntegrityError:
+        db.session.rollback()
+        return _duplicate_key_response(Platform)
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -163,6 +228,7 @@ def update_platform(platform_id):
             platform.source_url = data['source_url']
 
         platform.updated_at = datetime.now()
+        bump_data_version(db.session, Platform.__tablename__)
         db.session.commit()
 
         return jsonify({
@@ -171,6 +237,9 @@ def update_platform(platform_id):
             'data': platform.to_dict()
         })
 
+    except IntegrityError:
+        db.session.rollback()
+        return _duplicate_key_response(Platform)
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -196,6 +265,7 @@ def delete_platform(platform_id):
             }), 404
 
         db.session.delete(platform)
+        bump_data_version(db.session, Platform.__tablename__)
         db.session.commit()
 
         return jsonify({
@@ -219,37 +289,7 @@ def batch_create_platforms():
     批量创建平台数据
     """
     try:
-        data_list = request.get_json().get('data', [])
-
-        created_count = 0
-        for data in data_list:
-            report_month = None
-            if data.get('report_month'):
-                report_month = datetime.strptime(data['report_month'], '%Y-%m')
-
-            platform = Platform(
-                name=data.get('name'),
-                company_group=data.get('company_group'),
-                platform_type=data.get('platform_type'),
-                loan_type=data.get('loan_type'),
-                report_month=report_month,
-                loan_balance=data.get('loan_balance'),
-                loan_issued=data.get('loan_issued'),
-                yoy_growth=data.get('yoy_growth'),
-                mom_growth=data.get('mom_growth'),
-                data_source=data.get('data_source', '批量导入'),
-                source_url=data.get('source_url')
-            )
-            db.session.add(platform)
-            created_count += 1
-
-        db.session.commit()
-
-        return jsonify({
-            'code': 0,
-            'message': f'成功导入 {created_count} 条数据',
-            'data': {'count': created_count}
-        })
+        return _batch_import(Platform)
 
     except Exception as e:
         db.session.rollback()
@@ -264,16 +304,13 @@ def batch_create_platforms():
 def get_admin_banks():
     """
     获取银行数据列表（管理后台）
+    支持分页（页码/游标）、筛选、排序
     """
     try:
         # 获取查询参数
         bank_type = request.args.get('bank_type')
         start_month = request.args.get('start_month')
         end_month = request.args.get('end_month')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        sort_by = request.args.get('sort_by', 'created_at')
-        sort_order = request.args.get('sort_order', 'desc')
 
         # 构建查询
         query = db.session.query(Bank)
@@ -281,34 +318,27 @@ def get_admin_banks():
         if bank_type:
             query = query.filter(Bank.bank_type == bank_type)
         if start_month:
-            start_date = datetime.strptime(start_month, '%Y-%m')
+            start_date = datetime.strptime(start_month, '%Y-%m').date()
             query = query.filter(Bank.report_month >= start_date)
         if end_month:
-            end_date = datetime.strptime(end_month, '%Y-%m')
+            end_date = datetime.strptime(end_month, '%Y-%m').date()
             query = query.filter(Bank.report_month <= end_date)
 
-        # 排序
-        if sort_order == 'desc':
-            query = query.order_by(db.desc(getattr(Bank, sort_by)))
-        else:
-            query = query.order_by(db.asc(getattr(Bank, sort_by)))
-
-        # 分页查询
-        total = query.count()
-        data = query.offset((page - 1) * per_page).limit(per_page).all()
+        # 排序并分页
+        data = paginate(query, Bank, default_sort='created_at')
 
         return jsonify({
             'code': 0,
             'message': 'success',
-            'data': {
-                'items': [item.to_dict() for item in data],
-                'total': total,
-                'page': page,
-                'per_page': per_page,
-                'pages': (total + per_page - 1) // per_page
-            }
+            'data': data
         })
 
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
     except Exception as e:
         return jsonify({
             'code': -1,
@@ -324,6 +354,8 @@ def create_bank():
     """
     try:
         data = request.get_json()
+        if not data.get('name'):
+            return jsonify({'code': -1, 'message': '银行名称不能为空', 'data': None}), 400
 
         report_month = None
         if data.get('report_month'):
@@ -341,6 +373,7 @@ def create_bank():
         )
 
         db.session.add(bank)
+        bump_data_version(db.session, Bank.__tablename__)
         db.session.commit()
 
         return jsonify({
@@ -349,6 +382,9 @@ def create_bank():
             'data': bank.to_dict()
         })
 
+    except IntegrityError:
+        db.session.rollback()
+        return _duplicate_key_response(Bank)
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -393,6 +429,7 @@ def update_bank(bank_id):
             bank.source_url = data['source_url']
 
         bank.updated_at = datetime.now()
+        bump_data_version(db.session, Bank.__tablename__)
         db.session.commit()
 
         return jsonify({
@@ -401,6 +438,9 @@ def update_bank(bank_id):
             'data': bank.to_dict()
         })
 
+    except IntegrityError:
+        db.session.rollback()
+        return _duplicate_key_response(Bank)
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -426,6 +466,7 @@ def delete_bank(bank_id):
             }), 404
 
         db.session.delete(bank)
+        bump_data_version(db.session, Bank.__tablename__)
         db.session.commit()
 
         return jsonify({
@@ -449,34 +490,7 @@ def batch_create_banks():
     批量创建银行数据
     """
     try:
-        data_list = request.get_json().get('data', [])
-
-        created_count = 0
-        for data in data_list:
-            report_month = None
-            if data.get('report_month'):
-                report_month = datetime.strptime(data['report_month'], '%Y-%m')
-
-            bank = Bank(
-                name=data.get('name'),
-                bank_type=data.get('bank_type'),
-                report_month=report_month,
-                total_internet_loan=data.get('total_internet_loan'),
-                coop_platform_count=data.get('coop_platform_count'),
-                top3_platform_share=data.get('top3_platform_share'),
-                data_source=data.get('data_source', '批量导入'),
-                source_url=data.get('source_url')
-            )
-            db.session.add(bank)
-            created_count += 1
-
-        db.session.commit()
-
-        return jsonify({
-            'code': 0,
-            'message': f'成功导入 {created_count} 条数据',
-            'data': {'count': created_count}
-        })
+        return _batch_import(Bank)
 
     except Exception as e:
         db.session.rollback()
@@ -493,27 +507,31 @@ def get_admin_stats():
     获取管理后台统计数据
     """
     try:
-        platform_count = db.session.query(Platform).count()
-        bank_count = db.session.query(Bank).count()
+        def compute_stats():
+            from sqlalchemy import func
 
-        # 获取最新数据月份
-        from sqlalchemy import func
-        latest_platform_month = db.session.query(func.max(Platform.report_month)).scalar()
-        latest_bank_month = db.session.query(func.max(Bank.report_month)).scalar()
+            platform_count = db.session.query(Platform).count()
+            bank_count = db.session.query(Bank).count()
 
-        # 获取调度器任务状态
-        jobs = scheduler.get_jobs() if scheduler.scheduler else []
+            # 获取最新数据月份
+            latest_platform_month = db.session.query(func.max(Platform.report_month)).scalar()
+            latest_bank_month = db.session.query(func.max(Bank.report_month)).scalar()
 
-        return jsonify({
-            'code': 0,
-            'message': 'success',
-            'data': {
+            return {
                 'platform_count': platform_count,
                 'bank_count': bank_count,
                 'latest_platform_month': latest_platform_month.strftime('%Y-%m') if latest_platform_month else None,
-                'latest_bank_month': latest_bank_month.strftime('%Y-%m') if latest_bank_month else None,
-                'scheduled_jobs': jobs
+                'latest_bank_month': latest_bank_month.strftime('%Y-%m') if latest_bank_month else None
             }
+
+        # 数据统计按数据版本缓存，调度器任务状态每次实时获取
+        stats = cached_json('admin_stats', (Platform.__tablename__, Bank.__tablename__), compute_stats)
+        jobs = scheduler.get_jobs() if scheduler.scheduler else []
+
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': {**stats, 'scheduled_jobs': jobs}
         })
 
     except Exception as e:
@@ -542,8 +560,8 @@ def delete_data_by_date():
                 'data': None
             }), 400
 
-        start_date = datetime.strptime(start_month, '%Y-%m')
-        end_date = datetime.strptime(end_month, '%Y-%m')
+        start_date = datetime.strptime(start_month, '%Y-%m').date()
+        end_date = datetime.strptime(end_month, '%Y-%m').date()
 
         deleted_count = 0
 
@@ -553,7 +571,9 @@ def delete_data_by_date():
                 Platform.report_month <= end_date
             )
             deleted_count += query.count()
+            mark_rollup_range(db.session, Platform, start_date, end_date)
             query.delete()
+            bump_data_version(db.session, Platform.__tablename__)
 
         if data_type == 'bank' or data_type == 'all':
             query = db.session.query(Bank).filter(
@@ -561,7 +581,9 @@ def delete_data_by_date():
                 Bank.report_month <= end_date
             )
             deleted_count += query.count()
+            mark_rollup_range(db.session, Bank, start_date, end_date)
             query.delete()
+            bump_data_version(db.session, Bank.__tablename__)
 
         db.session.commit()
 
@@ -583,17 +605,17 @@ def delete_data_by_date():
 # 初始化管理后台路由
 def init_admin_routes(api_bp):
     """初始化管理后台路由"""
-    api_bp.add_url_rule('/admin/platforms', view_func=get_admin_platforms)
-    api_bp.add_url_rule('/admin/platforms', view_func=create_platform)
-    api_bp.add_url_rule('/admin/platforms/<int:platform_id>', view_func=update_platform)
-    api_bp.add_url_rule('/admin/platforms/<int:platform_id>', view_func=delete_platform)
-    api_bp.add_url_rule('/admin/platforms/batch', view_func=batch_create_platforms)
-
-    api_bp.add_url_rule('/admin/banks', view_func=get_admin_banks)
-    api_bp.add_url_rule('/admin/banks', view_func=create_bank)
-    api_bp.add_url_rule('/admin/banks/<int:bank_id>', view_func=update_bank)
-    api_bp.add_url_rule('/admin/banks/<int:bank_id>', view_func=delete_bank)
-    api_bp.add_url_rule('/admin/banks/batch', view_func=batch_create_banks)
-
-    api_bp.add_url_rule('/admin/stats', view_func=get_admin_stats)
-    api_bp.add_url_rule('/admin/data/delete-by-date', view_func=delete_data_by_date)
+    api_bp.add_url_rule('/admin/platforms', view_func=get_admin_platforms, methods=['GET'])
+    api_bp.add_url_rule('/admin/platforms', view_func=create_platform, methods=['POST'])
+    api_bp.add_url_rule('/admin/platforms/<int:platform_id>', view_func=update_platform, methods=['PUT'])
+    api_bp.add_url_rule('/admin/platforms/<int:platform_id>', view_func=delete_platform, methods=['DELETE'])
+    api_bp.add_url_rule('/admin/platforms/batch', view_func=batch_create_platforms, methods=['POST'])
+
+    api_bp.add_url_rule('/admin/banks', view_func=get_admin_banks, methods=['GET'])
+    api_bp.add_url_rule('/admin/banks', view_func=create_bank, methods=['POST'])
+    api_bp.add_url_rule('/admin/banks/<int:bank_id>', view_func=update_bank, methods=['PUT'])
+    api_bp.add_url_rule('/admin/banks/<int:bank_id>', view_func=delete_bank, methods=['DELETE'])
+    api_bp.add_url_rule('/admin/banks/batch', view_func=batch_create_banks, methods=['POST'])
+
+    api_bp.add_url_rule('/admin/stats', view_func=get_admin_stats, methods=['GET'])
+    api_bp.add_url_rule('/admin/data/delete-by-date', view_func=delete_data_by_date, methods=['POST'])
@@ -4,14 +4,22 @@
 """
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from ..models import Bank
+from ..models import Bank, BankMonthlyRollup
 from .. import db
+from .pagination import paginate
+from .conditional import conditional_get
+from ..database import read_replica
+from ..services.cache import cached_response
+from ..services.rollup import latest_rollups, group_rollups
+from ..services.readmodel import read_models
 
 # 创建蓝图
 bank_bp = Blueprint('banks', __name__)
 
 
 @bank_bp.route('/banks', methods=['GET'])
+@read_replica
+@conditional_get(Bank.__tablename__)
 def get_banks():
     """
     获取所有银行列表
@@ -54,6 +62,8 @@ def get_banks():
 
 
 @bank_bp.route('/banks/data', methods=['GET'])
+@read_replica
+@conditional_get(Bank.__tablename__)
 def get_bank_data():
     """
     获取银行数据（支持筛选）
@@ -66,6 +76,9 @@ def get_bank_data():
         per_page: 每页数量（默认20）
         sort_by: 排序字段（默认report_month）
         sort_order: 排序方向（asc/desc，默认desc）
+        cursor: 为1时使用游标分页
+        after: 游标分页的下一页游标（上一页返回的next_cursor）
+        with_total: 游标分页时是否返回总数
 
     Returns:
         JSON响应
@@ -75,46 +88,44 @@ def get_bank_data():
         bank_type = request.args.get('bank_type')
         start_month = request.args.get('start_month')
         end_month = request.args.get('end_month')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        sort_by = request.args.get('sort_by', 'report_month')
-        sort_order = request.args.get('sort_order', 'desc')
 
-        # 构建查询
-        query = db.session.query(Bank)
+        start_date = datetime.strptime(start_month, '%Y-%m').date() if start_month else None
+        end_date = datetime.strptime(end_month, '%Y-%m').date() if end_month else None
 
-        # 应用筛选条件
-        if bank_type:
-            query = query.filter(Bank.bank_type == bank_type)
-        if start_month:
-            start_date = datetime.strptime(start_month, '%Y-%m')
-            query = query.filter(Bank.report_month >= start_date)
-        if end_month:
-            end_date = datetime.strptime(end_month, '%Y-%m')
-            query = query.filter(Bank.report_month <= end_date)
-
-        # 排序
-        if sort_order == 'desc':
-            query = query.order_by(db.desc(getattr(Bank, sort_by)))
-        else:
-            query = query.order_by(db.asc(getattr(Bank, sort_by)))
+        # 启用列式只读模型时在内存中筛选和分页
+        data = None
+        table = read_models.get(db.session, Bank)
+        if table is not None:
+            mask = table.mask(start=start_date, end=end_date, bank_type=bank_type)
+            data = table.paginate(mask, default_sort='report_month')
+
+        if data is None:
+            # 构建查询
+            query = db.session.query(Bank)
 
-        # 分页查询
-        total = query.count()
-        data = query.offset((page - 1) * per_page).limit(per_page).all()
+            # 应用筛选条件
+            if bank_type:
+                query = query.filter(Bank.bank_type == bank_type)
+            if start_date:
+                query = query.filter(Bank.report_month >= start_date)
+            if end_date:
+                query = query.filter(Bank.report_month <= end_date)
+
+            # 排序并分页
+            data = paginate(query, Bank, default_sort='report_month')
 
         return jsonify({
             'code': 0,
             'message': 'success',
-            'data': {
-                'items': [item.to_dict() for item in data],
-                'total': total,
-                'page': page,
-                'per_page': per_page,
-                'pages': (total + per_page - 1) // per_page
-            }
+            'data': data
         })
 
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
     except Exception as e:
         return jsonify({
             'code': -1,
@@ -124,6 +135,8 @@ def get_bank_data():
 
 
 @bank_bp.route('/banks/<int:bank_id>', methods=['GET'])
+@read_replica
+@conditional_get(Bank.__tablename__)
 def get_bank_detail(bank_id):
     """
     获取单个银行详情
@@ -159,6 +172,8 @@ def get_bank_detail(bank_id):
 
 
 @bank_bp.route('/banks/<int:bank_id>/timeline', methods=['GET'])
+@read_replica
+@conditional_get(Bank.__tablename__)
 def get_bank_timeline(bank_id):
     """
     获取银行的时间序列数据
@@ -170,7 +185,16 @@ def get_bank_timeline(bank_id):
         JSON响应，包含按时间排序的数据
     """
     try:
-        bank = db.session.query(Bank).filter_by(id=bank_id).first()
+        table = read_models.get(db.session, Bank)
+        if table is not None:
+            index = table.find_id(bank_id)
+            bank = None if index is None else {
+                'name': table.value('name', index),
+                'bank_type': table.value('bank_type', index)
+            }
+        else:
+            row = db.session.query(Bank).filter_by(id=bank_id).first()
+            bank = None if row is None else {'name': row.name, 'bank_type': row.bank_type}
 
         if not bank:
             return jsonify({
@@ -179,17 +203,22 @@ def get_bank_timeline(bank_id):
                 'data': None
             }), 404
 
-        data = db.session.query(Bank).filter(
-            Bank.name == bank.name
-        ).order_by(Bank.report_month.asc()).all()
+        if table is not None:
+            # 列式只读模型：按名称编码筛选，从按月份排好序的行号中取出
+            timeline = table.rows(table.ordered(table.mask(name=bank['name']), 'report_month'))
+        else:
+            data = db.session.query(Bank).filter(
+                Bank.name == bank['name']
+            ).order_by(Bank.report_month.asc().nulls_first(), Bank.id.asc()).all()
+            timeline = [item.to_dict() for item in data]
 
         return jsonify({
             'code': 0,
             'message': 'success',
             'data': {
-                'bank_name': bank.name,
-                'bank_type': bank.bank_type,
-                'timeline': [item.to_dict() for item in data]
+                'bank_name': bank['name'],
+                'bank_type': bank['bank_type'],
+                'timeline': timeline
             }
         })
 
@@ -202,18 +231,26 @@ def get_bank_timeline(bank_id):
 
 
 @bank_bp.route('/banks/stats/overview', methods=['GET'])
+@read_replica
+@conditional_get(Bank.__tablename__)
+@cached_response(Bank.__tablename__)
 def get_bank_overview():
     """
-    获取银行数据概览
+    获取银行数据概览（读取月度汇总表，按数据版本缓存）
 
     Returns:
         JSON响应，包含最新的总体统计数据
     """
     try:
-        from sqlalchemy import func
-
-        # 获取最新月份
-        latest_month = db.session.query(func.max(Bank.report_month)).scalar()
+        # 最新月份的汇总行（每个银行类型一行），启用列式只读模型时在内存中分组
+        table = read_models.get(db.session, Bank)
+        if table is not None:
+            latest_month, rollups = table.latest_rollups(
+                ('bank_type',),
+                {'total_loan': 'total_internet_loan', 'total_coop_platforms': 'coop_platform_count'}
+            )
+        else:
+            latest_month, rollups = latest_rollups(db.session, BankMonthlyRollup)
 
         if not latest_month:
             return jsonify({
@@ -227,31 +264,19 @@ def get_bank_overview():
                 }
             })
 
-        # 最新月份数据
-        latest_data = db.session.query(Bank).filter(
-            Bank.report_month == latest_month
-        ).all()
-
-        total_loan = sum(item.total_internet_loan or 0 for item in latest_data)
-        total_platforms = sum(item.coop_platform_count or 0 for item in latest_data)
-        avg_platforms = total_platforms / len(latest_data) if latest_data else 0
+        total_loan = sum(item.total_loan for item in rollups)
+        total_platforms = sum(item.total_coop_platforms for item in rollups)
+        bank_count = sum(item.record_count for item in rollups)
+        avg_platforms = total_platforms / bank_count if bank_count else 0
 
         # 按银行类型统计
-        type_stats = db.session.query(
-            Bank.bank_type,
-            func.count(Bank.id).label('count'),
-            func.sum(Bank.total_internet_loan).label('total_loan')
-        ).filter(
-            Bank.report_month == latest_month
-        ).group_by(Bank.bank_type).all()
-
         by_type = [
             {
-                'type': item.bank_type or '未知',
-                'count': item.count,
-                'total_loan': float(item.total_loan or 0)
+                'type': bank_type or '未知',
+                'count': count,
+                'total_loan': float(type_loan)
             }
-            for item in type_stats
+            for bank_type, count, type_loan in group_rollups(rollups, 'bank_type', 'record_count', 'total_loan')
         ]
 
         return jsonify({
@@ -260,7 +285,7 @@ def get_bank_overview():
             'data': {
                 'latest_month': latest_month.strftime('%Y-%m'),
                 'total_loan': round(total_loan, 2),
-                'bank_count': len(latest_data),
+                'bank_count': bank_count,
                 'avg_platforms': round(avg_platforms, 1),
                 'by_type': by_type
             }
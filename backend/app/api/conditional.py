@@ -0,0 +1,70 @@
+"""
+条件请求
+GET接口的响应按所读表的数据版本号生成 ETag，按最后写入时间生成 Last-Modified；
+客户端带 If-None-Match / If-Modified-Since 且数据未变化时直接返回304，
+不执行查询也不序列化响应体（版本号在进程内缓存，通常不访问数据库）
+"""
+from datetime import timezone
+from functools import wraps
+from typing import Callable
+
+from flask import current_app, request
+
+from .. import db
+from ..services.cache import data_versions
+
+
+def _validators(tables):
+    """当前数据对应的 (ETag, Last-Modified)"""
+    interval = current_app.config.get('DATA_VERSION_CHECK_INTERVAL', 1)
+    versions = data_versions.get(db.session, tables, interval)
+    etag = '-'.join(f'{table}.{version}' for table, version in zip(tables, versions))
+
+    last_modified = data_versions.last_modified(db.session, tables, interval)
+    if last_modified is not None:
+        # 数据库中保存的是本地时间，HTTP头使用UTC并精确到秒
+        last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+        # 带上写入时间，换库（如恢复备份）后版本号相同也不会误判为未修改
+        etag += f'@{int(last_modified.timestamp())}'
+    return etag, last_modified
+
+
+def _not_modified(etag: str, last_modified) -> bool:
+    """请求中的校验值与当前数据是否一致（有 If-None-Match 时忽略 If-Modified-Since）"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional_get(*tables: str):
+    """
+    为GET接口增加 ETag / Last-Modified 和304响应
+
+    只给状态码200的响应设置校验头，并要求浏览器每次使用前向服务器确认（Cache-Control: no-cache）
+
+    Args:
+        *tables: 接口读取的表名，任一表的数据版本变化后校验值随之变化
+    """
+    def decorator(view: Callable):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = _validators(tables)
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,23 +1,125 @@
 """
 导出API
-提供Excel导出功能
+提供Excel导出功能，支持流式导出（CSV / 边生成边发送的Excel），大数据量导出时内存占用恒定；
+另支持 Parquet / Arrow / csv.gz 格式，供分析脚本直接批量下载
 """
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context, current_app
 from datetime import datetime
-from ..models import Platform, Bank
+from ..models import Platform, Bank, PlatformMonthlyRollup
 from .. import db
+from ..database import read_replica
+from ..services.rollup import latest_rollups, group_rollups
+from ..services.xlsx import StreamingWorkbook
 import pandas as pd
 import tempfile
+import csv
+import io
 import os
+import zlib
 
 # 创建蓝图
 export_bp = Blueprint('export', __name__)
 
+# 导出列（字段名, 中文列名）
+PLATFORM_EXPORT_COLUMNS = [
+    ('report_month', '报告月份'),
+    ('name', '平台名称'),
+    ('company_group', '所属集团'),
+    ('platform_type', '产品类别'),
+    ('loan_type', '贷款用途'),
+    ('loan_balance', '贷款余额(亿元)'),
+    ('loan_issued', '发放规模(亿元)'),
+    ('yoy_growth', '同比增长(%)'),
+    ('mom_growth', '环比增长(%)'),
+    ('data_source', '数据来源')
+]
+
+BANK_EXPORT_COLUMNS = [
+    ('report_month', '报告月份'),
+    ('name', '银行名称'),
+    ('bank_type', '银行类型'),
+    ('total_internet_loan', '互联网贷款规模(亿元)'),
+    ('coop_platform_count', '合作平台数量'),
+    ('top3_platform_share', '前3大平台占比(%)'),
+    ('data_source', '数据来源')
+]
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# 流式导出格式（格式名 -> (文件扩展名, MIME类型)）
+STREAM_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'csv.gz': ('csv.gz', 'application/gzip'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.stream')
+}
+
+
+def get_export_params():
+    """导出参数：POST 读取请求体，GET 读取查询参数"""
+    if request.method == 'GET':
+        params = request.args.to_dict()
+        params['stream'] = params.get('stream') in ('1', 'true')
+        return params
+    return request.get_json(silent=True) or {}
+
+
+def build_platform_query(params, *columns):
+    """
+    按导出参数构建平台数据查询
+
+    Args:
+        params: 筛选参数字典
+        *columns: 只查询指定列（为空时查询完整对象）
+    """
+    query = db.session.query(*columns) if columns else db.session.query(Platform)
+
+    if params.get('company_group'):
+        query = query.filter(Platform.company_group == params['company_group'])
+    if params.get('platform_type'):
+        query = query.filter(Platform.platform_type == params['platform_type'])
+    if params.get('loan_type'):
+        query = query.filter(Platform.loan_type == params['loan_type'])
+    if params.get('start_month'):
+        start_date = datetime.strptime(params['start_month'], '%Y-%m').date()
+        query = query.filter(Platform.report_month >= start_date)
+    if params.get('end_month'):
+        end_date = datetime.strptime(params['end_month'], '%Y-%m').date()
+        query = query.filter(Platform.report_month <= end_date)
+
+    return query.order_by(Platform.report_month.desc().nulls_last(), Platform.id.desc())
 
-@export_bp.route('/export/platform', methods=['POST'])
+
+def build_bank_query(params, *columns):
+    """
+    按导出参数构建银行数据查询
+
+    Args:
+        params: 筛选参数字典
+        *columns: 只查询指定列（为空时查询完整对象）
+    """
+    query = db.session.query(*columns) if columns else db.session.query(Bank)
+
+    if params.get('bank_type'):
+        query = query.filter(Bank.bank_type == params['bank_type'])
+    if params.get('start_month'):
+        start_date = datetime.strptime(params['start_month'], '%Y-%m').date()
+        query = query.filter(Bank.report_month >= start_date)
+    if params.get('end_month'):
+        end_date = datetime.strptime(params['end_month'], '%Y-%m').date()
+        query = query.filter(Bank.report_month <= end_date)
+
+    return query.order_by(Bank.report_month.desc().nulls_last(), Bank.id.desc())
+
+
+@export_bp.route('/export/platform', methods=['GET', 'POST'])
+@read_replica
 def export_platform_data():
     """
-    导出平台数据为Excel
+    导出平台数据
+
+    POST 通过请求体传参；GET 通过查询参数传参，便于分析脚本直接下载，
+    例如 pd.read_parquet('.../api/v1/export/platform?format=parquet')
 
     Request Body:
         company_group: 集团筛选（可选）
@@ -25,37 +127,25 @@ def export_platform_data():
         loan_type: 贷款用途（可选）
         start_month: 开始月份（可选）
         end_month: 结束月份（可选）
+        format: 导出格式（xlsx/csv/csv.gz/parquet/arrow，默认xlsx；xlsx以外的格式总是流式输出）
+        stream: xlsx格式时是否流式导出（默认false）
 
     Returns:
-        Excel文件下载
+        文件下载
     """
     try:
         # 获取请求参数
-        data = request.get_json() or {}
-        company_group = data.get('company_group')
-        platform_type = data.get('platform_type')
-        loan_type = data.get('loan_type')
-        start_month = data.get('start_month')
-        end_month = data.get('end_month')
-
-        # 构建查询
-        query = db.session.query(Platform)
-
-        if company_group:
-            query = query.filter(Platform.company_group == company_group)
-        if platform_type:
-            query = query.filter(Platform.platform_type == platform_type)
-        if loan_type:
-            query = query.filter(Platform.loan_type == loan_type)
-        if start_month:
-            start_date = datetime.strptime(start_month, '%Y-%m')
-            query = query.filter(Platform.report_month >= start_date)
-        if end_month:
-            end_date = datetime.strptime(end_month, '%Y-%m')
-            query = query.filter(Platform.report_month <= end_date)
+        params = get_export_params()
+        export_format = params.get('format', 'xlsx')
+
+        if export_format != 'xlsx':
+            query = build_platform_query(params, *_model_columns(Platform, PLATFORM_EXPORT_COLUMNS))
+            return stream_export(query, Platform, PLATFORM_EXPORT_COLUMNS, export_format, 'platform_data')
+        if params.get('stream'):
+            return stream_platform_xlsx(params)
 
         # 获取数据
-        data = query.order_by(Platform.report_month.desc()).all()
+        data = build_platform_query(params).all()
 
         if not data:
             return jsonify({
@@ -68,32 +158,11 @@ def export_platform_data():
         df = pd.DataFrame([item.to_dict() for item in data])
 
         # 选择和排序列
-        columns_order = [
-            'report_month', 'name', 'company_group',
-            'platform_type', 'loan_type',
-            'loan_balance', 'loan_issued',
-            'yoy_growth', 'mom_growth',
-            'data_source'
-        ]
-
-        # 确保列存在
-        columns_order = [col for col in columns_order if col in df.columns]
+        columns_order = [col for col, _ in PLATFORM_EXPORT_COLUMNS if col in df.columns]
         df = df[columns_order]
 
         # 列名映射（中文）
-        column_mapping = {
-            'report_month': '报告月份',
-            'name': '平台名称',
-            'company_group': '所属集团',
-            'platform_type': '产品类别',
-            'loan_type': '贷款用途',
-            'loan_balance': '贷款余额(亿元)',
-            'loan_issued': '发放规模(亿元)',
-            'yoy_growth': '同比增长(%)',
-            'mom_growth': '环比增长(%)',
-            'data_source': '数据来源'
-        }
-        df.rename(columns=column_mapping, inplace=True)
+        df.rename(columns=dict(PLATFORM_EXPORT_COLUMNS), inplace=True)
 
         # 创建临时文件
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -109,7 +178,7 @@ def export_platform_data():
             df.to_excel(writer, sheet_name='平台数据', index=False)
 
             # 汇总表
-            summary_data = create_platform_summary(df)
+            summary_data = create_platform_summary(params)
             summary_df = pd.DataFrame(summary_data)
             summary_df.to_excel(writer, sheet_name='数据汇总', index=False)
 
@@ -118,9 +187,15 @@ def export_platform_data():
             filepath,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype=XLSX_MIMETYPE
         )
 
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
     except Exception as e:
         return jsonify({
             'code': -1,
@@ -129,40 +204,38 @@ def export_platform_data():
         }), 500
 
 
-@export_bp.route('/export/bank', methods=['POST'])
+@export_bp.route('/export/bank', methods=['GET', 'POST'])
+@read_replica
 def export_bank_data():
     """
-    导出银行数据为Excel
+    导出银行数据
+
+    POST 通过请求体传参；GET 通过查询参数传参，便于分析脚本直接下载，
+    例如 pd.read_parquet('.../api/v1/export/bank?format=parquet')
 
     Request Body:
         bank_type: 银行类型（可选）
         start_month: 开始月份（可选）
         end_month: 结束月份（可选）
+        format: 导出格式（xlsx/csv/csv.gz/parquet/arrow，默认xlsx；xlsx以外的格式总是流式输出）
+        stream: xlsx格式时是否流式导出（默认false）
 
     Returns:
-        Excel文件下载
+        文件下载
     """
     try:
         # 获取请求参数
-        data = request.get_json() or {}
-        bank_type = data.get('bank_type')
-        start_month = data.get('start_month')
-        end_month = data.get('end_month')
-
-        # 构建查询
-        query = db.session.query(Bank)
-
-        if bank_type:
-            query = query.filter(Bank.bank_type == bank_type)
-        if start_month:
-            start_date = datetime.strptime(start_month, '%Y-%m')
-            query = query.filter(Bank.report_month >= start_date)
-        if end_month:
-            end_date = datetime.strptime(end_month, '%Y-%m')
-            query = query.filter(Bank.report_month <= end_date)
+        params = get_export_params()
+        export_format = params.get('format', 'xlsx')
+
+        if export_format != 'xlsx':
+            query = build_bank_query(params, *_model_columns(Bank, BANK_EXPORT_COLUMNS))
+            return stream_export(query, Bank, BANK_EXPORT_COLUMNS, export_format, 'bank_data')
+        if params.get('stream'):
+            return stream_bank_xlsx(params)
 
         # 获取数据
-        data = query.order_by(Bank.report_month.desc()).all()
+        data = build_bank_query(params).all()
 
         if not data:
             return jsonify({
@@ -175,27 +248,11 @@ def export_bank_data():
         df = pd.DataFrame([item.to_dict() for item in data])
 
         # 选择和排序列
-        columns_order = [
-            'report_month', 'name', 'bank_type',
-            'total_internet_loan', 'coop_platform_count',
-            'top3_platform_share', 'data_source'
-        ]
-
-        # 确保列存在
-        columns_order = [col for col in columns_order if col in df.columns]
+        columns_order = [col for col, _ in BANK_EXPORT_COLUMNS if col in df.columns]
         df = df[columns_order]
 
         # 列名映射（中文）
-        column_mapping = {
-            'report_month': '报告月份',
-            'name': '银行名称',
-            'bank_type': '银行类型',
-            'total_internet_loan': '互联网贷款规模(亿元)',
-            'coop_platform_count': '合作平台数量',
-            'top3_platform_share': '前3大平台占比(%)',
-            'data_source': '数据来源'
-        }
-        df.rename(columns=column_mapping, inplace=True)
+        df.rename(columns=dict(BANK_EXPORT_COLUMNS), inplace=True)
 
         # 创建临时文件
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -220,9 +277,15 @@ def export_bank_data():
             filepath,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype=XLSX_MIMETYPE
         )
 
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
     except Exception as e:
         return jsonify({
             'code': -1,
@@ -231,28 +294,36 @@ def export_bank_data():
         }), 500
 
 
-def create_platform_summary(df):
-    """创建平台数据汇总"""
-    summary = []
-
-    # 最新月份
-    if '报告月份' in df.columns:
-        latest_month = df['报告月份'].max()
-        latest_data = df[df['报告月份'] == latest_month]
+def create_platform_summary(params):
+    """
+    创建平台数据汇总（最新月份的总量和按集团统计）
 
-        summary.append(['指标', '数值'])
-        summary.append(['最新月份', latest_month])
-        summary.append(['平台数量', len(latest_data)])
-        summary.append(['总贷款余额(亿元)', f"{latest_data['贷款余额(亿元)'].sum():.2f}"])
-        summary.append(['总发放规模(亿元)', f"{latest_data['发放规模(亿元)'].sum():.2f}"])
-        summary.append(['', ''])
-        summary.append(['按集团统计', ''])
+    读取月度汇总表，筛选条件与导出数据相同，不需要在导出的明细上再做一遍分组统计
 
-        # 按集团统计
-        if '所属集团' in df.columns:
-            group_stats = latest_data.groupby('所属集团')['贷款余额(亿元)'].agg(['sum', 'count'])
-            for group, row in group_stats.iterrows():
-                summary.append([f'  {group}', f"{row['sum']:.2f} 亿元 ({int(row['count'])}个平台)"])
+    Args:
+        params: 导出筛选参数
+    """
+    start = datetime.strptime(params['start_month'], '%Y-%m').date() if params.get('start_month') else None
+    end = datetime.strptime(params['end_month'], '%Y-%m').date() if params.get('end_month') else None
+    latest_month, rollups = latest_rollups(
+        db.session, PlatformMonthlyRollup, start=start, end=end,
+        company_group=params.get('company_group'),
+        platform_type=params.get('platform_type'),
+        loan_type=params.get('loan_type')
+    )
+
+    summary = [
+        ['指标', '数值'],
+        ['最新月份', latest_month.strftime('%Y-%m') if latest_month else None],
+        ['平台数量', sum(item.record_count for item in rollups)],
+        ['总贷款余额(亿元)', f'{sum(item.total_balance for item in rollups):.2f}'],
+        ['总发放规模(亿元)', f'{sum(item.total_issued for item in rollups):.2f}'],
+        ['', ''],
+        ['按集团统计', '']
+    ]
+    for group, group_balance, group_count in group_rollups(rollups, 'company_group', 'total_balance', 'record_count'):
+        if group is not None:
+            summary.append([f'  {group}', f'{group_balance:.2f} 亿元 ({group_count}个平台)'])
 
     return summary
 
@@ -278,8 +349,274 @@ def create_bank_ranking(df):
     return ranking
 
 
+def _model_columns(model, export_columns):
+    """导出列对应的模型字段"""
+    return [getattr(model, field) for field, _ in export_columns]
+
+
+def iter_export_rows(query, export_columns):
+    """
+    分块读取导出数据
+
+    通过 yield_per 分批取数（PostgreSQL 上使用服务端游标），
+    每次只在内存中保留一个批次；报告月份格式化为 YYYY-MM，与 to_dict 输出一致
+    """
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    month_index = [field for field, _ in export_columns].index('report_month')
+
+    for row in query.yield_per(chunk_size):
+        row = list(row)
+        if row[month_index]:
+            row[month_index] = row[month_index].strftime('%Y-%m')
+        yield row
+
+
+def _attachment_headers(filename):
+    return {'Content-Disposition': f'attachment; filename={filename}'}
+
+
+def stream_csv_export(query, export_columns, file_prefix, compress=False):
+    """
+    流式导出CSV，边查询边输出
+
+    Args:
+        query: 只查询导出列的查询
+        export_columns: 导出列定义
+        file_prefix: 文件名前缀
+        compress: 是否gzip压缩（边生成边压缩）
+    """
+    extension, mimetype = STREAM_FORMATS['csv.gz' if compress else 'csv']
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f'{file_prefix}_{timestamp}.{extension}'
+    flush_rows = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        # 带BOM，Excel打开时可正确识别UTF-8中文
+        buffer.write('\ufeff')
+        writer.writerow([label for _, label in export_columns])
+
+        for index, row in enumerate(iter_export_rows(query, export_columns), 1):
+            writer.writerow(row)
+            if index % flush_rows == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue().encode('utf-8')
+
+    def generate():
+        if not compress:
+            yield from generate_csv()
+            return
+
+        # wbits=31 生成gzip格式
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in generate_csv():
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers=_attachment_headers(filename)
+    )
+
+
+def stream_xlsx_export(sheets, file_prefix):
+    """
+    流式生成Excel，边查询边输出
+
+    每写入 EXPORT_CHUNK_SIZE 行就把已压缩的zip字节发送出去，第一批数据读到后即开始响应，
+    不必等整个工作簿生成完毕（见 services/xlsx.py）
+
+    Args:
+        sheets: 返回 (工作表名, 行迭代器) 序列的函数，各工作表按顺序生成
+        file_prefix: 文件名前缀
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f'{file_prefix}_{timestamp}.xlsx'
+    flush_rows = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+
+    def generate():
+        workbook = StreamingWorkbook()
+        for title, rows in sheets():
+            sheet = workbook.create_sheet(title)
+            for index, row in enumerate(rows, 1):
+                sheet.append(row)
+                if index % flush_rows == 0:
+                    data = workbook.take()
+                    if data:
+                        yield data
+        yield workbook.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=XLSX_MIMETYPE,
+        headers=_attachment_headers(filename)
+    )
+
+
+def stream_export(query, model, export_columns, export_format, file_prefix):
+    """
+    按格式流式导出（csv/csv.gz/parquet/arrow）
+
+    Raises:
+        ValueError: 不支持的导出格式
+    """
+    if export_format == 'csv':
+        return stream_csv_export(query, export_columns, file_prefix)
+    if export_format == 'csv.gz':
+        return stream_csv_export(query, export_columns, file_prefix, compress=True)
+    if export_format in ('parquet', 'arrow'):
+        return stream_columnar_export(query, model, export_columns, export_format, file_prefix)
+    raise ValueError(f'不支持的导出格式: {export_format}')
+
+
+def _arrow_schema(model, export_columns):
+    """根据模型字段类型生成Arrow schema（列名使用字段名）"""
+    import pyarrow as pa
+    from sqlalchemy import Date, Float, Integer
+
+    fields = []
+    for field, _ in export_columns:
+        column_type = model.__table__.columns[field].type
+        if isinstance(column_type, Date):
+            arrow_type = pa.date32()
+        elif isinstance(column_type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(field, arrow_type))
+    return pa.schema(fields)
+
+
+def iter_record_batches(query, schema):
+    """
+    按批次把查询结果直接转换为Arrow列式批次
+
+    每批从数据库取 EXPORT_BATCH_ROWS 行，转置为列后整体构建数组，
+    不经过ORM对象、to_dict() 和逐行的日期格式化
+    """
+    import pyarrow as pa
+
+    batch_rows = current_app.config.get('EXPORT_BATCH_ROWS', 50000)
+    result = db.session.execute(query.statement, execution_options={'yield_per': batch_rows})
+
+    for partition in result.partitions():
+        columns = list(zip(*partition))
+        arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_columnar_export(query, model, export_columns, export_format, file_prefix):
+    """
+    导出Parquet或Arrow IPC流
+
+    Arrow 流格式每个批次写完即可发送；Parquet 需要在文件末尾写入元数据，
+    先分批写入临时文件再分块发送，内存中同样只保留一个批次
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return jsonify({
+            'code': -1,
+            'message': f'未安装pyarrow，无法导出{export_format}格式',
+            'data': None
+        }), 501
+
+    extension, mimetype = STREAM_FORMATS[export_format]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f'{file_prefix}_{timestamp}.{extension}'
+    schema = _arrow_schema(model, export_columns)
+
+    def generate_arrow():
+        buffer = io.BytesIO()
+        with pa.ipc.new_stream(buffer, schema) as writer:
+            for batch in iter_record_batches(query, schema):
+                writer.write_batch(batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
+    def generate_parquet():
+        compression = current_app.config.get('EXPORT_PARQUET_COMPRESSION', 'zstd')
+        with tempfile.TemporaryFile() as output:
+            with pq.ParquetWriter(output, schema, compression=compression) as writer:
+                for batch in iter_record_batches(query, schema):
+                    writer.write_batch(batch)
+            output.seek(0)
+            while True:
+                chunk = output.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+
+    generate = generate_arrow if export_format == 'arrow' else generate_parquet
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers=_attachment_headers(filename)
+    )
+
+
+def stream_platform_xlsx(params):
+    """流式导出平台数据Excel（数据表 + 汇总表）"""
+    query = build_platform_query(params, *_model_columns(Platform, PLATFORM_EXPORT_COLUMNS))
+
+    def data_rows():
+        yield [label for _, label in PLATFORM_EXPORT_COLUMNS]
+        yield from iter_export_rows(query, PLATFORM_EXPORT_COLUMNS)
+
+    def sheets():
+        yield '平台数据', data_rows()
+        # 汇总表在数据表写完后才查询
+        yield '数据汇总', create_platform_summary(params)
+
+    return stream_xlsx_export(sheets, 'platform_data')
+
+
+def stream_bank_xlsx(params):
+    """流式导出银行数据Excel（数据表 + 排行榜）"""
+    query = build_bank_query(params, *_model_columns(Bank, BANK_EXPORT_COLUMNS))
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+
+    def data_rows():
+        yield [label for _, label in BANK_EXPORT_COLUMNS]
+        yield from iter_export_rows(query, BANK_EXPORT_COLUMNS)
+
+    def ranking_rows():
+        # 排行榜由数据库排序后再流式读取一遍，不在内存中排序
+        ranking_query = build_bank_query(
+            params, Bank.name, Bank.total_internet_loan, Bank.coop_platform_count
+        ).order_by(None).order_by(Bank.total_internet_loan.desc().nulls_last(), Bank.id)
+
+        yield ['排名', '银行名称', '互联网贷款规模(亿元)', '合作平台数量']
+        for idx, (name, total_loan, coop_count) in enumerate(ranking_query.yield_per(chunk_size), 1):
+            yield [
+                idx,
+                name or '',
+                f'{total_loan:.2f}' if total_loan is not None else '-',
+                int(coop_count) if coop_count is not None else '-'
+            ]
+
+    def sheets():
+        yield '银行数据', data_rows()
+        yield '银行排行榜', ranking_rows()
+
+    return stream_xlsx_export(sheets, 'bank_data')
+
+
 # 将导出路由注册到API蓝图的辅助函数
 def init_export_routes(api_bp):
     """初始化导出路由"""
-    api_bp.add_url_rule('/export/platform', view_func=export_platform_data)
-    api_bp.add_url_rule('/export/bank', view_func=export_bank_data)
+    api_bp.add_url_rule('/export/platform', view_func=export_platform_data, methods=['GET', 'POST'])
+    api_bp.add_url_rule('/export/bank', view_func=export_bank_data, methods=['GET', 'POST'])
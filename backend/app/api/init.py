@@ -6,6 +6,7 @@ from flask import Blueprint, jsonify
 from datetime import datetime
 from ..models import Platform, Bank
 from .. import db
+from ..services.cache import bump_data_version
 
 # 创建蓝图
 init_bp = Blueprint('init', __name__)
@@ -127,6 +128,7 @@ def seed_data():
         for bank in banks:
             db.session.add(bank)
 
+        bump_data_version(db.session, Platform.__tablename__, Bank.__tablename__)
         db.session.commit()
 
         return jsonify({
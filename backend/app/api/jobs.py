@@ -0,0 +1,175 @@
+"""
+爬虫任务API
+手动触发爬虫只把任务放入队列并立即返回，由工作进程执行；通过任务ID查询状态和进度
+"""
+from flask import Blueprint, request, jsonify, current_app
+from ..models import ScrapeJob
+from .. import db
+from ..services import jobqueue
+from .pagination import paginate
+
+# 创建蓝图
+jobs_bp = Blueprint('jobs', __name__)
+
+
+@jobs_bp.route('/admin/jobs/types', methods=['GET'])
+def get_job_types():
+    """
+    获取可运行的任务类型
+    """
+    return jsonify({
+        'code': 0,
+        'message': 'success',
+        'data': jobqueue.job_types()
+    })
+
+
+@jobs_bp.route('/admin/jobs', methods=['GET'])
+def get_jobs():
+    """
+    获取任务列表
+    支持按状态、任务类型筛选和分页
+    """
+    try:
+        status = request.args.get('status')
+        job_type = request.args.get('job_type')
+
+        query = db.session.query(ScrapeJob)
+        if status:
+            query = query.filter(ScrapeJob.status == status)
+        if job_type:
+            query = query.filter(ScrapeJob.job_type == job_type)
+
+        data = paginate(query, ScrapeJob, default_sort='created_at')
+
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': data
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'code': -1,
+            'message': f'获取任务列表失败: {str(e)}',
+            'data': None
+        }), 500
+
+
+@jobs_bp.route('/admin/jobs', methods=['POST'])
+def enqueue_job():
+    """
+    立即运行爬虫（加入任务队列，不等待执行完成）
+
+    Request Body:
+        job_type: 任务类型（见 /admin/jobs/types）
+        params: 可选，{'options': 爬虫构造参数, 'run': 爬取参数}
+        priority: 可选，优先级（1=最高），默认取数据源优先级
+    """
+    try:
+        if not current_app.config.get('ENABLE_SCRAPERS', True):
+            return jsonify({
+                'code': -1,
+                'message': '爬虫功能已禁用',
+                'data': None
+            }), 400
+
+        data = request.get_json(silent=True) or {}
+        priority = data.get('priority')
+        if priority is not None and not isinstance(priority, int):
+            raise ValueError('priority必须是整数')
+
+        job, created = jobqueue.enqueue(db.session, data.get('job_type'), params=data.get('params'),
+                                        priority=priority, trigger='manual')
+
+        return jsonify({
+            'code': 0,
+            'message': '任务已加入队列' if created else '同类任务已在队列中',
+            'data': job.to_dict()
+        }), 202
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'code': -1,
+            'message': f'任务入队失败: {str(e)}',
+            'data': None
+        }), 500
+
+
+@jobs_bp.route('/admin/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    获取任务状态和进度
+    """
+    job = db.session.get(ScrapeJob, job_id)
+    if not job:
+        return jsonify({
+            'code': -1,
+            'message': '任务不存在',
+            'data': None
+        }), 404
+
+    return jsonify({
+        'code': 0,
+        'message': 'success',
+        'data': job.to_dict()
+    })
+
+
+@jobs_bp.route('/admin/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    取消排队中的任务
+    """
+    try:
+        job = jobqueue.cancel(db.session, job_id)
+
+        return jsonify({
+            'code': 0,
+            'message': '任务已取消',
+            'data': job.to_dict()
+        })
+
+    except LookupError:
+        return jsonify({
+            'code': -1,
+            'message': '任务不存在',
+            'data': None
+        }), 404
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': str(e),
+            'data': None
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'code': -1,
+            'message': f'取消任务失败: {str(e)}',
+            'data': None
+        }), 500
+
+
+# 将任务路由注册到API蓝图的辅助函数
+def init_job_routes(api_bp):
+    """初始化任务路由"""
+    api_bp.add_url_rule('/admin/jobs/types', view_func=get_job_types, methods=['GET'])
+    api_bp.add_url_rule('/admin/jobs', view_func=get_jobs, methods=['GET'])
+    api_bp.add_url_rule('/admin/jobs', view_func=enqueue_job, methods=['POST'])
+    api_bp.add_url_rule('/admin/jobs/<int:job_id>', view_func=get_job, methods=['GET'])
+    api_bp.add_url_rule('/admin/jobs/<int:job_id>/cancel', view_func=cancel_job, methods=['POST'])
@@ -0,0 +1,204 @@
+"""
+分页工具
+支持传统的页码分页（page/per_page）和游标分页（after），
+游标分页按 (排序字段, id) 做键集定位，翻到任何深度都只需一次索引查找
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Tuple
+from flask import request, current_app
+from sqlalchemy import func, select, tuple_
+
+from ..services.cache import LocalCache, data_versions
+
+
+# 总数缓存：同一筛选条件、同一数据版本的 COUNT 在TTL内复用，避免每次翻页都做一次全量计数
+count_cache = LocalCache()
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, row_id: int) -> str:
+    """把排序键和id编码为不透明的游标字符串"""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    payload = json.dumps({'k': sort_by, 'o': sort_order, 'v': value, 'id': row_id},
+                         ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, sort_by: str, sort_order: str, column) -> Tuple[Any, int]:
+    """
+    解析游标，返回 (排序字段值, id)
+
+    Raises:
+        ValueError: 游标无效或与当前排序条件不一致
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        key, order, value, row_id = payload['k'], payload['o'], payload['v'], int(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('无效的分页游标')
+
+    if key != sort_by or order != sort_order:
+        raise ValueError('分页游标与当前排序条件不一致')
+
+    if value is not None:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif python_type is date:
+            value = date.fromisoformat(value[:10])
+
+    return value, row_id
+
+
+def _sort_column(model, sort_by: str):
+    """校验并返回排序列"""
+    if sort_by not in model.__table__.columns:
+        raise ValueError(f'不支持的排序字段: {sort_by}')
+    return getattr(model, sort_by)
+
+
+def _order_clauses(column, id_column, descending: bool):
+    """
+    排序子句：排序字段 + id 作为唯一的决胜键
+
+    显式指定NULL位置（升序在前、降序在后），与SQLite默认一致，
+    在PostgreSQL上也能得到同样的顺序，保证游标条件成立
+    """
+    if descending:
+        return [column.desc().nulls_last(), id_column.desc()]
+    return [column.asc().nulls_first(), id_column.asc()]
+
+
+def _fetch_after(ordered, column, id_column, value, row_id: int, descending: bool, limit: int):
+    """
+    取游标之后的 limit 条数据
+
+    非NULL部分用 (排序字段, id) 行值比较，可以直接走索引范围扫描；
+    NULL部分（升序时在最前、降序时在最后）单独查询再拼接，
+    避免 OR 条件让查询规划器退化为从头扫描整个索引
+    """
+    if descending:
+        if value is None:
+            segments = [ordered.filter(column.is_(None), id_column < row_id)]
+        else:
+            segments = [
+                ordered.filter(tuple_(column, id_column) < tuple_(value, row_id)),
+                ordered.filter(column.is_(None))
+            ]
+    else:
+        if value is None:
+            segments = [
+                ordered.filter(column.is_(None), id_column > row_id),
+                ordered.filter(column.isnot(None))
+            ]
+        else:
+            segments = [ordered.filter(tuple_(column, id_column) > tuple_(value, row_id))]
+
+    rows = []
+    for segment in segments:
+        rows.extend(segment.limit(limit - len(rows)).all())
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def count_query(query, model) -> int:
+    """
+    带缓存的总数查询
+
+    缓存键为编译后的SQL、参数和表的数据版本号：写入后版本号变化，
+    任何进程都不会再返回写入前的总数（最多延迟 DATA_VERSION_CHECK_INTERVAL 秒）
+    """
+    ttl = current_app.config.get('PAGINATION_COUNT_CACHE_TTL', 60)
+    statement = query.statement
+    if ttl > 0:
+        version = data_versions.get(query.session, (model.__tablename__,),
+                                    current_app.config.get('DATA_VERSION_CHECK_INTERVAL', 1))
+        compiled = statement.compile()
+        key = f'{version}|{compiled}|{sorted(compiled.params.items(), key=lambda kv: kv[0])!r}'
+        total = count_cache.get(key)
+        if total is not None:
+            return total
+
+    total = query.session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+    if ttl > 0:
+        count_cache.set(key, total, ttl)
+    return total
+
+
+def paginate(query, model, default_sort: str = 'report_month') -> Dict[str, Any]:
+    """
+    按请求参数分页
+
+    Query Parameters:
+        sort_by: 排序字段
+        sort_order: 排序方向（asc/desc，默认desc）
+        per_page: 每页数量（默认20）
+        page: 页码（页码分页，默认1）
+        cursor: 为1时使用游标分页返回第一页
+        after: 上一页返回的 next_cursor，传入即使用游标分页
+        with_total: 游标分页时是否返回总数（默认0）
+
+    Args:
+        query: 已应用筛选条件、尚未排序的查询
+        model: 模型类
+        default_sort: 默认排序字段
+
+    Returns:
+        响应中的data字典
+    """
+    sort_by = request.args.get('sort_by', default_sort)
+    sort_order = request.args.get('sort_order', 'desc')
+    per_page = int(request.args.get('per_page', 20))
+    after = request.args.get('after')
+    cursor_mode = bool(after) or request.args.get('cursor') in ('1', 'true')
+
+    if per_page < 1:
+        raise ValueError('per_page必须大于0')
+
+    column = _sort_column(model, sort_by)
+    descending = sort_order == 'desc'
+    ordered = query.order_by(*_order_clauses(column, model.id, descending))
+
+    if not cursor_mode:
+        page = int(request.args.get('page', 1))
+        total = count_query(query, model)
+        data = ordered.offset((page - 1) * per_page).limit(per_page).all()
+
+        return {
+            'items': [item.to_dict() for item in data],
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page
+        }
+
+    # 多取一条用于判断是否还有下一页
+    if after:
+        value, row_id = decode_cursor(after, sort_by, sort_order, column)
+        rows = _fetch_after(ordered, column, model.id, value, row_id, descending, per_page + 1)
+    else:
+        rows = ordered.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+
+    result = {
+        'items': [item.to_dict() for item in rows],
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
+    if request.args.get('with_total') in ('1', 'true'):
+        result['total'] = count_query(query, model)
+
+    return result
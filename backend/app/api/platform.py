@@ -4,14 +4,22 @@
 """
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from ..models import Platform
+from ..models import Platform, PlatformMonthlyRollup
 from .. import db
+from .pagination import paginate
+from .conditional import conditional_get
+from ..database import read_replica
+from ..services.cache import bump_data_version, cached_response
+from ..services.rollup import latest_rollups, group_rollups
+from ..services.readmodel import read_models
 
 # 创建蓝图
 platform_bp = Blueprint('platforms', __name__)
 
 
 @platform_bp.route('/platforms', methods=['GET'])
+@read_replica
+@conditional_get(Platform.__tablename__)
 def get_platforms():
     """
     获取所有平台列表
@@ -54,6 +62,8 @@ def get_platforms():
 
 
 @platform_bp.route('/platforms/data', methods=['GET'])
+@read_replica
+@conditional_get(Platform.__tablename__)
 def get_platform_data():
     """
     获取平台数据（支持筛选）
@@ -66,6 +76,11 @@ def get_platform_data():
         end_month: 结束月份（YYYY-MM）
         page: 页码（默认1）
         per_page: 每页数量（默认20）
+        sort_by: 排序字段（默认report_month）
+        sort_order: 排序方向（asc/desc，默认desc）
+        cursor: 为1时使用游标分页
+        after: 游标分页的下一页游标（上一页返回的next_cursor）
+        with_total: 游标分页时是否返回总数
 
     Returns:
         JSON响应
@@ -77,50 +92,49 @@ def get_platform_data():
         loan_type = request.args.get('loan_type')
         start_month = request.args.get('start_month')
         end_month = request.args.get('end_month')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        sort_by = request.args.get('sort_by', 'report_month')
-        sort_order = request.args.get('sort_order', 'desc')
 
-        # 构建查询
-        query = db.session.query(Platform)
-
-        # 应用筛选条件
-        if company_group:
-            query = query.filter(Platform.company_group == company_group)
-        if platform_type:
-            query = query.filter(Platform.platform_type == platform_type)
-        if loan_type:
-            query = query.filter(Platform.loan_type == loan_type)
-        if start_month:
-            start_date = datetime.strptime(start_month, '%Y-%m')
-            query = query.filter(Platform.report_month >= start_date)
-        if end_month:
-            end_date = datetime.strptime(end_month, '%Y-%m')
-            query = query.filter(Platform.report_month <= end_date)
-
-        # 排序
-        if sort_order == 'desc':
-            query = query.order_by(db.desc(getattr(Platform, sort_by)))
-        else:
-            query = query.order_by(db.asc(getattr(Platform, sort_by)))
-
-        # 分页查询
-        total = query.count()
-        data = query.offset((page - 1) * per_page).limit(per_page).all()
+        start_date = datetime.strptime(start_month, '%Y-%m').date() if start_month else None
+        end_date = datetime.strptime(end_month, '%Y-%m').date() if end_month else None
+
+        # 启用列式只读模型时在内存中筛选和分页
+        data = None
+        table = read_models.get(db.session, Platform)
+        if table is not None:
+            mask = table.mask(start=start_date, end=end_date, company_group=company_group,
+                              platform_type=platform_type, loan_type=loan_type)
+            data = table.paginate(mask, default_sort='report_month')
+
+        if data is None:
+            # 构建查询
+            query = db.session.query(Platform)
+
+            # 应用筛选条件
+            if company_group:
+                query = query.filter(Platform.company_group == company_group)
+            if platform_type:
+                query = query.filter(Platform.platform_type == platform_type)
+            if loan_type:
+                query = query.filter(Platform.loan_type == loan_type)
+            if start_date:
+                query = query.filter(Platform.report_month >= start_date)
+            if end_date:
+                query = query.filter(Platform.report_month <= end_date)
+
+            # 排序并分页
+            data = paginate(query, Platform, default_sort='report_month')
 
         return jsonify({
             'code': 0,
             'message': 'success',
-            'data': {
-                'items': [item.to_dict() for item in data],
-                'total': total,
-                'page': page,
-                'per_page': per_page,
-                'pages': (total + per_page - 1) // per_page
-            }
+            'data': data
         })
 
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
     except Exception as e:
         return jsonify({
             'code': -1,
@@ -130,18 +144,26 @@ def get_platform_data():
 
 
 @platform_bp.route('/platforms/stats/overview', methods=['GET'])
+@read_replica
+@conditional_get(Platform.__tablename__)
+@cached_response(Platform.__tablename__)
 def get_platform_overview():
     """
-    获取平台数据概览
+    获取平台数据概览（读取月度汇总表，按数据版本缓存）
 
     Returns:
         JSON响应，包含最新的总体统计数据
     """
     try:
-        from sqlalchemy import func
-
-        # 获取最新月份
-        latest_month = db.session.query(func.max(Platform.report_month)).scalar()
+        # 最新月份的汇总行（每个集团/产品类别/贷款用途组合一行），启用列式只读模型时在内存中分组
+        table = read_models.get(db.session, Platform)
+        if table is not None:
+            latest_month, rollups = table.latest_rollups(
+                ('company_group', 'platform_type', 'loan_type'),
+                {'total_balance': 'loan_balance', 'total_issued': 'loan_issued'}
+            )
+        else:
+            latest_month, rollups = latest_rollups(db.session, PlatformMonthlyRollup)
 
         if not latest_month:
             return jsonify({
@@ -156,30 +178,20 @@ def get_platform_overview():
                 }
             })
 
-        # 最新月份数据
-        latest_data = db.session.query(Platform).filter(
-            Platform.report_month == latest_month
-        ).all()
-
-        total_balance = sum(item.loan_balance or 0 for item in latest_data)
-        total_issued = sum(item.loan_issued or 0 for item in latest_data)
+        total_balance = sum(item.total_balance for item in rollups)
+        total_issued = sum(item.total_issued for item in rollups)
+        platform_count = sum(item.record_count for item in rollups)
 
         # 按集团分组统计
-        group_stats = db.session.query(
-            Platform.company_group,
-            func.sum(Platform.loan_balance).label('total_balance'),
-            func.count(Platform.id).label('platform_count')
-        ).filter(
-            Platform.report_month == latest_month
-        ).group_by(Platform.company_group).all()
-
         by_group = [
             {
-                'group': item.company_group or '未知',
-                'total_balance': float(item.total_balance or 0),
-                'platform_count': item.platform_count
+                'group': group or '未知',
+                'total_balance': float(group_balance),
+                'platform_count': group_count
             }
-            for item in group_stats
+            for group, group_balance, group_count in group_rollups(
+                rollups, 'company_group', 'total_balance', 'record_count'
+            )
         ]
 
         return jsonify({
@@ -189,7 +201,7 @@ def get_platform_overview():
                 'latest_month': latest_month.strftime('%Y-%m'),
                 'total_balance': round(total_balance, 2),
                 'total_issued': round(total_issued, 2),
-                'platform_count': len(latest_data),
+                'platform_count': platform_count,
                 'by_group': by_group
             }
         })
@@ -203,6 +215,8 @@ def get_platform_overview():
 
 
 @platform_bp.route('/platforms/<int:platform_id>', methods=['GET'])
+@read_replica
+@conditional_get(Platform.__tablename__)
 def get_platform_detail(platform_id):
     """
     获取单个平台详情
@@ -238,6 +252,8 @@ def get_platform_detail(platform_id):
 
 
 @platform_bp.route('/platforms/<int:platform_id>/timeline', methods=['GET'])
+@read_replica
+@conditional_get(Platform.__tablename__)
 def get_platform_timeline(platform_id):
     """
     获取平台的时间序列数据
@@ -253,7 +269,16 @@ def get_platform_timeline(platform_id):
         JSON响应，包含按时间排序的数据
     """
     try:
-        platform = db.session.query(Platform).filter_by(id=platform_id).first()
+        table = read_models.get(db.session, Platform)
+        if table is not None:
+            index = table.find_id(platform_id)
+            platform = None if index is None else {
+                'name': table.value('name', index),
+                'company_group': table.value('company_group', index)
+            }
+        else:
+            row = db.session.query(Platform).filter_by(id=platform_id).first()
+            platform = None if row is None else {'name': row.name, 'company_group': row.company_group}
 
         if not platform:
             return jsonify({
@@ -265,22 +290,29 @@ def get_platform_timeline(platform_id):
         platform_type = request.args.get('platform_type')
         loan_type = request.args.get('loan_type')
 
-        query = db.session.query(Platform).filter(Platform.name == platform.name)
+        if table is not None:
+            # 列式只读模型：按名称编码筛选，从按月份排好序的行号中取出
+            mask = table.mask(name=platform['name'], platform_type=platform_type, loan_type=loan_type)
+            timeline = table.rows(table.ordered(mask, 'report_month'))
+        else:
+            query = db.session.query(Platform).filter(Platform.name == platform['name'])
 
-        if platform_type:
-            query = query.filter(Platform.platform_type == platform_type)
-        if loan_type:
-            query = query.filter(Platform.loan_type == loan_type)
+            if platform_type:
+                query = query.filter(Platform.platform_type == platform_type)
+            if loan_type:
+                query = query.filter(Platform.loan_type == loan_type)
 
-        data = query.order_by(Platform.report_month.asc()).all()
+            # 与列式只读模型的顺序一致：月份为空的在前，同一月份按id
+            query = query.order_by(Platform.report_month.asc().nulls_first(), Platform.id.asc())
+            timeline = [item.to_dict() for item in query.all()]
 
         return jsonify({
             'code': 0,
             'message': 'success',
             'data': {
-                'platform_name': platform.name,
-                'company_group': platform.company_group,
-                'timeline': [item.to_dict() for item in data]
+                'platform_name': platform['name'],
+                'company_group': platform['company_group'],
+                'timeline': timeline
             }
         })
 
@@ -344,6 +376,7 @@ def seed_sample_data():
         for b in banks:
             db.session.add(b)
         
+        bump_data_version(db.session, Platform.__tablename__, Bank.__tablename__)
         db.session.commit()
         
         return jsonify({'code': 0, 'message': f'成功初始化 {len(platforms)} 条平台数据和 {len(banks)} 条银行数据', 'data': {'platforms': len(platforms), 'banks': len(banks)}})
@@ -0,0 +1,172 @@
+"""
+爬虫运行记录API
+查看每次运行的分阶段耗时、下载量、请求次数和错误，按数据源汇总对比运行效率
+"""
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func, case
+from ..models import ScrapeRun
+from .. import db
+from .pagination import paginate
+
+# 创建蓝图
+runs_bp = Blueprint('runs', __name__)
+
+
+def _filter_runs(query):
+    """按请求参数筛选运行记录（job_type/status/start_date/end_date，日期格式 YYYY-MM-DD）"""
+    job_type = request.args.get('job_type')
+    status = request.args.get('status')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    if job_type:
+        query = query.filter(ScrapeRun.job_type == job_type)
+    if status:
+        query = query.filter(ScrapeRun.status == status)
+    if start_date:
+        query = query.filter(ScrapeRun.started_at >= datetime.strptime(start_date, '%Y-%m-%d'))
+    if end_date:
+        end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+        query = query.filter(ScrapeRun.started_at < end)
+    return query
+
+
+@runs_bp.route('/admin/runs', methods=['GET'])
+def get_runs():
+    """
+    获取运行记录列表
+    支持按任务类型、状态、开始日期筛选和分页
+    """
+    try:
+        query = _filter_runs(db.session.query(ScrapeRun))
+        data = paginate(query, ScrapeRun, default_sort='started_at')
+
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': data
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'code': -1,
+            'message': f'获取运行记录失败: {str(e)}',
+            'data': None
+        }), 500
+
+
+@runs_bp.route('/admin/runs/summary', methods=['GET'])
+def get_runs_summary():
+    """
+    按任务类型汇总运行记录
+
+    Query Parameters:
+        days: 统计最近多少天（默认30，指定 start_date 时忽略）
+        job_type / status / start_date / end_date: 同运行记录列表
+
+    对比改动前后的效果时，可以用 start_date/end_date 分别查询两个时间段
+    """
+    try:
+        query = db.session.query(
+            ScrapeRun.job_type,
+            func.count(ScrapeRun.id).label('runs'),
+            func.sum(case((ScrapeRun.status == 'success', 1), else_=0)).label('succeeded'),
+            func.avg(ScrapeRun.duration).label('avg_duration'),
+            func.max(ScrapeRun.duration).label('max_duration'),
+            func.avg(ScrapeRun.list_seconds).label('avg_list_seconds'),
+            func.avg(ScrapeRun.download_seconds).label('avg_download_seconds'),
+            func.avg(ScrapeRun.parse_seconds).label('avg_parse_seconds'),
+            func.avg(ScrapeRun.save_seconds).label('avg_save_seconds'),
+            func.avg(ScrapeRun.bytes_downloaded).label('avg_bytes_downloaded'),
+            func.sum(ScrapeRun.requests).label('requests'),
+            func.sum(ScrapeRun.retries).label('retries'),
+            func.sum(ScrapeRun.failed_requests).label('failed_requests'),
+            func.sum(ScrapeRun.records_saved).label('records_saved'),
+            func.max(ScrapeRun.started_at).label('last_started_at')
+        )
+        if not request.args.get('start_date'):
+            days = int(request.args.get('days', 30))
+            if days < 1:
+                raise ValueError('days必须大于0')
+            query = query.filter(ScrapeRun.started_at >= datetime.now() - timedelta(days=days))
+        query = _filter_runs(query).group_by(ScrapeRun.job_type).order_by(ScrapeRun.job_type)
+
+        def rounded(value, digits=3):
+            return round(float(value), digits) if value is not None else None
+
+        items = [{
+            'job_type': row.job_type,
+            'runs': row.runs,
+            'succeeded': int(row.succeeded or 0),
+            'avg_duration': rounded(row.avg_duration),
+            'max_duration': rounded(row.max_duration),
+            'avg_stage_seconds': {
+                'list': rounded(row.avg_list_seconds),
+                'download': rounded(row.avg_download_seconds),
+                'parse': rounded(row.avg_parse_seconds),
+                'save': rounded(row.avg_save_seconds)
+            },
+            'avg_bytes_downloaded': int(row.avg_bytes_downloaded or 0),
+            'requests': int(row.requests or 0),
+            'retries': int(row.retries or 0),
+            'failed_requests': int(row.failed_requests or 0),
+            'records_saved': int(row.records_saved or 0),
+            'last_started_at': row.last_started_at.strftime('%Y-%m-%d %H:%M:%S') if row.last_started_at else None
+        } for row in query.all()]
+
+        # 平均耗时最长的数据源排在前面
+        items.sort(key=lambda item: item['avg_duration'] or 0, reverse=True)
+
+        return jsonify({
+            'code': 0,
+            'message': 'success',
+            'data': items
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'code': -1,
+            'message': f'参数错误: {str(e)}',
+            'data': None
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'code': -1,
+            'message': f'汇总运行记录失败: {str(e)}',
+            'data': None
+        }), 500
+
+
+@runs_bp.route('/admin/runs/<int:run_id>', methods=['GET'])
+def get_run(run_id):
+    """
+    获取单次运行记录（含错误详情）
+    """
+    run = db.session.get(ScrapeRun, run_id)
+    if not run:
+        return jsonify({
+            'code': -1,
+            'message': '运行记录不存在',
+            'data': None
+        }), 404
+
+    return jsonify({
+        'code': 0,
+        'message': 'success',
+        'data': run.to_dict(with_errors=True)
+    })
+
+
+# 将运行记录路由注册到API蓝图的辅助函数
+def init_run_routes(api_bp):
+    """初始化运行记录路由"""
+    api_bp.add_url_rule('/admin/runs', view_func=get_runs, methods=['GET'])
+    api_bp.add_url_rule('/admin/runs/summary', view_func=get_runs_summary, methods=['GET'])
+    api_bp.add_url_rule('/admin/runs/<int:run_id>', view_func=get_run, methods=['GET'])
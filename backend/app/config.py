@@ -29,12 +29,71 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
 
+    # SQLite连接参数，每个新连接上通过PRAGMA设置：
+    # WAL让读写互不阻塞；写锁冲突时最多等待 busy_timeout 毫秒而不是立即报 database is locked；
+    # WAL模式下 synchronous=NORMAL 只在检查点时同步磁盘，断电最多丢失最近的事务而不会损坏数据库；
+    # mmap_size 用内存映射读取数据文件，cache_size 为负数时单位为KB（每个连接的页缓存）
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'busy_timeout': 10000,
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+    }
+    # SQLite连接池：每个gunicorn worker的线程数加上余量
+    SQLITE_POOL_SIZE = 5
+    SQLITE_MAX_OVERFLOW = 10
+
+    # PostgreSQL等服务端数据库的连接池（环境变量 DB_POOL_SIZE / DB_MAX_OVERFLOW），
+    # 连接定期回收，取出连接前检测是否可用
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = 30
+    DB_POOL_RECYCLE = 1800
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+    # 只读副本（环境变量 DATABASE_READ_URL）：平台/银行查询和导出接口从副本读取，写入仍使用主库；
+    # 副本连接池大小（DB_READ_POOL_SIZE / DB_READ_MAX_OVERFLOW）未设置时与主库相同
+    DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL')
+    DB_READ_POOL_SIZE = int(os.environ['DB_READ_POOL_SIZE']) if os.environ.get('DB_READ_POOL_SIZE') else None
+    DB_READ_MAX_OVERFLOW = (int(os.environ['DB_READ_MAX_OVERFLOW'])
+                            if os.environ.get('DB_READ_MAX_OVERFLOW') else None)
+
     # CORS配置
     CORS_HEADERS = 'Content-Type'
 
     # 导出文件配置
     EXPORTS_DIR = str(EXPORTS_DIR)
     MAX_EXPORT_RECORDS = 10000
+    # 流式导出每批读取的行数
+    EXPORT_CHUNK_SIZE = 1000
+    # 列式导出（Parquet/Arrow）每批行数和Parquet压缩算法
+    EXPORT_BATCH_ROWS = 50000
+    EXPORT_PARQUET_COMPRESSION = 'zstd'
+
+    # 批量导入每块写入的行数（每块单独提交事务）
+    BATCH_IMPORT_CHUNK_SIZE = 5000
+
+    # 分页配置（总数缓存秒数，0表示不缓存）
+    PAGINATION_COUNT_CACHE_TTL = 60
+
+    # 统计接口响应缓存：有效期（秒，0表示不缓存）、进程内最多条目数、
+    # 可选的Redis共享缓存（环境变量 RESPONSE_CACHE_REDIS_URL，如 redis://localhost:6379/0）
+    RESPONSE_CACHE_TTL = 300
+    RESPONSE_CACHE_MAXSIZE = 256
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL')
+    # 各进程读取数据版本号的最小间隔（秒），其他进程写入后最多延迟这么久缓存失效
+    DATA_VERSION_CHECK_INTERVAL = 1
+
+    # 列式只读模型（环境变量 READ_MODEL_ENABLED）：平台/银行的查询、时间序列和概览接口在内存中的NumPy数组上计算，
+    # 每个Web进程各加载一份，数据版本号变化后重新加载
+    READ_MODEL_ENABLED = os.environ.get('READ_MODEL_ENABLED', 'false').lower() == 'true'
+    # 共享快照目录（环境变量 READ_MODEL_SNAPSHOT_DIR，设为空字符串则各进程各自从数据库加载）：
+    # 同一台机器上的worker内存映射同一个快照文件，数据在页缓存中只存一份
+    READ_MODEL_SNAPSHOT_DIR = os.environ.get('READ_MODEL_SNAPSHOT_DIR', str(DATA_DIR / 'snapshots'))
+
+    # 监控指标：是否启用 /metrics（需安装 prometheus-client，环境变量 METRICS_ENABLED）
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
 
     # 日志配置
     LOGS_DIR = str(LOGS_DIR)
@@ -54,6 +113,21 @@ class Config:
     SCHEDULER_TIMEZONE = 'Asia/Shanghai'
     # 是否启用爬虫功能（可通过环境变量 ENABLE_SCRAPERS 控制）
     ENABLE_SCRAPERS = os.environ.get('ENABLE_SCRAPERS', 'true').lower() == 'true'
+    # 是否在Web进程中启动调度器；gunicorn部署时由独立的 run_scheduler.py 进程运行定时任务，
+    # 开启时多个worker通过文件锁选出一个运行（环境变量 SCHEDULER_AUTOSTART）
+    SCHEDULER_AUTOSTART = os.environ.get('SCHEDULER_AUTOSTART', 'false').lower() == 'true'
+    # 选主文件锁：同一台机器上只有持有该锁的进程运行调度器
+    SCHEDULER_LOCK_FILE = os.environ.get('SCHEDULER_LOCK_FILE') or str(DATA_DIR / 'scheduler.lock')
+    # 备用调度进程重试获取主锁的间隔（秒）
+    SCHEDULER_LEADER_RETRY = 30
+
+    # 爬虫任务队列：工作进程数、空闲时轮询间隔（秒）、运行中任务心跳超时后重新排队（秒）
+    # 同类任务的任务锁有效期也是 JOB_STALE_SECONDS，运行期间随心跳续期
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_POLL_INTERVAL = 5
+    JOB_STALE_SECONDS = 300
+    # 停止工作进程时等待当前任务结束的秒数
+    JOB_SHUTDOWN_TIMEOUT = 60
 
 
 class DevelopmentConfig(Config):
@@ -81,6 +155,8 @@ class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    DATABASE_READ_URL = None
+    READ_MODEL_SNAPSHOT_DIR = None
 
 
 # 配置字典
@@ -0,0 +1,188 @@
+"""
+数据库引擎配置
+按数据库类型选择连接池参数；SQLite文件数据库在每个新连接上设置PRAGMA
+（WAL、busy_timeout、synchronous=NORMAL、mmap_size、cache_size），
+让多个gunicorn worker读取的同时调度进程可以写入，而不是互相阻塞报 database is locked
+
+配置 DATABASE_READ_URL（只读副本）后，标记为 @read_replica 的只读接口从副本读取，
+其余查询和所有写入（管理后台、批量导入、爬虫保存）仍使用主库
+"""
+import os
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Mapping
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+# 只读副本在 SQLALCHEMY_BINDS 中的键
+READ_BIND = 'read'
+
+
+def is_sqlite(uri: str) -> bool:
+    """是否为SQLite数据库"""
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def is_sqlite_memory(uri: str) -> bool:
+    """是否为SQLite内存数据库"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def resolve_sqlite_uri(uri: str, base_dir: str) -> str:
+    """
+    把相对路径的SQLite地址解析为相对于 base_dir 的绝对路径
+
+    Flask-SQLAlchemy 默认把相对路径放在 instance 目录下，
+    而 DATABASE_URL=sqlite:///data/database.db 期望的是后端目录下的 data/database.db
+    """
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or is_sqlite_memory(uri) or url.query.get('uri'):
+        return uri
+    if os.path.isabs(url.database):
+        return uri
+    return url.set(database=os.path.join(base_dir, url.database)).render_as_string(hide_password=False)
+
+
+def engine_options(uri: str, config: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    按数据库类型生成引擎参数（传给 create_engine / SQLALCHEMY_ENGINE_OPTIONS）
+
+    - SQLite内存数据库：沿用Flask-SQLAlchemy的默认设置（单连接）
+    - SQLite文件数据库：小连接池，连接超时与 busy_timeout 一致，允许跨线程使用连接
+    - 其他数据库：可配置的连接池大小，定期回收连接，取出连接前检测是否可用
+
+    Args:
+        uri: 数据库地址
+        config: 应用配置
+
+    Returns:
+        引擎参数字典
+    """
+    if is_sqlite_memory(uri):
+        return {}
+
+    if is_sqlite(uri):
+        busy_timeout = config.get('SQLITE_PRAGMAS', {}).get('busy_timeout', 5000)
+        return {
+            'pool_size': config.get('SQLITE_POOL_SIZE', 5),
+            'max_overflow': config.get('SQLITE_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+            'connect_args': {'timeout': busy_timeout / 1000, 'check_same_thread': False},
+        }
+
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+
+
+def install_sqlite_pragmas(engine, pragmas: Mapping[str, Any]):
+    """
+    在引擎的每个新连接上执行PRAGMA
+
+    journal_mode=WAL 会持久保存在数据库文件中，其余设置只对当前连接有效，所以每个连接都要设置
+
+    Args:
+        engine: SQLAlchemy引擎（SQLite文件数据库）
+        pragmas: PRAGMA名称 -> 值
+    """
+    if not pragmas:
+        return
+
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def configure_app_database(app):
+    """
+    db.init_app 之前调用：解析SQLite相对路径并补充按数据库类型选择的引擎参数
+
+    配置中已有的 SQLALCHEMY_ENGINE_OPTIONS 优先；配置了 DATABASE_READ_URL 时
+    在 SQLALCHEMY_BINDS 中增加只读副本引擎（连接池大小取 DB_READ_POOL_SIZE / DB_READ_MAX_OVERFLOW）
+
+    Args:
+        app: Flask应用实例
+    """
+    from .config import BASE_DIR
+
+    uri = resolve_sqlite_uri(app.config['SQLALCHEMY_DATABASE_URI'], str(BASE_DIR))
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(uri, app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+
+    read_url = app.config.get('DATABASE_READ_URL')
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    if read_url and READ_BIND not in binds:
+        read_url = resolve_sqlite_uri(read_url, str(BASE_DIR))
+        read_config = dict(app.config)
+        for read_key, key in (('DB_READ_POOL_SIZE', 'DB_POOL_SIZE'), ('DB_READ_MAX_OVERFLOW', 'DB_MAX_OVERFLOW')):
+            if app.config.get(read_key) is not None:
+                read_config[key] = app.config[read_key]
+        binds[READ_BIND] = {'url': read_url, **engine_options(read_url, read_config)}
+
+
+def init_engine_events(app, engines: Iterable):
+    """
+    db.init_app 之后调用：SQLite文件数据库在新连接上设置PRAGMA
+
+    Args:
+        app: Flask应用实例
+        engines: 应用的数据库引擎（主库和只读副本）
+    """
+    for engine in engines:
+        uri = str(engine.url)
+        if is_sqlite(uri) and not is_sqlite_memory(uri):
+            install_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS', {}))
+
+
+def _reading_from_replica() -> bool:
+    """当前请求是否标记为从只读副本读取"""
+    return has_app_context() and g.get('read_replica', False)
+
+
+class RoutingSession(Session):
+    """
+    按请求选择引擎的会话
+
+    标记为 @read_replica 的请求中，SELECT 查询发往只读副本；flush、Core 的 INSERT/UPDATE/DELETE、
+    无法判断类型的文本SQL，以及未配置副本时都使用主库
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and getattr(clause, 'is_select', False)
+                and _reading_from_replica()):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view: Callable):
+    """
+    只读接口装饰器：请求中的查询（包括数据版本号、条件请求和响应缓存的检查）从只读副本读取
+
+    放在其他装饰器外层，使版本号和数据来自同一个库，副本延迟时不会把旧数据缓存在新版本号下
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_replica = True
+        return view(*args, **kwargs)
+
+    return wrapper
@@ -5,5 +5,11 @@
 from .platform import Base, Platform
 from .bank import Bank
 from .source import DataSource
+from .lock import JobLock
+from .job import ScrapeJob
+from .run import ScrapeRun
+from .version import DataVersion
+from .rollup import PlatformMonthlyRollup, BankMonthlyRollup
 
-__all__ = ['Base', 'Platform', 'Bank', 'DataSource']
+__all__ = ['Base', 'Platform', 'Bank', 'DataSource', 'JobLock', 'ScrapeJob', 'ScrapeRun', 'DataVersion',
+           'PlatformMonthlyRollup', 'BankMonthlyRollup']
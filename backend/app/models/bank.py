@@ -2,15 +2,25 @@
 银行数据模型
 用于存储银行与平台合作的互联网贷款业务数据
 """
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index
 from datetime import datetime
-from .platform import Base
+from .platform import Base, natural_key_index
 
 
 class Bank(Base):
     """银行数据模型"""
     __tablename__ = 'banks'
 
+    # 自然键：同一银行、月份只保留一条记录
+    NATURAL_KEY = ('name', 'report_month')
+
+    # 自然键唯一索引见类定义之后的 natural_key_index
+    __table_args__ = (
+        Index('ix_banks_report_month', 'report_month'),
+        Index('ix_banks_type_month', 'bank_type', 'report_month'),
+        Index('ix_banks_created_at', 'created_at'),
+    )
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False, comment='银行名称')
     bank_type = Column(String(50), comment='银行类型（股份制/国有/城商行等）')
@@ -45,3 +55,6 @@ class Bank(Base):
 
     def __repr__(self):
         return f'<Bank {self.name} {self.report_month}>'
+
+
+natural_key_index(Bank)
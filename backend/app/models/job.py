@@ -0,0 +1,72 @@
+"""
+爬虫任务队列模型
+定时任务和手动触发都只往队列中写一条任务，由独立的工作进程领取执行，
+任务状态和进度持久化在数据库中，Web进程不再同步运行爬虫
+"""
+import json
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index
+from datetime import datetime
+from .platform import Base
+
+
+class ScrapeJob(Base):
+    """爬虫任务"""
+    __tablename__ = 'scrape_jobs'
+
+    # 任务状态
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    # 尚未结束的状态
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    __table_args__ = (
+        # 领取任务：按状态过滤后按优先级、入队时间排序
+        Index('ix_scrape_jobs_status_priority', 'status', 'priority', 'created_at'),
+        Index('ix_scrape_jobs_job_type_status', 'job_type', 'status'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_type = Column(String(50), nullable=False, comment='任务类型（如 research_scraper）')
+    params = Column(Text, comment='运行参数（JSON格式）')
+    priority = Column(Integer, default=1, comment='优先级（1=最高，数字越大优先级越低）')
+    status = Column(String(20), nullable=False, default=QUEUED, comment='状态')
+    progress = Column(Float, default=0, comment='进度（0-100）')
+    stage = Column(String(50), comment='当前阶段')
+    message = Column(String(500), comment='进度说明')
+    result = Column(Text, comment='运行结果（JSON格式）')
+    error = Column(Text, comment='错误信息')
+    worker = Column(String(200), comment='执行的工作进程')
+    attempt = Column(Integer, default=0, comment='领取次数（每次领取加1，本次执行的进度和结果只写入同一次领取）')
+    trigger = Column(String(20), default='manual', comment='触发方式（schedule/manual）')
+    created_at = Column(DateTime, default=datetime.now, comment='入队时间')
+    started_at = Column(DateTime, comment='开始时间')
+    heartbeat_at = Column(DateTime, comment='工作进程最后一次汇报进度的时间')
+    finished_at = Column(DateTime, comment='结束时间')
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'params': json.loads(self.params) if self.params else {},
+            'priority': self.priority,
+            'status': self.status,
+            'progress': round(self.progress or 0, 1),
+            'stage': self.stage,
+            'message': self.message,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'worker': self.worker,
+            'attempt': self.attempt or 0,
+            'trigger': self.trigger,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<ScrapeJob {self.id} {self.job_type} status={self.status}>'
@@ -0,0 +1,28 @@
+"""
+任务锁模型
+多个进程或多台机器共享同一个数据库时，用于保证同一定时任务同时只运行一次
+"""
+from sqlalchemy import Column, String, DateTime
+from .platform import Base
+
+
+class JobLock(Base):
+    """任务锁（带过期时间，持有者崩溃后锁会自动失效）"""
+    __tablename__ = 'job_locks'
+
+    name = Column(String(100), primary_key=True, comment='任务名称')
+    owner = Column(String(200), nullable=False, comment='持有者（主机名:进程号）')
+    acquired_at = Column(DateTime, comment='获取时间')
+    locked_until = Column(DateTime, nullable=False, comment='过期时间')
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'name': self.name,
+            'owner': self.owner,
+            'acquired_at': self.acquired_at.strftime('%Y-%m-%d %H:%M:%S') if self.acquired_at else None,
+            'locked_until': self.locked_until.strftime('%Y-%m-%d %H:%M:%S') if self.locked_until else None
+        }
+
+    def __repr__(self):
+        return f'<JobLock {self.name} owner={self.owner}>'
@@ -0,0 +1,204 @@
+"""
+数据库结构迁移
+create_all 只会创建不存在的表，不会给已有的表补建字段和索引，
+这里负责把旧版 init_database 创建的 database.db 升级到当前模型声明的字段和索引结构
+
+自然键有重复数据时不会自动删除（启动时报错），需要先运行 scripts/dedupe_records.py 清理。
+旧版按原字段建的自然键唯一索引（含NULL的重复数据挡不住）会按 COALESCE 表达式重建
+"""
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy import Column, inspect, text
+from .platform import Platform
+from .bank import Bank
+from .job import ScrapeJob
+
+
+logger = logging.getLogger('migrations')
+
+# 需要检查索引的模型
+INDEXED_MODELS = [Platform, Bank]
+
+# 建表后新增过可为空字段的模型
+ALTERED_MODELS = [ScrapeJob]
+
+# 清理重复数据的命令（报错信息中提示）
+DEDUPE_COMMAND = 'python scripts/dedupe_records.py'
+
+
+class DuplicateRecordsError(RuntimeError):
+    """自然键存在重复数据，无法创建唯一索引"""
+
+    def __init__(self, table: str, index: str, count: int):
+        self.table = table
+        self.index = index
+        self.count = count
+        super().__init__(
+            f'{table} 表有 {count} 条自然键重复的数据，无法创建唯一索引 {index}。'
+            f'请先备份数据库，再运行 {DEDUPE_COMMAND} 查看并清理重复数据（每组保留最新一条）'
+        )
+
+
+def ensure_columns(engine) -> List[str]:
+    """
+    补建模型中声明、但数据库中缺失的可为空字段（ALTER TABLE ... ADD COLUMN）
+
+    Args:
+        engine: SQLAlchemy引擎
+
+    Returns:
+        新建的字段列表（表名.字段名）
+    """
+    added = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for model in ALTERED_MODELS:
+            table = model.__table__
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f'{table.name}.{column.name}')
+                logger.info(f'已添加字段: {table.name}.{column.name}')
+    return added
+
+
+def ensure_indexes(engine) -> List[str]:
+    """
+    补建模型中声明、但数据库中缺失的索引
+
+    Args:
+        engine: SQLAlchemy引擎
+
+    Returns:
+        新建的索引名称列表
+
+    Raises:
+        DuplicateRecordsError: 自然键有重复数据，唯一索引无法创建
+    """
+    created = []
+    touched_tables = set()
+
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+
+        for model in INDEXED_MODELS:
+            table = model.__table__
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = _existing_indexes(conn, inspector, table.name)
+
+            # 先建唯一索引，有重复数据时不做任何修改直接报错
+            for index in sorted(table.indexes, key=lambda ix: (not ix.unique, ix.name)):
+                outdated = index.name in existing and _is_outdated(index, existing[index.name])
+                if index.name in existing and not outdated:
+                    continue
+
+                if index.unique:
+                    duplicates = _count_duplicates(conn, table, _key_sql(conn, index))
+                    if duplicates:
+                        raise DuplicateRecordsError(table.name, index.name, duplicates)
+
+                if outdated:
+                    index.drop(conn)
+                    logger.info(f'重建索引: {index.name}')
+                index.create(conn)
+                created.append(index.name)
+                touched_tables.add(table.name)
+                logger.info(f'已创建索引: {index.name}')
+
+        # 更新统计信息，便于查询规划器在多个索引间做选择
+        for table_name in sorted(touched_tables):
+            conn.execute(text(f'ANALYZE {table_name}'))
+
+    return created
+
+
+def _existing_indexes(conn, inspector, table_name: str) -> Dict[str, Optional[str]]:
+    """
+    数据库中已有的索引：名称 -> 建索引的SQL（小写，取不到时为None）
+
+    SQLAlchemy 反射 SQLite 索引时会跳过表达式索引，这里直接读系统表
+    """
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        rows = conn.execute(text(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"
+        ), {'table': table_name})
+    elif dialect == 'postgresql':
+        rows = conn.execute(text(
+            'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table'
+        ), {'table': table_name})
+    else:
+        return {ix['name']: None for ix in inspector.get_indexes(table_name)}
+    return {name: sql.lower() if sql else None for name, sql in rows}
+
+
+def _is_outdated(index, definition: Optional[str]) -> bool:
+    """模型中的索引含 COALESCE 表达式，数据库中的同名索引却是按原字段建的（旧版自然键索引）"""
+    has_expressions = any(not isinstance(expr, Column) for expr in index.expressions)
+    return has_expressions and definition is not None and 'coalesce' not in definition
+
+
+def _key_sql(conn, index) -> List[str]:
+    """索引各列（表达式）的SQL，与唯一索引的判重规则一致"""
+    return [
+        str(expr.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True, 'include_table': False}))
+        for expr in index.expressions
+    ]
+
+
+def _duplicates_condition(table, key_sql: List[str]) -> str:
+    """
+    自然键重复、且不是每组id最大（最后写入）的行
+
+    key_sql 为唯一索引的各列表达式，可为空的字段已用 COALESCE 替换，含NULL的重复数据同样会被找出
+    """
+    key_columns = ', '.join(key_sql)
+    return f'id NOT IN (SELECT MAX(id) FROM {table.name} GROUP BY {key_columns})'
+
+
+def _count_duplicates(conn, table, key_sql: List[str]) -> int:
+    """创建唯一索引前需要删除的重复行数"""
+    return conn.execute(text(
+        f'SELECT COUNT(*) FROM {table.name} WHERE {_duplicates_condition(table, key_sql)}'
+    )).scalar() or 0
+
+
+def remove_duplicates(engine, dry_run: bool = False) -> Dict[str, int]:
+    """
+    删除自然键重复的数据，每组只保留id最大（最后写入）的一条
+
+    只由清理脚本显式调用，应用启动时不会执行
+
+    Args:
+        engine: SQLAlchemy引擎
+        dry_run: 只统计不删除
+
+    Returns:
+        表名 -> 删除（dry_run时为将要删除）的行数
+    """
+    removed = {}
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for model in INDEXED_MODELS:
+            table = model.__table__
+            if not inspector.has_table(table.name):
+                continue
+            for index in table.indexes:
+                if not index.unique:
+                    continue
+                key_sql = _key_sql(conn, index)
+                if dry_run:
+                    count = _count_duplicates(conn, table, key_sql)
+                else:
+                    count = conn.execute(text(
+                        f'DELETE FROM {table.name} WHERE {_duplicates_condition(table, key_sql)}'
+                    )).rowcount or 0
+                removed[table.name] = removed.get(table.name, 0) + count
+    return removed
@@ -2,17 +2,60 @@
 平台数据模型
 用于存储互联网助贷平台的贷款规模数据
 """
-from sqlalchemy import Column, Integer, String, Float, Date, Text, DateTime
+from sqlalchemy import Column, Integer, String, Float, Date, Text, DateTime, Index, func
 from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
+from datetime import date, datetime
 
 Base = declarative_base()
 
+# 自然键中可为空的字段在唯一索引中的替代值：SQLite 和 PostgreSQL 的唯一索引中 NULL 互不相等，
+# 直接索引原字段挡不住含 NULL 的重复数据，因此按 COALESCE(字段, 替代值) 建索引
+DATE_KEY_SENTINEL = date(1900, 1, 1)
+STRING_KEY_SENTINEL = ''
+
+
+def key_sentinel(column):
+    """自然键字段为NULL时参与唯一约束的替代值（不可为空的字段返回None）"""
+    if not column.nullable:
+        return None
+    return DATE_KEY_SENTINEL if isinstance(column.type, Date) else STRING_KEY_SENTINEL
+
+
+def natural_key_expressions(model):
+    """自然键唯一索引的各列表达式（可为空的字段包一层 COALESCE）"""
+    expressions = []
+    for field in model.NATURAL_KEY:
+        column = model.__table__.c[field]
+        sentinel = key_sentinel(column)
+        expressions.append(column if sentinel is None else func.coalesce(column, sentinel))
+    return expressions
+
+
+def natural_key_index(model) -> Index:
+    """在模型的表上声明自然键唯一索引 uq_<表名>_natural_key"""
+    return Index(f'uq_{model.__tablename__}_natural_key', *natural_key_expressions(model), unique=True)
+
 
 class Platform(Base):
     """平台数据模型"""
     __tablename__ = 'platforms'
 
+    # 自然键：同一平台、月份、产品类别、贷款用途只保留一条记录
+    NATURAL_KEY = ('name', 'report_month', 'platform_type', 'loan_type')
+
+    # 自然键唯一索引在类定义之后声明（natural_key_index），同时服务于爬虫去重查询和按名称的时间序列查询
+    __table_args__ = (
+        # 最新月份、月份区间筛选和默认排序
+        Index('ix_platforms_report_month', 'report_month'),
+        # 按集团筛选 + 月份区间/排序
+        Index('ix_platforms_group_month', 'company_group', 'report_month'),
+        # 按产品类别、贷款用途筛选 + 月份区间/排序
+        Index('ix_platforms_type_month', 'platform_type', 'loan_type', 'report_month'),
+        Index('ix_platforms_loan_type_month', 'loan_type', 'report_month'),
+        # 管理后台默认按创建时间排序
+        Index('ix_platforms_created_at', 'created_at'),
+    )
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False, comment='平台名称')
     company_group = Column(String(50), comment='所属集团（蚂蚁/腾讯/字节/京东/美团/百度）')
@@ -53,3 +96,6 @@ class Platform(Base):
 
     def __repr__(self):
         return f'<Platform {self.name} {self.report_month}>'
+
+
+natural_key_index(Platform)
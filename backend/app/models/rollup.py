@@ -0,0 +1,46 @@
+"""
+月度汇总模型
+按 (报告月份, 维度) 预先汇总 platforms / banks 表，概览接口和导出汇总表直接读取，
+不再每次对明细表做 GROUP BY。汇总行在写入明细的事务中按月份重算（见 services/rollup.py）
+"""
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+from .platform import Base
+
+
+class PlatformMonthlyRollup(Base):
+    """平台月度汇总（按集团、产品类别、贷款用途）"""
+    __tablename__ = 'platform_monthly_rollups'
+    # 最新月份即 MAX(report_month)，走该索引只需读一个索引项
+    __table_args__ = (
+        Index('ix_platform_rollups_month_dims', 'report_month', 'company_group', 'platform_type', 'loan_type'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_month = Column(Date, nullable=False, comment='报告月份')
+    company_group = Column(String(50), comment='所属集团')
+    platform_type = Column(String(20), comment='产品类别')
+    loan_type = Column(String(20), comment='贷款用途')
+    total_balance = Column(Float, nullable=False, default=0, comment='贷款余额合计（亿元）')
+    total_issued = Column(Float, nullable=False, default=0, comment='发放规模合计（亿元）')
+    record_count = Column(Integer, nullable=False, default=0, comment='记录数')
+
+    def __repr__(self):
+        return f'<PlatformMonthlyRollup {self.report_month} {self.company_group}>'
+
+
+class BankMonthlyRollup(Base):
+    """银行月度汇总（按银行类型）"""
+    __tablename__ = 'bank_monthly_rollups'
+    __table_args__ = (
+        Index('ix_bank_rollups_month_type', 'report_month', 'bank_type'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_month = Column(Date, nullable=False, comment='报告月份')
+    bank_type = Column(String(50), comment='银行类型')
+    total_loan = Column(Float, nullable=False, default=0, comment='互联网贷款规模合计（亿元）')
+    total_coop_platforms = Column(Integer, nullable=False, default=0, comment='合作平台数量合计')
+    record_count = Column(Integer, nullable=False, default=0, comment='记录数')
+
+    def __repr__(self):
+        return f'<BankMonthlyRollup {self.report_month} {self.bank_type}>'
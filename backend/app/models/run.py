@@ -0,0 +1,142 @@
+"""
+爬虫运行记录模型
+每次爬虫运行保存一条记录（分阶段耗时、下载量、请求次数和错误），
+用于找出慢的数据源、对比改动前后的运行效率
+"""
+import json
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Text, Index
+from datetime import datetime
+from .platform import Base
+
+
+class ScrapeRun(Base):
+    """爬虫运行记录"""
+    __tablename__ = 'scrape_runs'
+
+    __table_args__ = (
+        # 按数据源查看运行历史
+        Index('ix_scrape_runs_job_type_started_at', 'job_type', 'started_at'),
+        Index('ix_scrape_runs_started_at', 'started_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, comment='所属任务ID（scrape_jobs.id）')
+    job_type = Column(String(50), nullable=False, comment='任务类型（如 research_scraper）')
+    scraper = Column(String(100), comment='爬虫名称')
+    trigger = Column(String(20), comment='触发方式（schedule/manual）')
+    status = Column(String(20), nullable=False, comment='运行结果（success/failed）')
+    started_at = Column(DateTime, default=datetime.now, comment='开始时间')
+    finished_at = Column(DateTime, comment='结束时间')
+    duration = Column(Float, comment='总耗时（秒）')
+
+    # 分阶段耗时（秒，并发阶段为所有线程的累计耗时）
+    list_seconds = Column(Float, default=0, comment='列表抓取耗时')
+    download_seconds = Column(Float, default=0, comment='下载耗时')
+    parse_seconds = Column(Float, default=0, comment='解析耗时')
+    save_seconds = Column(Float, default=0, comment='入库耗时')
+
+    # 数据量
+    records_found = Column(Integer, default=0, comment='找到的记录数')
+    records_saved = Column(Integer, default=0, comment='新增和更新的记录数')
+    records_inserted = Column(Integer, default=0, comment='新增记录数')
+    records_updated = Column(Integer, default=0, comment='更新记录数')
+    records_unchanged = Column(Integer, default=0, comment='未变化记录数')
+
+    # HTTP请求
+    requests = Column(Integer, default=0, comment='HTTP请求次数（含重试）')
+    retries = Column(Integer, default=0, comment='重试次数')
+    failed_requests = Column(Integer, default=0, comment='重试后仍失败的请求数')
+    not_modified = Column(Integer, default=0, comment='304未修改的响应数')
+    bytes_downloaded = Column(BigInteger, default=0, comment='下载字节数')
+
+    # 错误
+    error = Column(Text, comment='导致运行失败的错误')
+    error_count = Column(Integer, default=0, comment='运行中记录的错误数')
+    errors = Column(Text, comment='错误详情（JSON格式，最多50条）')
+
+    STAGE_COLUMNS = {
+        'list': 'list_seconds',
+        'download': 'download_seconds',
+        'parse': 'parse_seconds',
+        'save': 'save_seconds',
+    }
+
+    @classmethod
+    def from_result(cls, job_type: str, result: dict, job_id: int = None, trigger: str = None) -> 'ScrapeRun':
+        """
+        由 BaseScraper.run 的返回结果创建运行记录
+
+        Args:
+            job_type: 任务类型
+            result: 爬取结果（含 metrics）
+            job_id: 所属任务ID
+            trigger: 触发方式
+        """
+        metrics = result.get('metrics') or {}
+        stage_seconds = metrics.get('stage_seconds', {})
+
+        run = cls(
+            job_id=job_id,
+            job_type=job_type,
+            scraper=result.get('scraper'),
+            trigger=trigger,
+            status=result.get('status', 'unknown'),
+            started_at=result.get('started_at'),
+            finished_at=result.get('completed_at'),
+            duration=result.get('duration'),
+            records_found=result.get('records_found', 0),
+            records_saved=result.get('records_saved', 0),
+            records_inserted=result.get('records_inserted', 0),
+            records_updated=result.get('records_updated', 0),
+            records_unchanged=result.get('records_unchanged', 0),
+            requests=metrics.get('requests', 0),
+            retries=metrics.get('retries', 0),
+            failed_requests=metrics.get('failed_requests', 0),
+            not_modified=metrics.get('not_modified', 0),
+            bytes_downloaded=metrics.get('bytes_downloaded', 0),
+            error=result.get('error'),
+            error_count=metrics.get('error_count', 0),
+            errors=json.dumps(metrics['errors'], ensure_ascii=False) if metrics.get('errors') else None
+        )
+        for stage, column in cls.STAGE_COLUMNS.items():
+            setattr(run, column, stage_seconds.get(stage, 0))
+        return run
+
+    def to_dict(self, with_errors: bool = False):
+        """
+        转换为字典格式
+
+        Args:
+            with_errors: 是否包含错误详情
+        """
+        data = {
+            'id': self.id,
+            'job_id': self.job_id,
+            'job_type': self.job_type,
+            'scraper': self.scraper,
+            'trigger': self.trigger,
+            'status': self.status,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None,
+            'duration': round(self.duration, 3) if self.duration is not None else None,
+            'stage_seconds': {stage: round(getattr(self, column) or 0, 3)
+                              for stage, column in self.STAGE_COLUMNS.items()},
+            'records_found': self.records_found,
+            'records_saved': self.records_saved,
+            'records_inserted': self.records_inserted,
+            'records_updated': self.records_updated,
+            'records_unchanged': self.records_unchanged,
+            'requests': self.requests,
+            'retries': self.retries,
+            'failed_requests': self.failed_requests,
+            'not_modified': self.not_modified,
+            'bytes_downloaded': self.bytes_downloaded,
+            'error': self.error,
+            'error_count': self.error_count
+        }
+        if with_errors:
+            data['errors'] = json.loads(self.errors) if self.errors else []
+        return data
+
+    def __repr__(self):
+        return f'<ScrapeRun {self.id} {self.job_type} status={self.status}>'
@@ -0,0 +1,27 @@
+"""
+数据版本模型
+每张业务表一个递增的版本号，写入数据的事务中同时递增，
+各进程据此判断缓存的统计结果是否过期
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from .platform import Base
+
+
+class DataVersion(Base):
+    """数据版本"""
+    __tablename__ = 'data_versions'
+
+    name = Column(String(50), primary_key=True, comment='表名（platforms/banks）')
+    version = Column(Integer, nullable=False, default=0, comment='版本号，每次写入递增')
+    updated_at = Column(DateTime, comment='最后写入时间')
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
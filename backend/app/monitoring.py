@@ -0,0 +1,247 @@
+"""
+Prometheus监控指标
+在 /metrics 输出Prometheus文本格式的指标：
+
+- http_request_duration_seconds: 各API路由的响应耗时（流式导出计到最后一个字节发出）
+- db_statements_per_request / db_time_per_request_seconds: 每个请求执行的SQL语句数和总耗时
+- db_statement_duration_seconds: 单条SQL语句耗时（按语句类型）
+- scraper_*: 爬虫请求、重试、下载字节、记录数（由 scrape_runs 表汇总，调度进程和Web进程共享）
+- scrape_jobs: 各状态的任务数
+
+gunicorn多worker部署时，由 gunicorn.conf.py 设置 PROMETHEUS_MULTIPROC_DIR，
+各worker把指标写入该目录，任意一个worker响应 /metrics 时汇总所有worker的数据。
+需要安装 prometheus-client，未安装时不启用。
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from flask import Response, g, request
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger('monitoring')
+
+# 响应耗时分桶（秒），覆盖普通查询到大文件导出
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# 每个请求的SQL语句数分桶
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+# 单条SQL语句耗时分桶（秒）
+STATEMENT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+# 不统计的路由
+EXCLUDED_ENDPOINTS = {'metrics', 'static'}
+
+_metrics = None
+_metrics_lock = threading.Lock()
+# 当前线程正在处理的请求的SQL统计
+_request_stats = threading.local()
+
+
+class _Metrics:
+    """进程内的指标对象（每个进程只创建一次）"""
+
+    def __init__(self, prometheus_client):
+        Histogram = prometheus_client.Histogram
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'HTTP请求耗时',
+            ['endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+        )
+        self.request_statements = Histogram(
+            'db_statements_per_request', '每个HTTP请求执行的SQL语句数',
+            ['endpoint'], buckets=STATEMENT_COUNT_BUCKETS
+        )
+        self.request_db_time = Histogram(
+            'db_time_per_request_seconds', '每个HTTP请求的SQL执行总耗时',
+            ['endpoint'], buckets=LATENCY_BUCKETS
+        )
+        self.statement_duration = Histogram(
+            'db_statement_duration_seconds', 'SQL语句耗时',
+            ['operation'], buckets=STATEMENT_BUCKETS
+        )
+
+
+def _get_metrics() -> Optional[_Metrics]:
+    """创建进程内的指标对象，未安装 prometheus-client 时返回None"""
+    global _metrics
+    if _metrics is not None:
+        return _metrics
+
+    with _metrics_lock:
+        if _metrics is None:
+            try:
+                import prometheus_client
+            except ImportError:
+                return None
+            _metrics = _Metrics(prometheus_client)
+            _register_engine_events()
+    return _metrics
+
+
+def _register_engine_events():
+    """在所有SQLAlchemy引擎上记录SQL语句耗时"""
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        _metrics.statement_duration.labels(operation).observe(elapsed)
+
+        stats = getattr(_request_stats, 'current', None)
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+def _endpoint_label() -> str:
+    """路由名称（如 api.get_platform_data），未匹配的路由统一为 unmatched"""
+    return request.endpoint or 'unmatched'
+
+
+def init_metrics(app):
+    """
+    为应用启用请求耗时、SQL统计和 /metrics 端点
+
+    Args:
+        app: Flask应用实例
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    metrics = _get_metrics()
+    if metrics is None:
+        app.logger.warning('未安装prometheus-client，/metrics 监控指标未启用')
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        _request_stats.current = [0, 0.0]
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop('metrics_start', None)
+        endpoint = _endpoint_label()
+        if start is None or endpoint in EXCLUDED_ENDPOINTS:
+            _request_stats.current = None
+            return response
+
+        method = request.method
+        status = str(response.status_code)
+        stats = _request_stats.current
+
+        def observe():
+            # 流式响应在最后一个字节发出、响应关闭时才结束
+            metrics.request_duration.labels(endpoint, method, status).observe(time.perf_counter() - start)
+            if stats is not None:
+                metrics.request_statements.labels(endpoint).observe(stats[0])
+                metrics.request_db_time.labels(endpoint).observe(stats[1])
+            _request_stats.current = None
+
+        if response.is_streamed:
+            response.call_on_close(observe)
+        else:
+            observe()
+        return response
+
+    app.add_url_rule('/metrics', endpoint='metrics', view_func=metrics_view, methods=['GET'])
+
+
+def metrics_view():
+    """输出Prometheus文本格式的指标"""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+    else:
+        registry = REGISTRY
+
+    output = generate_latest(registry) + generate_latest(_DatabaseCollector())
+    return Response(output, content_type=CONTENT_TYPE_LATEST)
+
+
+class _DatabaseCollector:
+    """
+    从数据库汇总的指标
+
+    爬虫在调度进程的工作进程池中运行（可能在另一个容器里），
+    所以爬虫计数取自 scrape_runs 表，而不是进程内计数器
+    """
+
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+        from . import db
+        from .models import ScrapeJob, ScrapeRun
+
+        counters = {
+            'requests': CounterMetricFamily('scraper_requests', '爬虫HTTP请求数（含重试）', labels=['job_type']),
+            'retries': CounterMetricFamily('scraper_retries', '爬虫请求重试次数', labels=['job_type']),
+            'failed_requests': CounterMetricFamily('scraper_failed_requests', '爬虫重试后仍失败的请求数',
+                                                   labels=['job_type']),
+            'bytes_downloaded': CounterMetricFamily('scraper_downloaded_bytes', '爬虫下载字节数',
+                                                    labels=['job_type']),
+            'duration': CounterMetricFamily('scraper_run_seconds', '爬虫运行总耗时（秒）', labels=['job_type']),
+        }
+        records = CounterMetricFamily('scraper_records', '爬虫记录数（found/inserted/updated/unchanged）',
+                                      labels=['job_type', 'result'])
+        runs = CounterMetricFamily('scraper_runs', '爬虫运行次数', labels=['job_type', 'status'])
+        jobs = GaugeMetricFamily('scrape_jobs', '各状态的爬虫任务数', labels=['status'])
+
+        try:
+            rows = db.session.execute(
+                select(
+                    ScrapeRun.job_type,
+                    ScrapeRun.status,
+                    func.count(ScrapeRun.id),
+                    func.sum(ScrapeRun.requests),
+                    func.sum(ScrapeRun.retries),
+                    func.sum(ScrapeRun.failed_requests),
+                    func.sum(ScrapeRun.bytes_downloaded),
+                    func.sum(ScrapeRun.duration),
+                    func.sum(ScrapeRun.records_found),
+                    func.sum(ScrapeRun.records_inserted),
+                    func.sum(ScrapeRun.records_updated),
+                    func.sum(ScrapeRun.records_unchanged)
+                ).group_by(ScrapeRun.job_type, ScrapeRun.status)
+            ).all()
+            job_counts = db.session.execute(
+                select(ScrapeJob.status, func.count(ScrapeJob.id)).group_by(ScrapeJob.status)
+            ).all()
+        except Exception as e:
+            logger.warning(f'汇总爬虫指标失败: {str(e)}')
+            return
+
+        totals = {}
+        for (job_type, status, count, requests, retries, failed, downloaded, duration,
+             found, inserted, updated, unchanged) in rows:
+            runs.add_metric([job_type, status], count)
+            total = totals.setdefault(job_type, {key: 0 for key in
+                                                 list(counters) + ['found', 'inserted', 'updated', 'unchanged']})
+            for key, value in (('requests', requests), ('retries', retries), ('failed_requests', failed),
+                               ('bytes_downloaded', downloaded), ('duration', duration), ('found', found),
+                               ('inserted', inserted), ('updated', updated), ('unchanged', unchanged)):
+                total[key] += value or 0
+
+        for job_type, total in sorted(totals.items()):
+            for key, family in counters.items():
+                family.add_metric([job_type], total[key])
+            for result in ('found', 'inserted', 'updated', 'unchanged'):
+                records.add_metric([job_type, result], total[result])
+
+        for status, count in job_counts:
+            jobs.add_metric([status], count)
+
+        yield from counters.values()
+        yield records
+        yield runs
+        yield jobs
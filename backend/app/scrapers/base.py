@@ -2,32 +2,114 @@
 基础爬虫类
 提供所有爬虫的通用功能和反爬虫策略
 """
-import requests
 from fake_useragent import UserAgent
+import re
+import tempfile
 import time
 import random
 import logging
-from typing import List, Dict, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterable, List, Dict, Optional, Any, Tuple
 from datetime import datetime
 from bs4 import BeautifulSoup
+from ..services.bulk import upsert_records
+from .ratelimit import HostRateLimiter, host_limiter
+from .transport import HttpResponse, HttpTransport, get_transport
+from .httpcache import HttpCache, get_http_cache
+from .metrics import RunMetrics
+from . import fastparse
+from .fastparse import HtmlBlocks, TableRows
+
+
+# 平台数据缺失产品类别、贷款用途时的默认值（参与自然键去重）
+PLATFORM_DEFAULTS = {'platform_type': '联合贷', 'loan_type': '消费类'}
+
+# 流式下载的附件先写入内存，超过该大小后转存到磁盘临时文件
+DOWNLOAD_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+class Download:
+    """一次附件下载的结果"""
+
+    def __init__(self, url: str, content: Optional[bytes] = None, sha256: Optional[str] = None,
+                 changed: bool = True, file: Optional[BinaryIO] = None):
+        """
+        Args:
+            url: 下载地址
+            content: 文件内容（流式下载时为None）
+            sha256: 内容哈希（未启用缓存时为None）
+            changed: 内容是否与上次成功入库的版本不同，False时可跳过解析
+            file: 流式下载时保存内容的文件（已定位到开头），用完后调用 close()
+        """
+        self.url = url
+        self.content = content
+        self.sha256 = sha256
+        self.changed = changed
+        self.file = file
+
+    def close(self):
+        """关闭流式下载的文件（临时文件随之删除）"""
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self) -> 'Download':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 
 class BaseScraper:
     """基础爬虫类"""
 
-    def __init__(self, name: str, base_url: str):
+    # 并发抓取的默认线程数（1表示顺序抓取）
+    MAX_WORKERS = 4
+    # 默认HTTP传输（async: httpx连接池+HTTP/2，requests: 同步Session）
+    TRANSPORT = 'async'
+    # 是否默认使用lxml快速解析（不构建BeautifulSoup对象树）
+    FAST_PARSE = False
+
+    def __init__(self, name: str, base_url: str, max_workers: Optional[int] = None,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 transport: Optional[HttpTransport] = None,
+                 http_cache: Optional[HttpCache] = None,
+                 fast_parse: Optional[bool] = None):
         """
         初始化爬虫
 
         Args:
             name: 爬虫名称
             base_url: 基础URL
+            max_workers: 并发抓取线程数，默认 MAX_WORKERS
+            rate_limiter: 按主机限速器，默认使用进程内共享的限速器
+            transport: HTTP传输层，默认使用进程内共享的 TRANSPORT 实现
+            http_cache: 附件下载缓存，默认使用 DATA_DIR/http_cache
+            fast_parse: 是否用lxml快速解析页面，默认 FAST_PARSE
         """
         self.name = name
         self.base_url = base_url
+        self.max_workers = max(1, max_workers or self.MAX_WORKERS)
+        self.rate_limiter = rate_limiter or host_limiter
         self.ua = UserAgent()
-        self.session = requests.Session()
+        # 所有下载都经过传输层，同一进程内的爬虫共享连接池
+        self.transport = transport or get_transport(self.TRANSPORT)
+        self.http_cache = http_cache or get_http_cache()
+        self.fast_parse = self.FAST_PARSE if fast_parse is None else fast_parse
+        # 本次运行中内容有变化的下载（url -> sha256），入库成功后标记为已处理
+        self._pending_downloads: Dict[str, str] = {}
         self.logger = self._setup_logger()
+        # 本次运行的写入统计（新增/更新/未变化）
+        self.save_stats = self._empty_save_stats()
+        # 本次运行的分阶段耗时、请求和错误统计
+        self.metrics = RunMetrics()
+        # 进度回调 (阶段, 百分比, 说明)，由任务队列设置
+        self.progress_callback: Optional[Callable[[str, float, str], None]] = None
+
+    @staticmethod
+    def _empty_save_stats() -> Dict[str, int]:
+        """空的写入统计"""
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0}
 
     def _setup_logger(self) -> logging.Logger:
         """设置日志"""
@@ -46,8 +128,7 @@ class BaseScraper:
             'User-Agent': self.ua.random,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
+            'Accept-Encoding': 'gzip, deflate',
             'Upgrade-Insecure-Requests': '1',
             'Referer': self.base_url
         }
@@ -57,8 +138,11 @@ class BaseScraper:
         url: str,
         max_retries: int = 3,
         method: str = 'GET',
+        timeout: float = 30,
+        headers: Optional[Dict[str, str]] = None,
+        sink: Optional[BinaryIO] = None,
         **kwargs
-    ) -> Optional[requests.Response]:
+    ) -> Optional[HttpResponse]:
         """
         带重试机制的请求
 
@@ -66,46 +150,201 @@ class BaseScraper:
             url: 请求URL
             max_retries: 最大重试次数
             method: 请求方法（GET/POST）
+            timeout: 超时秒数
+            headers: 附加请求头（如条件请求头）
+            sink: 流式写入响应体的文件，每次重试前清空
+            **kwargs: 其他请求参数（params/data/verify等）
+
+        Returns:
+            HttpResponse对象（状态码200或304）或None
+        """
+        headers = {**self.get_headers(), **(headers or {})}
+        # 列表页的请求计入列表抓取阶段，其余请求计入下载阶段
+        stage = 'list' if self.metrics.current_stage() == 'list' else 'download'
+
+        with self.metrics.stage(stage):
+            for attempt in range(max_retries):
+                response = None
+                if sink is not None:
+                    sink.seek(0)
+                    sink.truncate()
+                try:
+                    # 按主机限速，避免对同一站点请求过快
+                    self.rate_limiter.acquire(url)
+
+                    self.logger.info(f'请求 {url} (尝试 {attempt + 1}/{max_retries})')
+
+                    response = self.transport.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        timeout=timeout,
+                        sink=sink,
+                        **kwargs
+                    )
+                    self.metrics.record_request(attempt, response)
+
+                    # 检查是否被重定向到验证页面
+                    if 'captcha' in response.url.lower() or response.status_code == 403:
+                        raise Exception('遇到反爬验证')
+
+                    if response.status_code in (200, 304):
+                        self.logger.info(f'请求成功: {url}')
+                        return response
+                    else:
+                        self.logger.warning(f'请求失败，状态码: {response.status_code}')
+
+                except Exception as e:
+                    if response is None:
+                        self.metrics.record_request(attempt)
+                    self.logger.error(f'请求异常 (尝试 {attempt + 1}/{max_retries}): {str(e)}')
+                    if attempt == max_retries - 1:
+                        self.logger.error(f'请求失败，已达最大重试次数: {url}')
+                        self.metrics.record_failure(url, str(e))
+                        return None
+                    time.sleep(random.uniform(5, 10))
+
+            self.metrics.record_failure(url, f'状态码: {response.status_code}')
+            return None
+
+    def download(self, url: str, timeout: float = 60, stream: bool = False, **kwargs) -> Optional[Download]:
+        """
+        下载附件，使用磁盘缓存和条件请求
+
+        服务器返回304、或返回的内容与上次成功入库的版本哈希相同时，结果的 changed 为False，
+        调用方可以跳过解析；内容有变化时在本次运行入库成功后才记为已处理
+
+        Args:
+            url: 下载地址
+            timeout: 超时秒数
+            stream: 为True时响应体边接收边写入临时文件（超过 DOWNLOAD_SPOOL_BYTES 后落盘），
+                    结果通过 Download.file 读取，适合大的PDF等附件
             **kwargs: 其他请求参数
 
         Returns:
-            Response对象或None
+            Download对象或None
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_BYTES) if stream else None
+        try:
+            return self._download(url, timeout, body, **kwargs)
+        except BaseException:
+            if body is not None:
+                body.close()
+            raise
+
+    def _download(self, url: str, timeout: float, body: Optional[BinaryIO], **kwargs) -> Optional[Download]:
+        """下载附件（body 不为None时流式写入 body）"""
+        cached = self.http_cache.get(url)
+        response = self.request_with_retry(
+            url, timeout=timeout, headers=self.http_cache.conditional_headers(cached), sink=body, **kwargs
+        )
+        if response and response.status_code == 304:
+            if body is not None:
+                cached_body = self.http_cache.open_body(url)
+                found = cached_body is not None
+            else:
+                content = self.http_cache.read_body(url)
+                found = content is not None
+            if found:
+                self.logger.info(f'文件未修改(304): {url}')
+                if not cached['processed']:
+                    self._pending_downloads[url] = cached['sha256']
+                if body is not None:
+                    # 直接读取缓存文件，临时文件不再需要
+                    body.close()
+                    return Download(url, sha256=cached['sha256'], changed=not cached['processed'],
+                                    file=cached_body)
+                return Download(url, content, cached['sha256'], changed=not cached['processed'])
+
+            # 缓存在请求期间被淘汰，重新完整下载
+            response = self.request_with_retry(url, timeout=timeout, sink=body, **kwargs)
+            if response and response.status_code != 200:
+                response = None
+            cached = None
+
+        if not response:
+            if body is not None:
+                body.close()
+            return None
+
+        store_options = {
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+        }
+        if body is not None:
+            content = None
+            sha256 = self.http_cache.store_file(url, body, **store_options)
+        else:
+            content = response.content
+            sha256 = self.http_cache.store(url, content, **store_options)
+
+        unchanged = bool(cached) and cached['processed'] and cached['sha256'] == sha256
+        if unchanged:
+            self.http_cache.mark_processed(url, sha256)
+            self.logger.info(f'文件内容未变化: {url}')
+        else:
+            self._pending_downloads[url] = sha256
+        return Download(url, content, sha256, changed=not unchanged, file=body)
+
+    def map_concurrent(self, func: Callable[[Any], List[Dict[str, Any]]],
+                       items: Iterable[Any], stage: str = 'parse') -> List[Dict[str, Any]]:
         """
-        headers = self.get_headers()
+        用有界线程池并发处理多个抓取任务，并按输入顺序合并结果
 
-        for attempt in range(max_retries):
-            try:
-                # 随机延迟，避免请求过快
-                time.sleep(random.uniform(1, 3))
-
-                self.logger.info(f'请求 {url} (尝试 {attempt + 1}/{max_retries})')
-
-                response = self.session.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    timeout=30,
-                    **kwargs
-                )
-
-                # 检查是否被重定向到验证页面
-                if 'captcha' in response.url.lower() or response.status_code == 403:
-                    raise Exception('遇到反爬验证')
-
-                if response.status_code == 200:
-                    self.logger.info(f'请求成功: {url}')
-                    return response
-                else:
-                    self.logger.warning(f'请求失败，状态码: {response.status_code}')
+        请求频率由按主机限速器控制，单个任务失败只记录日志，不影响其他任务
 
+        Args:
+            func: 处理单个任务的函数，返回数据列表
+            items: 任务列表（如报告、文章、文件）
+            stage: 计时阶段（解析详情页为parse，并发获取列表为list）
+
+        Returns:
+            合并后的数据列表
+        """
+        items = list(items)
+        done = [0]
+        done_lock = threading.Lock()
+
+        def run_one(item):
+            try:
+                with self.metrics.stage(stage):
+                    return func(item) or []
             except Exception as e:
-                self.logger.error(f'请求异常 (尝试 {attempt + 1}/{max_retries}): {str(e)}')
-                if attempt == max_retries - 1:
-                    self.logger.error(f'请求失败，已达最大重试次数: {url}')
-                    return None
-                time.sleep(random.uniform(5, 10))
+                self.logger.error(f'抓取任务失败: {str(e)}')
+                self.metrics.record_error(str(e), stage=stage)
+                return []
+            finally:
+                with done_lock:
+                    done[0] += 1
+                    finished = done[0]
+                # 抓取阶段占总进度的前80%
+                self.report_progress('scrape', finished * 80 / len(items), f'已完成 {finished}/{len(items)}')
+
+        if self.max_workers == 1 or len(items) <= 1:
+            results = [run_one(item) for item in items]
+        else:
+            # 耗时计入各工作线程，调用线程等待期间不计时
+            with self.metrics.paused(), ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)),
+                                                           thread_name_prefix=self.name) as executor:
+                results = list(executor.map(run_one, items))
+
+        return [record for result in results for record in result]
+
+    def report_progress(self, stage: str, percent: float, message: str = ''):
+        """
+        汇报运行进度（未设置 progress_callback 时忽略）
 
-        return None
+        Args:
+            stage: 阶段（scrape/save/done）
+            percent: 总进度百分比
+            message: 进度说明
+        """
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, percent, message)
+        except Exception as e:
+            self.logger.warning(f'汇报进度失败: {str(e)}')
 
     def parse_html(self, html: str) -> BeautifulSoup:
         """
@@ -119,6 +358,55 @@ class BaseScraper:
         """
         return BeautifulSoup(html, 'lxml')
 
+    def html_blocks(self, html: str, paragraphs: bool = True, tables: bool = True) -> HtmlBlocks:
+        """
+        提取页面中所有段落文本和表格单元格文本
+
+        Args:
+            html: HTML字符串
+            paragraphs: 是否提取段落
+            tables: 是否提取表格
+
+        Returns:
+            HtmlBlocks(paragraphs=[文本], tables=[[[单元格文本]]])
+        """
+        if self.fast_parse:
+            return fastparse.extract_blocks(html, paragraphs, tables)
+
+        soup = self.parse_html(html)
+        return HtmlBlocks(
+            [self.extract_text(p) for p in soup.find_all('p')] if paragraphs else [],
+            [self.table_rows(table) for table in soup.find_all('table')] if tables else []
+        )
+
+    def container_paragraphs(self, html: str, class_pattern: str) -> Optional[List[str]]:
+        """
+        第一个class匹配正则的 <div> 中所有段落的文本
+
+        Returns:
+            段落文本列表，没有匹配的容器时返回None
+        """
+        if self.fast_parse:
+            return fastparse.container_paragraphs(html, class_pattern)
+
+        container = self.parse_html(html).find('div', class_=re.compile(class_pattern))
+        if not container:
+            return None
+        return [self.extract_text(p) for p in container.find_all('p')]
+
+    def page_links(self, html: str) -> List[Tuple[str, str]]:
+        """页面中所有带 href 的链接，返回 (href, 文本) 列表"""
+        if self.fast_parse:
+            return fastparse.links(html)
+
+        return [(link['href'], self.extract_text(link))
+                for link in self.parse_html(html).find_all('a', href=True)]
+
+    def table_rows(self, table) -> TableRows:
+        """BeautifulSoup表格元素 -> 行列表，每行为单元格文本"""
+        return [[self.extract_text(cell) for cell in row.find_all(['td', 'th'])]
+                for row in table.find_all('tr')]
+
     def extract_text(self, element) -> str:
         """
         提取元素文本
@@ -153,6 +441,35 @@ class BaseScraper:
             self.logger.warning(f'无法转换数字: {text}')
             return None
 
+    def bulk_upsert(
+        self,
+        db_session,
+        model,
+        records: List[Dict[str, Any]],
+        defaults: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        按模型自然键批量插入或更新，并累计到本次运行的写入统计
+
+        Args:
+            db_session: 数据库会话
+            model: 定义了 NATURAL_KEY 的模型类
+            records: 记录字典列表
+            defaults: 缺失字段的默认值
+
+        Returns:
+            新增和更新的记录数
+        """
+        stats = upsert_records(db_session, model, records, defaults=defaults)
+        for key, count in stats.items():
+            self.save_stats[key] += count
+
+        self.logger.info(
+            f'{model.__tablename__}: 新增 {stats["inserted"]} 条，更新 {stats["updated"]} 条，'
+            f'未变化 {stats["unchanged"]} 条'
+        )
+        return stats['inserted'] + stats['updated']
+
     def save_data(self, data: List[Dict[str, Any]], db_session) -> int:
         """
         保存数据到数据库（子类需实现具体逻辑）
@@ -162,10 +479,20 @@ class BaseScraper:
             db_session: 数据库会话
 
         Returns:
-            保存的记录数
+            保存（新增或更新）的记录数
         """
         raise NotImplementedError('子类必须实现save_data方法')
 
+    def after_save(self):
+        """
+        数据成功入库后的回调
+
+        把本次下载的新内容标记为已处理，下次可以跳过解析；子类可覆盖以保存自己的增量状态
+        """
+        for url, sha256 in self._pending_downloads.items():
+            self.http_cache.mark_processed(url, sha256)
+        self._pending_downloads = {}
+
     def scrape(self, **kwargs) -> List[Dict[str, Any]]:
         """
         执行爬取（子类需实现具体逻辑）
@@ -190,18 +517,28 @@ class BaseScraper:
             爬取结果统计
         """
         start_time = datetime.now()
+        self.save_stats = self._empty_save_stats()
+        self._pending_downloads = {}
+        self.metrics = RunMetrics()
         self.logger.info(f'开始爬取: {self.name}')
 
         try:
-            # 执行爬取
-            data = self.scrape(**kwargs)
+            # 执行爬取（map_concurrent 之外的部分计入列表抓取阶段）
+            self.report_progress('scrape', 0, '开始抓取')
+            with self.metrics.stage('list'):
+                data = self.scrape(**kwargs)
 
             # 保存数据
-            if data:
-                saved_count = self.save_data(data, db_session)
-                db_session.commit()
-            else:
-                saved_count = 0
+            self.report_progress('save', 80, f'保存 {len(data)} 条记录')
+            with self.metrics.stage('save'):
+                if data:
+                    saved_count = self.save_data(data, db_session)
+                    db_session.commit()
+                else:
+                    saved_count = 0
+
+            self.after_save()
+            self.report_progress('done', 100, f'保存 {saved_count} 条记录')
 
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -211,28 +548,41 @@ class BaseScraper:
                 'status': 'success',
                 'records_found': len(data),
                 'records_saved': saved_count,
+                'records_inserted': self.save_stats['inserted'],
+                'records_updated': self.save_stats['updated'],
+                'records_unchanged': self.save_stats['unchanged'],
                 'duration': duration,
                 'started_at': start_time,
                 'completed_at': end_time,
-                'error': None
+                'error': None,
+                'metrics': self.metrics.to_dict()
             }
 
-            self.logger.info(f'爬取完成: 找到 {len(data)} 条记录，保存 {saved_count} 条，耗时 {duration:.2f} 秒')
+            self.logger.info(
+                f'爬取完成: 找到 {len(data)} 条记录，保存 {saved_count} 条'
+                f'（新增 {self.save_stats["inserted"]}，更新 {self.save_stats["updated"]}，'
+                f'未变化 {self.save_stats["unchanged"]}），耗时 {duration:.2f} 秒'
+            )
             return result
 
         except Exception as e:
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
+            self.metrics.record_error(str(e), stage='run')
 
             result = {
                 'scraper': self.name,
                 'status': 'failed',
                 'records_found': 0,
                 'records_saved': 0,
+                'records_inserted': 0,
+                'records_updated': 0,
+                'records_unchanged': 0,
                 'duration': duration,
                 'started_at': start_time,
                 'completed_at': end_time,
-                'error': str(e)
+                'error': str(e),
+                'metrics': self.metrics.to_dict()
             }
 
             self.logger.error(f'爬取失败: {str(e)}')
@@ -3,9 +3,17 @@
 从蚂蚁集团、京东科技等上市公司财报中抓取数据
 """
 import re
-from typing import List, Dict, Any, Optional
+from typing import BinaryIO, Iterator, List, Dict, Any, Optional
 from datetime import datetime
-from .base import BaseScraper, ScraperFactory
+from .base import BaseScraper, ScraperFactory, PLATFORM_DEFAULTS
+from .matcher import KeywordMatcher
+from .figures import scan
+from .pdf import iter_page_texts
+from .research import ResearchScraper
+
+
+# 财报链接的 href 特征
+REPORT_LINK_PATTERN = re.compile(r'(?i)(report|earning|annual)')
 
 
 class CorporateScraper(BaseScraper):
@@ -30,12 +38,15 @@ class CorporateScraper(BaseScraper):
         }
     }
 
-    def __init__(self, company: str = '蚂蚁集团'):
+    def __init__(self, company: str = '蚂蚁集团', max_workers: Optional[int] = None,
+                 pdf_workers: Optional[int] = None):
         """
         初始化财报爬虫
 
         Args:
             company: 公司名称
+            max_workers: 并发抓取线程数
+            pdf_workers: PDF页面提取进程数（默认见 pdf.default_workers，1为顺序提取）
         """
         if company not in self.REPORT_SOURCES:
             raise ValueError(f'不支持的公司: {company}')
@@ -43,11 +54,14 @@ class CorporateScraper(BaseScraper):
         config = self.REPORT_SOURCES[company]
         super().__init__(
             name=f'CorporateScraper_{company}',
-            base_url=config['base_url']
+            base_url=config['base_url'],
+            max_workers=max_workers
         )
         self.company = company
         self.report_path = config['report_path']
         self.keywords = config['keywords']
+        self.keyword_matcher = KeywordMatcher({company: self.keywords})
+        self.pdf_workers = pdf_workers
 
     def get_reports_list(self) -> List[Dict[str, str]]:
         """
@@ -61,14 +75,12 @@ class CorporateScraper(BaseScraper):
         if not response:
             return []
 
-        soup = self.parse_html(response.text)
         reports = []
 
         # 解析财报列表（需要根据实际HTML结构调整）
-        report_items = soup.find_all('a', href=re.compile(r'(?i)(report|earning|annual)'))
-        for item in report_items:
-            title = self.extract_text(item)
-            href = item.get('href', '')
+        for href, title in self.page_links(response.text):
+            if not REPORT_LINK_PATTERN.search(href):
+                continue
             if any(kw in title for kw in ['年报', '年度', '年报报告', '20', 'Annual', 'Year']):
                 # 补全URL
                 if not href.startswith('http'):
@@ -88,44 +100,58 @@ class CorporateScraper(BaseScraper):
         reports.sort(key=lambda x: x['year'] or 0, reverse=True)
         return reports
 
-    def parse_report(self, report_url: str, year: int) -> List[Dict[str, Any]]:
+    def parse_report(self, report_url: str, year: int) -> Iterator[Dict[str, Any]]:
         """
         解析财报内容
 
+        PDF财报流式下载到临时文件，逐页解析，每页提取完成后立即产出该页的数据
+        （只有下载和提取是流式的：scrape 把每份财报的数据收集成列表，全部财报解析完后由 run 一次保存）
+
         Args:
             report_url: 财报URL
             year: 年份
 
-        Returns:
-            提取的数据列表
+        Yields:
+            提取的数据
         """
         self.logger.info(f'解析财报: {report_url}')
 
-        response = self.request_with_retry(report_url)
-        if not response:
-            return []
+        is_pdf = report_url.endswith('.pdf')
+        download = self.download(report_url, stream=is_pdf)
+        if not download:
+            return
+
+        with download:
+            if not download.changed:
+                self.logger.info(f'财报未变化，跳过解析: {report_url}')
+                return
 
-        # 如果是PDF文件，需要特殊处理
-        if report_url.endswith('.pdf'):
-            return self._parse_pdf_report(report_url, year)
+            # 如果是PDF文件，需要特殊处理
+            if is_pdf:
+                yield from self.iter_pdf_report(download.file, report_url, year)
+                return
 
-        # HTML财报解析
-        return self._parse_html_report(response.text, report_url, year)
+            # HTML财报解析
+            yield from self._parse_html_report(self._decode_html(download.content), report_url, year)
+
+    @staticmethod
+    def _decode_html(content: bytes) -> str:
+        """按页面声明的编码解码HTML"""
+        from bs4 import UnicodeDammit
+        return UnicodeDammit(content).unicode_markup or ''
 
     def _parse_html_report(self, html: str, source_url: str, year: int) -> List[Dict[str, Any]]:
         """解析HTML财报"""
-        soup = self.parse_html(html)
+        blocks = self.html_blocks(html)
         data = []
 
         # 查找包含关键词的段落
-        paragraphs = soup.find_all('p')
-        for p in paragraphs:
-            text = self.extract_text(p)
+        for text in blocks.paragraphs:
             if not text:
                 continue
 
             # 检查是否包含关键词
-            if not any(kw in text for kw in self.keywords):
+            if not self.keyword_matcher.contains_any(text):
                 continue
 
             # 提取数据
@@ -134,140 +160,112 @@ class CorporateScraper(BaseScraper):
                 data.extend(extracted)
 
         # 查找表格数据
-        tables = soup.find_all('table')
-        for table in tables:
-            extracted = self._extract_table_data(table, source_url, year)
+        for rows in blocks.tables:
+            extracted = self._extract_table_data(rows, source_url, year)
             if extracted:
                 data.extend(extracted)
 
         return data
 
-    def _parse_pdf_report(self, pdf_url: str, year: int) -> List[Dict[str, Any]]:
-        """解析PDF财报（需要安装pdfplumber）"""
-        try:
-            import pdfplumber
-            import requests
-            import io
-
-            self.logger.info(f'解析PDF财报: {pdf_url}')
-
-            # 下载PDF
-            response = requests.get(pdf_url, timeout=60)
-            pdf_file = io.BytesIO(response.content)
+    def iter_pdf_report(self, source: BinaryIO, pdf_url: str, year: int) -> Iterator[Dict[str, Any]]:
+        """
+        逐页解析PDF财报，每页提取完成后立即产出该页的数据
 
-            data = []
-            with pdfplumber.open(pdf_file) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text and any(kw in text for kw in self.keywords):
-                        extracted = self._extract_financial_data(text, pdf_url, year)
-                        data.extend(extracted)
+        先快速筛选包含关键词的页，只有候选页交给进程池用pdfplumber精细提取
 
-            return data
+        Args:
+            source: 已下载的PDF文件（或文件内容）
+            pdf_url: 财报URL
+            year: 年份
 
+        Yields:
+            提取的数据
+        """
+        try:
+            import pdfplumber  # noqa: F401
         except ImportError:
             self.logger.warning('未安装pdfplumber，无法解析PDF财报')
-            return []
+            return
+
+        self.logger.info(f'解析PDF财报: {pdf_url}')
+
+        try:
+            for _, text in iter_page_texts(source, self.keyword_matcher.regex, self.pdf_workers):
+                if text and self.keyword_matcher.contains_any(text):
+                    yield from self._extract_financial_data(text, pdf_url, year)
         except Exception as e:
             self.logger.error(f'PDF解析失败: {str(e)}')
-            return []
+            self.metrics.record_error(f'PDF解析失败: {str(e)}', url=pdf_url)
 
     def _extract_financial_data(self, text: str, source_url: str, year: int) -> List[Dict[str, Any]]:
         """从文本中提取财务数据"""
         data = []
 
-        # 识别平台
-        from .research import ResearchScraper as Research
-        platform_keywords = Research.PLATFORM_KEYWORDS
+        platforms = ResearchScraper.PLATFORM_MATCHER.present(text)
+        if not platforms:
+            return data
+
+        # 一次扫描得到所有余额、发放规模和季度；确定季度（财报通常是季度数据），没有则按年报处理
+        figures = scan(text)
+        month = figures.first_quarter_month() or 12
 
-        for group, keywords in platform_keywords.items():
+        # 识别平台：每个集团按优先级依次尝试出现的关键词，取第一个能提取到数据的
+        for group, keywords in platforms.items():
             for keyword in keywords:
-                if keyword in text:
-                    # 提取贷款余额（单位通常为亿元）
-                    balance_match = re.search(
-                        rf'{keyword}[：:\s]*(?:贷款余额|余额|存量)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)',
-                        text
-                    )
-                    if not balance_match:
-                        balance_match = re.search(
-                            r'(?:贷款余额|余额|存量)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元).*?' + keyword,
-                            text
-                        )
-
-                    # 提取发放规模
-                    issued_match = re.search(
-                        rf'{keyword}[：:\s]*(?:发放|交易|放款)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)',
-                        text
-                    )
-
-                    if balance_match or issued_match:
-                        # 确定季度（财报通常是季度数据）
-                        quarter_match = re.search(r'第([1-4])季度|Q([1-4])', text)
-                        if quarter_match:
-                            quarter = int(quarter_match.group(1) or quarter_match.group(2))
-                            month = quarter * 3
-                        else:
-                            month = 12  # 默认年报
-
-                        data.append({
-                            'name': keyword,
-                            'company_group': group,
-                            'report_month': datetime(year, month, 1),
-                            'loan_balance': self.clean_number(balance_match.group(1)) if balance_match else None,
-                            'loan_issued': self.clean_number(issued_match.group(1)) if issued_match else None,
-                            'platform_type': '联合贷' if '联合' in text else '助贷',
-                            'loan_type': '经营类' if '小微' in text or '企业' in text else '消费类',
-                            'data_source': f'{self.company}财报',
-                            'source_url': source_url
-                        })
-                        break
+                # 贷款余额和发放规模（统一换算为亿元）
+                loan_balance = figures.for_keyword('balance', keyword)
+                loan_issued = figures.for_keyword('issued', keyword)
+
+                if loan_balance is not None or loan_issued is not None:
+                    data.append({
+                        'name': keyword,
+                        'company_group': group,
+                        'report_month': datetime(year, month, 1),
+                        'loan_balance': loan_balance,
+                        'loan_issued': loan_issued,
+                        'platform_type': '联合贷' if '联合' in text else '助贷',
+                        'loan_type': '经营类' if '小微' in text or '企业' in text else '消费类',
+                        'data_source': f'{self.company}财报',
+                        'source_url': source_url
+                    })
+                    break
 
         return data
 
-    def _extract_table_data(self, table, source_url: str, year: int) -> List[Dict[str, Any]]:
-        """从表格中提取数据"""
+    def _extract_table_data(self, rows: List[List[str]], source_url: str, year: int) -> List[Dict[str, Any]]:
+        """从表格中提取数据（rows 为表格行，每行为单元格文本）"""
         data = []
-        rows = table.find_all('tr')
 
         if not rows:
             return data
 
         # 获取表头
-        headers = []
-        header_row = rows[0]
-        for th in header_row.find_all(['th', 'td']):
-            headers.append(self.extract_text(th))
+        headers = rows[0]
 
         # 解析数据行
-        for row in rows[1:]:
-            cells = row.find_all(['td', 'th'])
+        for cells in rows[1:]:
             if len(cells) < 2:
                 continue
 
             row_data = {}
             for i, cell in enumerate(cells):
                 if i < len(headers):
-                    row_data[headers[i]] = self.extract_text(cell)
-
-            # 识别平台并提取数据
-            from .research import ResearchScraper as Research
-            platform_keywords = Research.PLATFORM_KEYWORDS
-
-            for group, keywords in platform_keywords.items():
-                for keyword in keywords:
-                    if any(keyword in str(v) for v in row_data.values()):
-                        data.append({
-                            'name': keyword,
-                            'company_group': group,
-                            'report_month': datetime(year, 12, 1),  # 默认年报
-                            'loan_balance': self._extract_value(row_data, ['余额', '规模']),
-                            'loan_issued': self._extract_value(row_data, ['发放', '交易']),
-                            'platform_type': '联合贷',
-                            'loan_type': '消费类',
-                            'data_source': f'{self.company}财报',
-                            'source_url': source_url
-                        })
-                        break
+                    row_data[headers[i]] = cell
+
+            # 识别平台并提取数据（单元格之间用分隔符拼接，避免跨单元格误匹配）
+            row_text = '\x1f'.join(str(v) for v in row_data.values())
+            for group, keyword in ResearchScraper.PLATFORM_MATCHER.first_per_group(row_text).items():
+                data.append({
+                    'name': keyword,
+                    'company_group': group,
+                    'report_month': datetime(year, 12, 1),  # 默认年报
+                    'loan_balance': self._extract_value(row_data, ['余额', '规模']),
+                    'loan_issued': self._extract_value(row_data, ['发放', '交易']),
+                    'platform_type': '联合贷',
+                    'loan_type': '消费类',
+                    'data_source': f'{self.company}财报',
+                    'source_url': source_url
+                })
 
         return data
 
@@ -282,6 +280,8 @@ class CorporateScraper(BaseScraper):
         """
         执行爬取
 
+        每份财报在工作线程中流式下载和逐页提取，提取出的数据（每份财报几条）收集为列表返回，由 run 统一保存
+
         Args:
             max_reports: 最大爬取报告数
 
@@ -291,19 +291,12 @@ class CorporateScraper(BaseScraper):
         self.logger.info(f'开始爬取{self.company}财报')
 
         reports = self.get_reports_list()[:max_reports]
-        all_data = []
-
-        for report in reports:
-            if not report['year']:
-                continue
-
+        def parse(report):
             self.logger.info(f'解析财报: {report["title"]}')
-            data = self.parse_report(report['url'], report['year'])
-            all_data.extend(data)
+            # 在工作线程中消费生成器，下载、逐页提取和异常都计入该任务
+            return list(self.parse_report(report['url'], report['year']))
 
-            # 添加延迟
-            import time
-            time.sleep(2)
+        all_data = self.map_concurrent(parse, [report for report in reports if report['year']])
 
         self.logger.info(f'爬取完成，共获取 {len(all_data)} 条数据')
         return all_data
@@ -312,21 +305,7 @@ class CorporateScraper(BaseScraper):
         """保存数据到数据库"""
         from ..models import Platform
 
-        saved_count = 0
-        for item in data:
-            existing = db_session.query(Platform).filter_by(
-                name=item['name'],
-                report_month=item['report_month'],
-                platform_type=item.get('platform_type', '联合贷'),
-                loan_type=item.get('loan_type', '消费类')
-            ).first()
-
-            if not existing:
-                platform = Platform(**item)
-                db_session.add(platform)
-                saved_count += 1
-
-        return saved_count
+        return self.bulk_upsert(db_session, Platform, data, defaults=PLATFORM_DEFAULTS)
 
 
 # 注册爬虫
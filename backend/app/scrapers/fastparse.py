@@ -0,0 +1,109 @@
+"""
+基于lxml的快速HTML解析
+不构建BeautifulSoup对象树，用 iterparse 流式取出段落和表格、直接在lxml树上查找容器和链接，
+处理完的节点立即清理，大页面的解析耗时和内存都明显下降。
+取出的文本与 BeautifulSoup 的 get_text(strip=True) 一致
+"""
+import io
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+from lxml import etree, html as lxml_html
+
+
+# 表格：行 -> 单元格文本
+TableRows = List[List[str]]
+
+
+class HtmlBlocks(NamedTuple):
+    """页面中的段落和表格"""
+    paragraphs: List[str]
+    tables: List[TableRows]
+
+
+def element_text(element) -> str:
+    """元素的文本（各段文本去掉首尾空白后直接拼接，不含注释）"""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def element_table_rows(table) -> TableRows:
+    """lxml表格元素 -> 行列表（包括嵌套表格中的行，与 find_all('tr') 一致）"""
+    return [[element_text(cell) for cell in row.iter('td', 'th')] for row in table.iter('tr')]
+
+
+def _release(element):
+    """清理已处理的节点及其之前的兄弟节点"""
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def extract_blocks(html: str, paragraphs: bool = True, tables: bool = True) -> HtmlBlocks:
+    """
+    流式提取页面中所有 <p> 的文本和所有 <table> 的单元格文本
+
+    Args:
+        html: HTML字符串
+        paragraphs: 是否提取段落
+        tables: 是否提取表格
+
+    Returns:
+        HtmlBlocks，段落和表格都按文档顺序排列（嵌套表格排在外层表格之后）
+    """
+    tags = [tag for tag, wanted in (('p', paragraphs), ('table', tables)) if wanted]
+    result = HtmlBlocks([], [])
+    if not tags or not html:
+        return result
+
+    # 当前所在的表格层数；表格内的段落要等最外层表格处理完才能清理
+    open_tables = []
+    events = etree.iterparse(io.BytesIO(html.encode('utf-8')), events=('start', 'end'),
+                             tag=tags, html=True, encoding='utf-8', recover=True)
+    for event, element in events:
+        if element.tag == 'table':
+            if event == 'start':
+                open_tables.append(len(result.tables))
+                result.tables.append([])
+                continue
+            result.tables[open_tables.pop()] = element_table_rows(element)
+        elif event == 'end' and paragraphs:
+            result.paragraphs.append(element_text(element))
+        else:
+            continue
+
+        if not open_tables:
+            _release(element)
+
+    return result
+
+
+def container_paragraphs(html: str, class_pattern: str) -> Optional[List[str]]:
+    """
+    第一个class匹配正则的 <div> 中所有 <p> 的文本
+
+    Args:
+        html: HTML字符串
+        class_pattern: class正则（与 find('div', class_=re.compile(...)) 相同，匹配任意一个class即可）
+
+    Returns:
+        段落文本列表，没有匹配的容器时返回None
+    """
+    if not html or not html.strip():
+        return None
+    tree = lxml_html.fromstring(html)
+    regex = re.compile(class_pattern)
+    for div in tree.iter('div'):
+        classes = div.get('class')
+        if classes and any(regex.search(name) for name in classes.split()):
+            return [element_text(p) for p in div.iter('p')]
+    return None
+
+
+def links(html: str) -> List[Tuple[str, str]]:
+    """页面中所有带 href 的链接，返回 (href, 文本) 列表"""
+    if not html or not html.strip():
+        return []
+    tree = lxml_html.fromstring(html)
+    return [(a.get('href'), element_text(a)) for a in tree.xpath('//a[@href]')]
@@ -0,0 +1,181 @@
+"""
+财务数据提取
+预编译贷款余额、发放规模、增长率、月份和季度的正则，一次扫描文本得到所有数字及其位置，
+金额统一换算为亿元（支持 万亿/万亿元/亿/亿元/千万/千万元/万/万元），百分比保留原值
+"""
+import re
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional
+
+
+# 标签 -> 数据类型（长标签在前，保证“贷款余额”不会被拆成“余额”）
+LABELS = {
+    '贷款余额': 'balance',
+    '余额': 'balance',
+    '存量': 'balance',
+    '发放': 'issued',
+    '交易': 'issued',
+    '放款': 'issued',
+    '同比增长': 'yoy',
+    '同比': 'yoy',
+    '环比增长': 'mom',
+    '环比': 'mom',
+}
+
+# 金额单位 -> 换算为亿元的系数
+AMOUNT_UNITS = {
+    '万亿元': 10000.0,
+    '万亿': 10000.0,
+    '千万元': 0.1,
+    '千万': 0.1,
+    '亿元': 1.0,
+    '亿': 1.0,
+    '万元': 0.0001,
+    '万': 0.0001,
+}
+
+AMOUNT = '亿元'
+PERCENT = '%'
+
+
+def _alternation(words: Iterable[str]) -> str:
+    return '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# 单次扫描用的组合正则：带标签的数字 / 年月 / 季度
+SCAN_PATTERN = re.compile(
+    rf'(?P<label>{_alternation(LABELS)})[：:\s]*(?P<number>[0-9][0-9,]*(?:\.[0-9]+)?)\s*'
+    rf'(?P<unit>{_alternation(AMOUNT_UNITS)}|%|％)'
+    r'|(?P<year>20\d{2})\s*年\s*(?P<month>\d{1,2})\s*月'
+    r'|第(?P<quarter>[1-4])季度|Q(?P<q>[1-4])'
+)
+
+# 表格单元格中的月份（2024-03、2024/3、2024年3月）
+CELL_MONTH_PATTERN = re.compile(r'(20\d{2})\s*[-/年]\s*(\d{1,2})')
+
+# 关键词与标签之间允许的分隔符
+_SEPARATOR = re.compile(r'[：:\s]*')
+
+
+class Figure(NamedTuple):
+    """一个带标签的数字"""
+    kind: str      # balance / issued / yoy / mom
+    value: float   # 金额为亿元，百分比为原值
+    unit: str      # '亿元' 或 '%'
+    start: int     # 标签起始位置
+    end: int       # 单位结束位置
+    label: str
+
+
+class Mention(NamedTuple):
+    """年月或季度"""
+    year: Optional[int]
+    month: int
+    start: int
+
+
+def parse_number(text: str) -> Optional[float]:
+    """去掉千分位后转为浮点数"""
+    try:
+        return float(text.replace(',', ''))
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_cell_month(value: str) -> Optional[datetime]:
+    """从表格单元格中解析月份"""
+    match = CELL_MONTH_PATTERN.search(value or '')
+    if not match:
+        return None
+    try:
+        return datetime(int(match.group(1)), int(match.group(2)), 1)
+    except ValueError:
+        return None
+
+
+class FigureScan:
+    """一段文本的扫描结果"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.figures: List[Figure] = []
+        self.months: List[Mention] = []
+        self.quarters: List[Mention] = []
+
+        for match in SCAN_PATTERN.finditer(text):
+            if match.group('label'):
+                value = parse_number(match.group('number'))
+                if value is None:
+                    continue
+                unit = match.group('unit')
+                if unit in AMOUNT_UNITS:
+                    value, unit = value * AMOUNT_UNITS[unit], AMOUNT
+                else:
+                    unit = PERCENT
+                self.figures.append(Figure(LABELS[match.group('label')], value, unit,
+                                           match.start(), match.end(), match.group('label')))
+            elif match.group('year'):
+                month = int(match.group('month'))
+                if 1 <= month <= 12:
+                    self.months.append(Mention(int(match.group('year')), month, match.start()))
+            else:
+                quarter = int(match.group('quarter') or match.group('q'))
+                self.quarters.append(Mention(None, quarter * 3, match.start()))
+
+    def of_kind(self, kind: str) -> List[Figure]:
+        """某类数据的全部数字（金额类只返回以亿元计的数字）"""
+        unit = PERCENT if kind in ('yoy', 'mom') else AMOUNT
+        return [figure for figure in self.figures if figure.kind == kind and figure.unit == unit]
+
+    def first(self, kind: str) -> Optional[float]:
+        """文本中第一个某类数据的值"""
+        figures = self.of_kind(kind)
+        return figures[0].value if figures else None
+
+    def first_month(self) -> Optional[datetime]:
+        """文本中第一个年月"""
+        if not self.months:
+            return None
+        mention = self.months[0]
+        return datetime(mention.year, mention.month, 1)
+
+    def first_quarter_month(self) -> Optional[int]:
+        """文本中第一个季度对应的季末月份"""
+        return self.quarters[0].month if self.quarters else None
+
+    def for_keyword(self, kind: str, keyword: str) -> Optional[float]:
+        """
+        与某个关键词关联的数字
+
+        优先取紧跟在关键词后面的（如“花呗余额：1800亿元”），
+        否则取同一行内出现在关键词之前的第一个数字（如“余额1800亿元的花呗”）
+        """
+        figures = self.of_kind(kind)
+        if not figures or not keyword:
+            return None
+
+        starts = []
+        start = self.text.find(keyword)
+        while start != -1:
+            starts.append(start)
+            start = self.text.find(keyword, start + 1)
+        if not starts:
+            return None
+
+        for figure in figures:
+            for start in starts:
+                end = start + len(keyword)
+                if end <= figure.start and _SEPARATOR.fullmatch(self.text, end, figure.start):
+                    return figure.value
+
+        for figure in figures:
+            for start in starts:
+                if start >= figure.end and '\n' not in self.text[figure.end:start]:
+                    return figure.value
+
+        return None
+
+
+def scan(text: str) -> FigureScan:
+    """扫描文本中的所有财务数字"""
+    return FigureScan(text or '')
@@ -0,0 +1,248 @@
+"""
+爬虫下载缓存
+在磁盘上保存附件（Excel/PDF等）的响应体和 ETag / Last-Modified，
+再次下载时发送条件请求；服务器返回304或内容哈希未变化时可跳过解析
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+from ..config import DATA_DIR
+from ..services.locks import file_lock
+
+
+# 复制响应体时每次读写的字节数
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class HttpCache:
+    """
+    磁盘HTTP缓存（按最近访问时间做LRU淘汰）
+
+    每个URL对应两个文件：<key>.json 保存元数据，<key>.body 保存响应体。
+    元数据中的 processed 表示该版本内容已成功解析入库，只有已入库的版本才能跳过解析。
+
+    多个工作进程共用同一个缓存目录：元数据每次从磁盘读取，不在内存中保留索引；
+    临时文件用 mkstemp 生成唯一文件名，替换响应体和元数据、淘汰都在目录下 .lock 文件锁内进行，
+    最近访问时间记录在响应体文件的修改时间上
+    """
+
+    # 崩溃遗留的临时文件超过该秒数后在淘汰时删除
+    STALE_TEMP_SECONDS = 24 * 3600
+
+    def __init__(self, directory: Path, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            directory: 缓存目录
+            max_bytes: 响应体总大小上限，超出时淘汰最久未访问的条目
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f'{key}.body'
+
+    @contextmanager
+    def _locked(self):
+        """进程内线程锁 + 跨进程文件锁"""
+        with self._lock, file_lock(str(self.directory / '.lock')):
+            yield
+
+    def _temp_file(self, key: str, suffix: str):
+        """在缓存目录中创建唯一的临时文件，返回 (文件描述符, 路径)"""
+        descriptor, path = tempfile.mkstemp(prefix=f'.{key}.', suffix=suffix, dir=self.directory)
+        return descriptor, Path(path)
+
+    def _read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key: str, meta: Dict[str, Any]):
+        """写入元数据（调用方持有锁）"""
+        descriptor, tmp_path = self._temp_file(key, '.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_path, self._meta_path(key))
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _remove(self, key: str):
+        for path in (self._meta_path(key), self._body_path(key)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """获取URL的缓存元数据（响应体已被删除的条目视为不存在）"""
+        key = self._key(url)
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        try:
+            # 更新响应体的修改时间，作为LRU的最近访问时间
+            os.utime(self._body_path(key))
+        except FileNotFoundError:
+            return None
+        return meta
+
+    def conditional_headers(self, meta: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """根据缓存元数据生成条件请求头"""
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        """读取缓存的响应体"""
+        try:
+            return self._body_path(self._key(url)).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def open_body(self, url: str) -> Optional[BinaryIO]:
+        """打开缓存的响应体文件（调用方负责关闭），不存在时返回None"""
+        try:
+            return open(self._body_path(self._key(url)), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def store(self, url: str, content: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None, processed: bool = False) -> str:
+        """
+        保存响应体和校验信息
+
+        Returns:
+            内容的SHA-256
+        """
+        return self.store_file(url, io.BytesIO(content), etag=etag,
+                               last_modified=last_modified, processed=processed)
+
+    def store_file(self, url: str, source: BinaryIO, etag: Optional[str] = None,
+                   last_modified: Optional[str] = None, processed: bool = False) -> str:
+        """
+        从文件保存响应体和校验信息（分块复制并计算哈希，不整个读入内存）
+
+        先在锁外复制到唯一的临时文件，再在锁内替换响应体和元数据，
+        多个进程同时保存同一URL时以最后完成的为准，响应体和元数据总是一致
+
+        Args:
+            url: 下载地址
+            source: 响应体文件，从开头复制，完成后重新定位到开头
+            etag: 响应的ETag
+            last_modified: 响应的Last-Modified
+            processed: 内容是否已解析入库
+
+        Returns:
+            内容的SHA-256
+        """
+        key = self._key(url)
+        digest = hashlib.sha256()
+        size = 0
+
+        descriptor, tmp_path = self._temp_file(key, '.part')
+        try:
+            source.seek(0)
+            with os.fdopen(descriptor, 'wb') as f:
+                for chunk in iter(lambda: source.read(COPY_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            meta = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'sha256': digest.hexdigest(),
+                'size': size,
+                'processed': processed,
+            }
+            with self._locked():
+                os.replace(tmp_path, self._body_path(key))
+                self._write_meta(key, meta)
+                self._evict(keep=key)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        source.seek(0)
+        return meta['sha256']
+
+    def mark_processed(self, url: str, sha256: str):
+        """标记某个版本的内容已成功解析入库（磁盘上已是其他版本时忽略）"""
+        key = self._key(url)
+        with self._locked():
+            meta = self._read_meta(key)
+            if meta is None or meta['sha256'] != sha256:
+                return
+            meta['processed'] = True
+            self._write_meta(key, meta)
+
+    def _evict(self, keep: str):
+        """总大小超出上限时按最近访问时间淘汰，并清理崩溃遗留的临时文件（调用方持有锁）"""
+        now = time.time()
+        bodies = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith('.body'):
+                    bodies.append((stat.st_mtime, entry.name[:-len('.body')], stat.st_size))
+                elif entry.name.startswith('.') and entry.name.endswith(('.part', '.tmp')) \
+                        and now - stat.st_mtime > self.STALE_TEMP_SECONDS:
+                    Path(entry.path).unlink(missing_ok=True)
+
+        total = sum(size for _, _, size in bodies)
+        for _, key, size in sorted(bodies):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= size
+            self._remove(key)
+
+    def clear(self):
+        """清空缓存"""
+        with self._locked():
+            for path in self.directory.glob('*.body'):
+                self._remove(path.stem)
+            for path in self.directory.glob('*.json'):
+                path.unlink(missing_ok=True)
+
+
+_http_cache: Optional[HttpCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """获取进程内共享的下载缓存（位于 DATA_DIR/http_cache）"""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache(DATA_DIR / 'http_cache')
+        return _http_cache
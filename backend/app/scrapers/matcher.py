@@ -0,0 +1,107 @@
+"""
+多关键词匹配
+把“分组 -> 关键词列表”的映射预编译为一个正则，一次扫描文本即可得到所有命中，
+替代各爬虫中 for group / for keyword / keyword in text 的嵌套循环
+"""
+import re
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class KeywordHit(NamedTuple):
+    """一次关键词命中"""
+    group: str
+    keyword: str
+    start: int
+
+
+class KeywordMatcher:
+    """
+    预编译的多关键词匹配器
+
+    用零宽先行断言 (?=(k1|k2|...)) 在每个位置尝试匹配，候选按长度降序排列，
+    再把同一位置上作为前缀一起命中的短关键词补齐，因此重叠的关键词（如“网商”和“网商银行”）
+    都能被找到，结果与逐个 keyword in text 判断一致
+    """
+
+    def __init__(self, mapping: Dict[str, List[str]]):
+        """
+        Args:
+            mapping: 分组 -> 关键词列表（列表顺序即优先级）
+        """
+        self.mapping = OrderedDict((group, list(keywords)) for group, keywords in mapping.items())
+
+        # 关键词 -> [(分组, 分组序号, 组内序号)]，同一关键词可以属于多个分组
+        self._owners: Dict[str, List[Tuple[str, int, int]]] = {}
+        for group_index, (group, keywords) in enumerate(self.mapping.items()):
+            for keyword_index, keyword in enumerate(keywords):
+                self._owners.setdefault(keyword, []).append((group, group_index, keyword_index))
+
+        keywords = sorted(self._owners, key=len, reverse=True)
+        # 每个关键词在同一起点上同时命中的更短关键词（它的前缀）
+        self._prefixes = {
+            keyword: [other for other in keywords if other != keyword and keyword.startswith(other)]
+            for keyword in keywords
+        }
+        alternation = '|'.join(re.escape(keyword) for keyword in keywords)
+        self.regex = re.compile(alternation) if keywords else None
+        self._scanner = re.compile(f'(?=({alternation}))') if keywords else None
+
+    def find_all(self, text: str) -> List[KeywordHit]:
+        """返回文本中所有关键词命中（包括重叠的），按位置排序"""
+        if not text or self._scanner is None:
+            return []
+
+        hits = []
+        for match in self._scanner.finditer(text):
+            start = match.start()
+            keyword = match.group(1)
+            for found in (keyword, *self._prefixes[keyword]):
+                for group, _, _ in self._owners[found]:
+                    hits.append(KeywordHit(group, found, start))
+        return hits
+
+    def present(self, text: str) -> 'OrderedDict[str, List[str]]':
+        """
+        文本中出现的关键词，按分组和优先级排序
+
+        Returns:
+            分组 -> 出现的关键词列表（都按映射中的顺序），未命中的分组不出现
+        """
+        if not text or self._scanner is None:
+            return OrderedDict()
+
+        found = set()
+        for match in self._scanner.finditer(text):
+            keyword = match.group(1)
+            found.add(keyword)
+            found.update(self._prefixes[keyword])
+
+        ranked = sorted(
+            (group_index, keyword_index, group, keyword)
+            for keyword in found
+            for group, group_index, keyword_index in self._owners[keyword]
+        )
+        result = OrderedDict()
+        for _, _, group, keyword in ranked:
+            result.setdefault(group, []).append(keyword)
+        return result
+
+    def first_per_group(self, text: str) -> 'OrderedDict[str, str]':
+        """每个命中分组中优先级最高的关键词"""
+        return OrderedDict((group, keywords[0]) for group, keywords in self.present(text).items())
+
+    def first(self, text: str) -> Optional[Tuple[str, str]]:
+        """按映射顺序第一个出现的 (分组, 关键词)，没有命中时返回None"""
+        for group, keywords in self.present(text).items():
+            return group, keywords[0]
+        return None
+
+    def contains_any(self, text: str) -> bool:
+        """文本中是否出现任意关键词"""
+        return bool(text) and self.regex is not None and self.regex.search(text) is not None
+
+    def group_of(self, keyword: str) -> Optional[str]:
+        """关键词所属的第一个分组（精确匹配）"""
+        owners = self._owners.get(keyword)
+        return owners[0][0] if owners else None
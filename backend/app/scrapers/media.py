@@ -5,7 +5,9 @@
 import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from .base import BaseScraper, ScraperFactory
+from .base import BaseScraper, ScraperFactory, PLATFORM_DEFAULTS
+from .matcher import KeywordMatcher
+from .figures import FigureScan, scan
 
 
 class MediaScraper(BaseScraper):
@@ -39,13 +41,15 @@ class MediaScraper(BaseScraper):
         '京东': ['京东金条', '京东白条', '京东数科', '京东科技'],
         '美团': ['美团借钱', '美团生活费', '美团']
     }
+    PLATFORM_MATCHER = KeywordMatcher(PLATFORM_KEYWORDS)
 
-    def __init__(self, source: str = '新浪财经'):
+    def __init__(self, source: str = '新浪财经', max_workers: Optional[int] = None):
         """
         初始化财经媒体爬虫
 
         Args:
             source: 媒体名称
+            max_workers: 并发抓取线程数
         """
         if source not in self.MEDIA_SOURCES:
             raise ValueError(f'不支持的媒体: {source}')
@@ -53,7 +57,8 @@ class MediaScraper(BaseScraper):
         config = self.MEDIA_SOURCES[source]
         super().__init__(
             name=f'MediaScraper_{source}',
-            base_url=config['base_url']
+            base_url=config['base_url'],
+            max_workers=max_workers
         )
         self.source = source
         self.search_path = config['search_path']
@@ -132,62 +137,44 @@ class MediaScraper(BaseScraper):
         if not response:
             return []
 
-        soup = self.parse_html(response.text)
         data = []
 
-        # 查找文章正文
-        article_body = soup.find('div', class_=re.compile(r'article|content|body'))
-        if not article_body:
+        # 查找文章正文，提取所有文本段落
+        paragraphs = self.container_paragraphs(response.text, r'article|content|body')
+        if paragraphs is None:
             return []
+        full_text = ' '.join(paragraphs)
 
-        # 提取所有文本段落
-        paragraphs = article_body.find_all('p')
-        full_text = ' '.join(self.extract_text(p) for p in paragraphs)
+        # 提取数据（一次扫描找出所有出现的平台关键词）
+        platforms = self.PLATFORM_MATCHER.present(full_text)
+        if not platforms:
+            return data
 
-        # 提取数据
-        for group, keywords in self.PLATFORM_KEYWORDS.items():
+        # 正文中的数字也只扫描一次，各平台关键词共用
+        figures = scan(full_text)
+        for group, keywords in platforms.items():
             for keyword in keywords:
-                if keyword in full_text:
-                    # 查找该平台相关的数据
-                    extracted = self._extract_platform_data(full_text, group, keyword, article_url, pub_date)
-                    if extracted:
-                        data.append(extracted)
+                # 查找该平台相关的数据
+                extracted = self._extract_platform_data(figures, group, keyword, article_url, pub_date)
+                if extracted:
+                    data.append(extracted)
 
         return data
 
     def _extract_platform_data(
         self,
-        text: str,
+        figures: FigureScan,
         group: str,
         keyword: str,
         source_url: str,
         pub_date: datetime
     ) -> Optional[Dict[str, Any]]:
-        """从文本中提取平台数据"""
+        """从文本的扫描结果中提取平台数据"""
+        text = figures.text
 
-        # 提取贷款余额
-        balance_patterns = [
-            rf'{keyword}[：:\s]*(?:贷款余额|余额|存量)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)',
-            r'(?:贷款余额|余额|存量)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元).*?{keyword}',
-        ]
-        loan_balance = None
-        for pattern in balance_patterns:
-            match = re.search(pattern, text)
-            if match:
-                loan_balance = self.clean_number(match.group(1))
-                break
-
-        # 提取发放规模
-        issued_patterns = [
-            rf'{keyword}[：:\s]*(?:发放|交易|放款)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)',
-            r'(?:发放|交易|放款)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元).*?{keyword}',
-        ]
-        loan_issued = None
-        for pattern in issued_patterns:
-            match = re.search(pattern, text)
-            if match:
-                loan_issued = self.clean_number(match.group(1))
-                break
+        # 紧跟在关键词后面或同一行中位于关键词之前的余额、发放规模（亿元）
+        loan_balance = figures.for_keyword('balance', keyword)
+        loan_issued = figures.for_keyword('issued', keyword)
 
         # 如果没有找到任何数据，返回None
         if not loan_balance and not loan_issued:
@@ -254,20 +241,19 @@ class MediaScraper(BaseScraper):
 
         self.logger.info(f'开始爬取{self.source}，关键词: {keywords}')
 
-        all_data = []
-
-        for keyword in keywords:
+        def search(keyword):
             self.logger.info(f'搜索关键词: {keyword}')
+            return self.search_articles(keyword, days)[:max_articles]
 
-            articles = self.search_articles(keyword, days)[:max_articles]
+        # 先并发搜索所有关键词，再并发解析全部文章（不同关键词搜到的同一篇文章只解析一次）
+        articles = {}
+        for article in self.map_concurrent(search, keywords, stage='list'):
+            articles.setdefault(article['url'], article)
 
-            for article in articles:
-                data = self.parse_article(article['url'], article['pub_date'])
-                all_data.extend(data)
-
-                # 添加延迟
-                import time
-                time.sleep(1)
+        all_data = self.map_concurrent(
+            lambda article: self.parse_article(article['url'], article['pub_date']),
+            articles.values()
+        )
 
         self.logger.info(f'爬取完成，共获取 {len(all_data)} 条数据')
         return all_data
@@ -276,22 +262,7 @@ class MediaScraper(BaseScraper):
         """保存数据到数据库"""
         from ..models import Platform
 
-        saved_count = 0
-        for item in data:
-            # 检查是否已存在
-            existing = db_session.query(Platform).filter_by(
-                name=item['name'],
-                report_month=item['report_month'],
-                platform_type=item.get('platform_type', '联合贷'),
-                loan_type=item.get('loan_type', '消费类')
-            ).first()
-
-            if not existing:
-                platform = Platform(**item)
-                db_session.add(platform)
-                saved_count += 1
-
-        return saved_count
+        return self.bulk_upsert(db_session, Platform, data, defaults=PLATFORM_DEFAULTS)
 
 
 # 注册爬虫
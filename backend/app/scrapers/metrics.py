@@ -0,0 +1,133 @@
+"""
+爬虫运行指标
+记录一次运行中各阶段的耗时、HTTP请求次数、重试次数、下载字节数和错误，
+由任务队列写入 scrape_runs 表，用于定位慢的数据源、对比优化前后的效果
+
+阶段：
+- list: 获取报告/文章/文件列表
+- download: 下载页面和附件（含限速等待和重试间隔）
+- parse: 解析页面、提取数据
+- save: 写入数据库
+
+抓取阶段由线程池并发执行，各阶段耗时为所有线程的累计耗时；
+阶段可以嵌套，外层阶段只计自身耗时（如解析过程中的下载计入 download 而非 parse）
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+STAGES = ('list', 'download', 'parse', 'save')
+
+# 每次运行最多保留的错误条数
+MAX_ERRORS = 50
+
+
+class RunMetrics:
+    """一次爬虫运行的指标（线程安全）"""
+
+    def __init__(self):
+        self.stage_seconds: Dict[str, float] = {stage: 0.0 for stage in STAGES}
+        self.requests = 0
+        self.retries = 0
+        self.failed_requests = 0
+        self.not_modified = 0
+        self.bytes_downloaded = 0
+        self.errors: List[Dict[str, Optional[str]]] = []
+        self.error_count = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def current_stage(self) -> Optional[str]:
+        """当前线程所在的阶段"""
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1][0] if stack else None
+
+    @contextmanager
+    def stage(self, name: Optional[str]):
+        """
+        计时一个阶段，进入嵌套阶段时暂停外层阶段的计时
+
+        Args:
+            name: 阶段名称，见 STAGES；为None时不计时
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        now = time.perf_counter()
+        if stack:
+            self._add_time(stack[-1][0], now - stack[-1][1])
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._add_time(name, now - stack.pop()[1])
+            if stack:
+                stack[-1][1] = now
+
+    @contextmanager
+    def paused(self):
+        """暂停当前线程所在阶段的计时（如等待线程池中的任务完成，避免与工作线程重复计时）"""
+        with self.stage(None):
+            yield
+
+    def _add_time(self, name: Optional[str], seconds: float):
+        if name is None:
+            return
+        with self._lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+    def record_request(self, attempt: int, response=None):
+        """
+        记录一次HTTP请求
+
+        Args:
+            attempt: 第几次尝试（从0开始，大于0即为重试）
+            response: 响应对象，请求异常时为None
+        """
+        with self._lock:
+            self.requests += 1
+            if attempt:
+                self.retries += 1
+            if response is not None:
+                if response.status_code == 304:
+                    self.not_modified += 1
+                self.bytes_downloaded += len(response.content or b'')
+
+    def record_failure(self, url: str, error: str):
+        """记录一次重试后仍失败的请求"""
+        with self._lock:
+            self.failed_requests += 1
+        self.record_error(error, url=url)
+
+    def record_error(self, error: str, url: Optional[str] = None, stage: Optional[str] = None):
+        """
+        记录错误，超过 MAX_ERRORS 条后只计数
+
+        Args:
+            error: 错误信息
+            url: 相关的URL
+            stage: 所在阶段，默认为当前线程的阶段
+        """
+        stage = stage or self.current_stage()
+        with self._lock:
+            self.error_count += 1
+            if len(self.errors) < MAX_ERRORS:
+                self.errors.append({'stage': stage, 'url': url, 'error': error[:500]})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        with self._lock:
+            return {
+                'stage_seconds': {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+                'requests': self.requests,
+                'retries': self.retries,
+                'failed_requests': self.failed_requests,
+                'not_modified': self.not_modified,
+                'bytes_downloaded': self.bytes_downloaded,
+                'error_count': self.error_count,
+                'errors': list(self.errors)
+            }
@@ -2,10 +2,18 @@
 官方监管数据爬虫
 从中国人民银行、银保监会等官方网站抓取监管数据
 """
+import hashlib
+import json
+import os
 import re
+import tempfile
+import threading
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from .base import BaseScraper, ScraperFactory
+from ..config import DATA_DIR
+from ..services.locks import file_lock
+from .base import BaseScraper, ScraperFactory, PLATFORM_DEFAULTS
+from .matcher import KeywordMatcher
 
 
 class OfficialScraper(BaseScraper):
@@ -25,12 +33,31 @@ class OfficialScraper(BaseScraper):
         }
     }
 
-    def __init__(self, source: str = '中国人民银行'):
+    # 平台关键词映射（集团 -> 关键词，按优先顺序）
+    PLATFORM_KEYWORDS = {
+        '蚂蚁': ['花呗', '借呗', '网商', '蚂蚁'],
+        '腾讯': ['微粒贷', '微众', '腾讯'],
+        '京东': ['京东', '白条', '金条'],
+        '美团': ['美团'],
+        '百度': ['度小满'],
+        '字节': ['抖音', '字节']
+    }
+    PLATFORM_MATCHER = KeywordMatcher(PLATFORM_KEYWORDS)
+
+    # 已入库工作表的指纹（文件URL -> {工作表名: 指纹}），多个任务进程共用，读改写在文件锁内进行
+    SHEET_STATE_FILE = DATA_DIR / 'official_sheets.json'
+    SHEET_STATE_LOCK_FILE = DATA_DIR / 'official_sheets.lock'
+    _sheet_state_lock = threading.Lock()
+
+    def __init__(self, source: str = '中国人民银行', max_workers: Optional[int] = None,
+                 incremental: bool = True):
         """
         初始化官方数据爬虫
 
         Args:
             source: 数据源名称
+            max_workers: 并发抓取线程数
+            incremental: 是否跳过上次已入库且内容未变化的工作表
         """
         if source not in self.OFFICIAL_SOURCES:
             raise ValueError(f'不支持的数据源: {source}')
@@ -38,11 +65,15 @@ class OfficialScraper(BaseScraper):
         config = self.OFFICIAL_SOURCES[source]
         super().__init__(
             name=f'OfficialScraper_{source}',
-            base_url=config['base_url']
+            base_url=config['base_url'],
+            max_workers=max_workers
         )
         self.source = source
         self.data_path = config['data_path']
         self.file_pattern = config['file_pattern']
+        self.incremental = incremental
+        self._sheet_state = self._load_sheet_state() if incremental else {}
+        self._pending_sheets: Dict[str, Dict[str, str]] = {}
 
     def get_data_files(self) -> List[Dict[str, str]]:
         """
@@ -56,17 +87,12 @@ class OfficialScraper(BaseScraper):
         if not response:
             return []
 
-        soup = self.parse_html(response.text)
         files = []
 
         # 查找所有Excel文件链接
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-
+        for href, title in self.page_links(response.text):
             # 检查是否匹配文件模式
             if re.search(self.file_pattern, href) or href.endswith('.xlsx') or href.endswith('.xls'):
-                title = self.extract_text(link)
-
                 # 补全URL
                 if not href.startswith('http'):
                     href = f'{self.base_url}{href}'
@@ -92,6 +118,8 @@ class OfficialScraper(BaseScraper):
         """
         解析Excel文件
 
+        增量模式下按工作表记录内容指纹，与上次成功入库时相同的工作表直接跳过
+
         Args:
             file_url: 文件URL
             file_title: 文件标题
@@ -102,70 +130,176 @@ class OfficialScraper(BaseScraper):
         self.logger.info(f'解析Excel文件: {file_title}')
 
         try:
-            import urllib.request
-            import ssl
             import pandas as pd
             import io
 
-            # 禁用SSL验证
-            ssl._create_default_https_context = ssl._create_unverified_context
-
-            # 下载文件
-            response = urllib.request.urlopen(file_url, timeout=60)
-            file_content = response.read()
+            # 下载文件（不校验SSL证书），文件未变化时跳过解析
+            download = self.download(file_url, verify=False)
+            if not download:
+                return []
+            if not download.changed:
+                self.logger.info(f'文件未变化，跳过解析: {file_title}')
+                return []
+            file_content = download.content
 
             # 使用pandas读取Excel
             excel_file = io.BytesIO(file_content)
             xls = pd.ExcelFile(excel_file)
 
+            known = self._sheet_state.get(file_url, {}) if self.incremental else {}
+            fingerprints = self._xlsx_sheet_fingerprints(file_content) if self.incremental else {}
+            sheet_state = {}
+            skipped = 0
+
             all_data = []
 
             # 遍历所有工作表
             for sheet_name in xls.sheet_names:
                 try:
+                    fingerprint = fingerprints.get(sheet_name)
+                    if fingerprint and known.get(sheet_name) == fingerprint:
+                        sheet_state[sheet_name] = fingerprint
+                        skipped += 1
+                        continue
+
                     df = pd.read_excel(xls, sheet_name=sheet_name)
+
+                    if self.incremental and fingerprint is None:
+                        # 非xlsx文件只能读出数据后再比较
+                        fingerprint = self._dataframe_fingerprint(df)
+                        if known.get(sheet_name) == fingerprint:
+                            sheet_state[sheet_name] = fingerprint
+                            skipped += 1
+                            continue
+
                     extracted = self._extract_dataframe_data(df, file_url, sheet_name)
                     all_data.extend(extracted)
+                    if fingerprint:
+                        sheet_state[sheet_name] = fingerprint
                 except Exception as e:
                     self.logger.warning(f'读取工作表失败 {sheet_name}: {str(e)}')
+                    self.metrics.record_error(f'读取工作表失败 {sheet_name}: {str(e)}', url=file_url)
                     continue
 
+            if self.incremental:
+                self._pending_sheets[file_url] = sheet_state
+                if skipped:
+                    self.logger.info(f'{file_title}: 跳过 {skipped} 个未变化的工作表')
+
             return all_data
 
         except Exception as e:
             self.logger.error(f'Excel解析失败: {str(e)}')
+            self.metrics.record_error(f'Excel解析失败: {str(e)}', url=file_url)
             return []
 
-    def _extract_dataframe_data(self, df, source_url: str, sheet_name: str) -> List[Dict[str, Any]]:
-        """从DataFrame中提取数据"""
-        data = []
+    @staticmethod
+    def _xlsx_sheet_fingerprints(content: bytes) -> Dict[str, str]:
+        """
+        直接从xlsx压缩包计算每个工作表的指纹，不需要解析单元格
 
-        # 查找包含平台数据的行
-        # 根据实际数据结构调整
-
-        # 示例：查找包含平台名称的行
-        platform_keywords = {
-            '蚂蚁': ['花呗', '借呗', '网商', '蚂蚁'],
-            '腾讯': ['微粒贷', '微众', '腾讯'],
-            '京东': ['京东', '白条', '金条'],
-            '美团': ['美团'],
-            '百度': ['度小满'],
-            '字节': ['抖音', '字节']
-        }
+        工作表引用共享字符串表，因此指纹同时包含工作表XML和共享字符串表的哈希；
+        不是xlsx或结构无法识别时返回空字典
+        """
+        import io
+        import zipfile
+        import xml.etree.ElementTree as ET
 
-        for index, row in df.iterrows():
-            # 将整行转换为字符串
-            row_text = ' '.join(str(v) for v in row.values)
-
-            # 检查是否包含平台关键词
-            for group, keywords in platform_keywords.items():
-                for keyword in keywords:
-                    if keyword in row_text:
-                        # 尝试提取数据
-                        extracted = self._extract_row_data(row, group, keyword, source_url, sheet_name)
-                        if extracted:
-                            data.append(extracted)
-                        break
+        main_ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        rel_ns = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as zf:
+                workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+                rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+                targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+
+                names = set(zf.namelist())
+                shared = hashlib.sha256(
+                    zf.read('xl/sharedStrings.xml') if 'xl/sharedStrings.xml' in names else b''
+                ).hexdigest()
+
+                fingerprints = {}
+                for sheet in workbook.iter(f'{main_ns}sheet'):
+                    target = targets.get(sheet.get(f'{rel_ns}id'))
+                    if not target:
+                        continue
+                    path = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+                    if path not in names:
+                        continue
+                    digest = hashlib.sha256(zf.read(path)).hexdigest()
+                    fingerprints[sheet.get('name')] = f'{digest}:{shared}'
+                return fingerprints
+        except (zipfile.BadZipFile, KeyError, ET.ParseError):
+            return {}
+
+    @staticmethod
+    def _dataframe_fingerprint(df) -> str:
+        """按单元格内容计算DataFrame的指纹"""
+        import pandas as pd
+
+        digest = hashlib.sha256()
+        digest.update('\x1f'.join(str(column) for column in df.columns).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(df.astype(str), index=True).values.tobytes())
+        return digest.hexdigest()
+
+    def _load_sheet_state(self) -> Dict[str, Dict[str, str]]:
+        """读取已入库工作表的指纹"""
+        try:
+            with open(self.SHEET_STATE_FILE, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def after_save(self):
+        """入库成功后保存工作表指纹"""
+        super().after_save()
+        if not self._pending_sheets:
+            return
+
+        with self._sheet_state_lock, file_lock(str(self.SHEET_STATE_LOCK_FILE)):
+            state = self._load_sheet_state()
+            state.update(self._pending_sheets)
+            descriptor, tmp_path = tempfile.mkstemp(prefix=f'.{self.SHEET_STATE_FILE.name}.', suffix='.tmp',
+                                                    dir=self.SHEET_STATE_FILE.parent)
+            try:
+                with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.replace(tmp_path, self.SHEET_STATE_FILE)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+        self._sheet_state = state
+        self._pending_sheets = {}
+
+    def _extract_dataframe_data(self, df, source_url: str, sheet_name: str) -> List[Dict[str, Any]]:
+        """
+        从DataFrame中提取数据
+
+        先把每行拼成文本列并向量化筛选，只对命中的行识别平台、提取数值
+        """
+        data = []
+        if df.empty:
+            return data
+
+        # 将整行转换为字符串（按列拼接）
+        columns = [df[column].map(str) for column in df.columns]
+        row_text = columns[0]
+        for column in columns[1:]:
+            row_text = row_text + ' ' + column
+
+        # 先用匹配器的组合正则按列向量化筛出包含任意关键词的行
+        hits = row_text.str.contains(self.PLATFORM_MATCHER.regex, regex=True).to_numpy()
+
+        # 命中的行再逐行找出每个集团优先级最高的关键词（按行，再按集团）
+        for position in hits.nonzero()[0]:
+            text = row_text.iat[position]
+            for group, keyword in self.PLATFORM_MATCHER.first_per_group(text).items():
+                extracted = self._extract_row_data(df.iloc[position], group, keyword, source_url, sheet_name)
+                if extracted:
+                    data.append(extracted)
 
         return data
 
@@ -235,18 +369,14 @@ class OfficialScraper(BaseScraper):
             爬取的数据列表
         """
         self.logger.info(f'开始爬取{self.source}官方数据')
+        self._pending_sheets = {}
 
         files = self.get_data_files()[:max_files]
-        all_data = []
-
-        for file_info in files:
+        def parse(file_info):
             self.logger.info(f'解析文件: {file_info["title"]}')
-            data = self.parse_excel_file(file_info['url'], file_info['title'])
-            all_data.extend(data)
+            return self.parse_excel_file(file_info['url'], file_info['title'])
 
-            # 添加延迟
-            import time
-            time.sleep(2)
+        all_data = self.map_concurrent(parse, files)
 
         self.logger.info(f'爬取完成，共获取 {len(all_data)} 条数据')
         return all_data
@@ -255,49 +385,31 @@ class OfficialScraper(BaseScraper):
         """保存数据到数据库"""
         from ..models import Platform, Bank
 
-        saved_count = 0
+        # 根据数据类型决定保存到哪个表
+        # 这里简单判断：如果是银行名则保存到银行表，否则保存到平台表
+        bank_keywords = ['银行', '招商银行', '兴业银行', '浦发银行', '民生银行', '平安银行']
 
+        banks = []
+        platforms = []
         for item in data:
-            # 根据数据类型决定保存到哪个表
-            # 这里简单判断：如果是银行名则保存到银行表，否则保存到平台表
-
-            # 检查是否是银行数据
-            bank_keywords = ['银行', '招商银行', '兴业银行', '浦发银行', '民生银行', '平安银行']
-            is_bank = any(kw in item['name'] for kw in bank_keywords)
-
-            if is_bank:
-                # 保存到银行表
-                existing = db_session.query(Bank).filter_by(
-                    name=item['name'],
-                    report_month=item['report_month']
-                ).first()
-
-                if not existing:
-                    # 转换数据格式
-                    bank_data = {
-                        'name': item['name'],
-                        'bank_type': '股份制',  # 默认
-                        'report_month': item['report_month'],
-                        'total_internet_loan': item['loan_balance'],
-                        'data_source': item['data_source'],
-                        'source_url': item['source_url']
-                    }
-                    bank = Bank(**bank_data)
-                    db_session.add(bank)
-                    saved_count += 1
+            if any(kw in item['name'] for kw in bank_keywords):
+                # 转换为银行表的数据格式
+                banks.append({
+                    'name': item['name'],
+                    'bank_type': '股份制',  # 默认
+                    'report_month': item['report_month'],
+                    'total_internet_loan': item['loan_balance'],
+                    'data_source': item['data_source'],
+                    'source_url': item['source_url']
+                })
             else:
-                # 保存到平台表
-                existing = db_session.query(Platform).filter_by(
-                    name=item['name'],
-                    report_month=item['report_month'],
-                    platform_type=item.get('platform_type', '联合贷'),
-                    loan_type=item.get('loan_type', '消费类')
-                ).first()
-
-                if not existing:
-                    platform = Platform(**item)
-                    db_session.add(platform)
-                    saved_count += 1
+                platforms.append(item)
+
+        saved_count = 0
+        if banks:
+            saved_count += self.bulk_upsert(db_session, Bank, banks)
+        if platforms:
+            saved_count += self.bulk_upsert(db_session, Platform, platforms, defaults=PLATFORM_DEFAULTS)
 
         return saved_count
 
@@ -0,0 +1,176 @@
+"""
+PDF文本提取
+把已下载的PDF（内容或流式下载的文件）分块写入临时文件，先用 pypdfium2 快速取出每页文本筛选出包含关键词的候选页，
+再在进程池中用 pdfplumber 精细提取候选页，按页码顺序逐页产出，几百页的年报不再阻塞调度线程
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+
+logger = logging.getLogger('scraper.pdf')
+
+# 每个任务提取的页数（每个任务都要在子进程中重新打开PDF，页数太少开销占比大）
+PAGES_PER_TASK = 8
+
+# 候选页不超过该数量时直接在当前进程提取，不值得启动进程池
+INLINE_PAGE_LIMIT = 8
+
+
+def default_workers() -> int:
+    """默认的页面提取进程数（环境变量 PDF_PAGE_WORKERS，否则为CPU核数-1，最多4个）"""
+    workers = os.environ.get('PDF_PAGE_WORKERS')
+    if workers:
+        return max(1, int(workers))
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+# 复制PDF文件时每次读写的字节数
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+@contextmanager
+def spooled_pdf(source: Union[bytes, BinaryIO]):
+    """
+    把PDF写入临时文件，子进程按路径打开，不需要在进程间传递整个文件
+
+    Args:
+        source: PDF内容，或可读的二进制文件（从开头分块复制，不整个读入内存）
+    """
+    with tempfile.TemporaryDirectory(prefix='scraper-pdf-') as directory:
+        path = os.path.join(directory, 'report.pdf')
+        with open(path, 'wb') as f:
+            if isinstance(source, bytes):
+                f.write(source)
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, f, COPY_CHUNK_SIZE)
+        yield path
+
+
+def candidate_pages(path: str, pattern: Optional[re.Pattern]) -> List[int]:
+    """
+    快速筛选可能包含数据的页
+
+    Args:
+        path: PDF文件路径
+        pattern: 关键词正则，为None时返回所有页
+
+    Returns:
+        候选页的序号（从0开始）；未安装 pypdfium2 时返回所有页
+    """
+    try:
+        import pypdfium2
+    except ImportError:
+        pypdfium2 = None
+
+    if pypdfium2 is None:
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return list(range(len(pdf.pages)))
+
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        if pattern is None:
+            return list(range(len(pdf)))
+
+        pages = []
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                if pattern.search(textpage.get_text_range()):
+                    pages.append(index)
+            finally:
+                textpage.close()
+                page.close()
+        return pages
+    finally:
+        pdf.close()
+
+
+def _extract_pages(path: str, indexes: List[int]) -> List[Tuple[int, str]]:
+    """用 pdfplumber 提取指定页的文本（在子进程中执行）"""
+    import pdfplumber
+
+    texts = []
+    with pdfplumber.open(path) as pdf:
+        for index in indexes:
+            page = pdf.pages[index]
+            texts.append((index, page.extract_text() or ''))
+            page.close()
+    return texts
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_page_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    获取进程内共享的页面提取进程池
+
+    使用 spawn 方式启动子进程，调用方可能运行在调度器或线程池的线程中，fork 多线程进程不安全
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=max_workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = max_workers
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_page_texts(source: Union[bytes, BinaryIO], pattern: Optional[re.Pattern] = None,
+                    max_workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    逐页产出PDF候选页的文本
+
+    Args:
+        source: PDF文件内容或可读的二进制文件
+        pattern: 关键词正则，只提取快速文本中能匹配的页
+        max_workers: 提取进程数，1为在当前进程顺序提取
+
+    Yields:
+        (页序号, 文本)，按页码顺序；某一页提取完成且之前的页都已产出时立即产出
+    """
+    max_workers = max_workers or default_workers()
+
+    with spooled_pdf(source) as path:
+        pages = candidate_pages(path, pattern)
+        logger.debug(f'PDF共筛选出 {len(pages)} 个候选页')
+        if not pages:
+            return
+
+        chunks = [pages[i:i + PAGES_PER_TASK] for i in range(0, len(pages), PAGES_PER_TASK)]
+        if max_workers <= 1 or len(pages) <= INLINE_PAGE_LIMIT:
+            for chunk in chunks:
+                yield from _extract_pages(path, chunk)
+            return
+
+        pool = get_page_pool(max_workers)
+        futures = [pool.submit(_extract_pages, path, chunk) for chunk in chunks]
+        try:
+            # 按提交顺序等待：前面的块完成就先产出，后面的块继续在子进程中提取
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,75 @@
+"""
+按主机限速
+用令牌桶控制对同一主机的请求频率，替代每次请求前的固定随机延迟，
+不同主机之间互不影响，可以并发抓取
+"""
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    令牌桶（线程安全）
+
+    每秒补充 rate 个令牌，最多积攒 burst 个；取不到令牌时预约下一个令牌并等待，
+    等待在锁外进行，多个线程排队时按预约顺序依次放行
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """取一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """阻塞直到取得令牌，返回实际等待的秒数"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """按主机名分配令牌桶"""
+
+    def __init__(self, rate: float = 1.0, burst: int = 2):
+        """
+        Args:
+            rate: 每个主机每秒允许的请求数
+            burst: 每个主机允许的突发请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """获取URL所属主机的令牌桶"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def acquire(self, url: str) -> float:
+        """等待直到可以请求该URL，返回等待的秒数"""
+        return self.bucket(url).acquire()
+
+
+# 进程内共享的限速器，同一主机的所有爬虫实例共用一个配额
+host_limiter = HostRateLimiter()
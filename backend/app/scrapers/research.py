@@ -2,10 +2,11 @@
 研究报告爬虫
 从艾瑞咨询、易观分析等研究机构抓取消费金融行业报告数据
 """
-import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from .base import BaseScraper, ScraperFactory
+from .base import BaseScraper, ScraperFactory, PLATFORM_DEFAULTS
+from .matcher import KeywordMatcher
+from .figures import scan, parse_cell_month
 
 
 class ResearchScraper(BaseScraper):
@@ -33,11 +34,22 @@ class ResearchScraper(BaseScraper):
         '经营类': ['经营', '小微', '企业', '网商', '微业']
     }
 
-    def __init__(self):
-        """初始化研究报告爬虫"""
+    # 预编译的关键词匹配器
+    PLATFORM_MATCHER = KeywordMatcher(PLATFORM_KEYWORDS)
+    PLATFORM_TYPE_MATCHER = KeywordMatcher(PLATFORM_TYPE_MAP)
+    LOAN_TYPE_MATCHER = KeywordMatcher(LOAN_TYPE_MAP)
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        初始化研究报告爬虫
+
+        Args:
+            max_workers: 并发抓取线程数
+        """
         super().__init__(
             name='ResearchScraper',
-            base_url='https://www.iresearch.com.cn'
+            base_url='https://www.iresearch.com.cn',
+            max_workers=max_workers
         )
 
     def search_reports(self, keyword: str = '消费金融') -> List[Dict[str, str]]:
@@ -92,16 +104,14 @@ class ResearchScraper(BaseScraper):
         if not response:
             return []
 
-        soup = self.parse_html(response.text)
+        blocks = self.html_blocks(response.text)
         data = []
 
         # 查找包含数据的段落或表格
         # 这里需要根据实际报告内容结构进行调整
 
         # 示例：查找包含平台名称和数字的段落
-        paragraphs = soup.find_all('p')
-        for p in paragraphs:
-            text = self.extract_text(p)
+        for text in blocks.paragraphs:
             if not text:
                 continue
 
@@ -111,9 +121,8 @@ class ResearchScraper(BaseScraper):
                 data.extend(extracted)
 
         # 示例：查找表格中的数据
-        tables = soup.find_all('table')
-        for table in tables:
-            extracted = self._extract_table_data(table, report_url)
+        for rows in blocks.tables:
+            extracted = self._extract_table_data(rows, report_url)
             if extracted:
                 data.extend(extracted)
 
@@ -132,67 +141,64 @@ class ResearchScraper(BaseScraper):
         """
         data = []
 
-        # 查找平台名称
-        for group, keywords in self.PLATFORM_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in text:
-                    # 提取贷款余额（亿元）
-                    balance_match = re.search(r'(?:贷款余额|余额)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)', text)
-                    # 提取发放规模（亿元）
-                    issued_match = re.search(r'(?:发放|交易|放款)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)', text)
-                    # 提取月份
-                    month_match = re.search(r'(20\d{2})\s*年\s*(\d{1,2})\s*月', text)
-
-                    if balance_match or issued_match:
-                        platform_data = {
-                            'name': keyword,
-                            'company_group': group,
-                            'report_month': self._parse_month(month_match) if month_match else None,
-                            'loan_balance': self.clean_number(balance_match.group(1)) if balance_match else None,
-                            'loan_issued': self.clean_number(issued_match.group(1)) if issued_match else None,
-                            'platform_type': self._determine_platform_type(text),
-                            'loan_type': self._determine_loan_type(text, group),
-                            'data_source': '研究报告',
-                            'source_url': source_url
-                        }
-                        data.append(platform_data)
-                        break
+        platforms = self.PLATFORM_MATCHER.first_per_group(text)
+        if not platforms:
+            return data
+
+        # 一次扫描提取贷款余额、发放规模（亿元）和月份，所有平台共用
+        figures = scan(text)
+        loan_balance = figures.first('balance')
+        loan_issued = figures.first('issued')
+        if loan_balance is None and loan_issued is None:
+            return data
+        report_month = figures.first_month()
+
+        # 查找平台名称（每个集团取优先级最高的关键词）
+        platform_type = self._determine_platform_type(text)
+        for group, keyword in platforms.items():
+            platform_data = {
+                'name': keyword,
+                'company_group': group,
+                'report_month': report_month,
+                'loan_balance': loan_balance,
+                'loan_issued': loan_issued,
+                'platform_type': platform_type,
+                'loan_type': self._determine_loan_type(text, group),
+                'data_source': '研究报告',
+                'source_url': source_url
+            }
+            data.append(platform_data)
 
         return data
 
-    def _extract_table_data(self, table, source_url: str) -> List[Dict[str, Any]]:
+    def _extract_table_data(self, rows: List[List[str]], source_url: str) -> List[Dict[str, Any]]:
         """
         从表格中提取数据
 
         Args:
-            table: BeautifulSoup表格元素
+            rows: 表格行，每行为单元格文本
             source_url: 来源URL
 
         Returns:
             提取的数据列表
         """
         data = []
-        rows = table.find_all('tr')
 
         if not rows:
             return data
 
         # 获取表头
-        headers = []
-        header_row = rows[0]
-        for th in header_row.find_all(['th', 'td']):
-            headers.append(self.extract_text(th))
+        headers = rows[0]
 
         # 解析数据行
-        for row in rows[1:]:
-            cells = row.find_all(['td', 'th'])
+        for cells in rows[1:]:
             if len(cells) < 2:
                 continue
 
             row_data = {}
             for i, cell in enumerate(cells):
                 if i < len(headers):
-                    row_data[headers[i]] = self.extract_text(cell)
+                    row_data[headers[i]] = cell
 
             # 尝试识别平台名称
             platform_name = self._identify_platform(row_data)
@@ -220,54 +226,39 @@ class ResearchScraper(BaseScraper):
     def _identify_platform(self, row_data: Dict[str, str]) -> Optional[str]:
         """从行数据中识别平台名称"""
         for value in row_data.values():
-            for group, keywords in self.PLATFORM_KEYWORDS.items():
-                for keyword in keywords:
-                    if keyword in value:
-                        return keyword
+            hit = self.PLATFORM_MATCHER.first(value)
+            if hit:
+                return hit[1]
         return None
 
     def _identify_company_group(self, platform_name: str) -> Optional[str]:
         """根据平台名称识别所属集团"""
-        for group, keywords in self.PLATFORM_KEYWORDS.items():
-            if platform_name in keywords:
-                return group
-        return None
+        return self.PLATFORM_MATCHER.group_of(platform_name)
 
     def _determine_platform_type(self, text: str) -> str:
         """判断产品类型"""
-        for ptype, keywords in self.PLATFORM_TYPE_MAP.items():
-            for kw in keywords:
-                if kw in text:
-                    return ptype
+        hit = self.PLATFORM_TYPE_MATCHER.first(text)
+        if hit:
+            return hit[0]
         return '联合贷'  # 默认
 
     def _determine_loan_type(self, text: str, group: str) -> str:
         """判断贷款用途"""
-        for ltype, keywords in self.LOAN_TYPE_MAP.items():
-            for kw in keywords:
-                if kw in text:
-                    return ltype
+        hit = self.LOAN_TYPE_MATCHER.first(text)
+        if hit:
+            return hit[0]
         # 根据集团判断
         if group == '蚂蚁' and '网商' in text:
             return '经营类'
         return '消费类'  # 默认
 
-    def _parse_month(self, month_match) -> Optional[datetime]:
-        """解析月份"""
-        try:
-            year = int(month_match.group(1))
-            month = int(month_match.group(2))
-            return datetime(year, month, 1)
-        except (ValueError, AttributeError):
-            return None
-
     def _extract_month_from_row(self, row_data: Dict[str, str]) -> Optional[datetime]:
         """从行数据中提取月份"""
         for key, value in row_data.items():
             if '月' in key or '时间' in key or '日期' in key:
-                month_match = re.search(r'(20\d{2})\s*[-/年]\s*(\d{1,2})', value)
-                if month_match:
-                    return self._parse_month(month_match)
+                month = parse_cell_month(value)
+                if month:
+                    return month
         return None
 
     def _extract_balance_from_row(self, row_data: Dict[str, str]) -> Optional[float]:
@@ -301,15 +292,11 @@ class ResearchScraper(BaseScraper):
         reports = self.search_reports(search_keyword)
         reports = reports[:max_reports]
 
-        all_data = []
-        for report in reports:
+        def parse(report):
             self.logger.info(f'解析报告: {report["title"]}')
-            data = self.parse_report_data(report['url'])
-            all_data.extend(data)
+            return self.parse_report_data(report['url'])
 
-            # 添加延迟，避免请求过快
-            import time
-            time.sleep(2)
+        all_data = self.map_concurrent(parse, reports)
 
         self.logger.info(f'爬取完成，共获取 {len(all_data)} 条数据')
         return all_data
@@ -327,22 +314,7 @@ class ResearchScraper(BaseScraper):
         """
         from ..models import Platform
 
-        saved_count = 0
-        for item in data:
-            # 检查是否已存在
-            existing = db_session.query(Platform).filter_by(
-                name=item['name'],
-                report_month=item['report_month'],
-                platform_type=item.get('platform_type', '联合贷'),
-                loan_type=item.get('loan_type', '消费类')
-            ).first()
-
-            if not existing:
-                platform = Platform(**item)
-                db_session.add(platform)
-                saved_count += 1
-
-        return saved_count
+        return self.bulk_upsert(db_session, Platform, data, defaults=PLATFORM_DEFAULTS)
 
 
 # 注册爬虫
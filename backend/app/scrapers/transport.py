@@ -0,0 +1,280 @@
+"""
+HTTP传输层
+爬虫的所有下载都经过这里，便于复用连接池并切换同步/异步实现
+
+- RequestsTransport: 基于 requests.Session 的同步实现，带连接池
+- AsyncHttpTransport: 基于 httpx.AsyncClient 的异步实现，在后台事件循环中运行，
+  支持长连接、按主机限制连接数和HTTP/2（需安装 h2），同步代码和线程池也可以直接调用
+"""
+import asyncio
+import atexit
+import logging
+import threading
+from typing import Any, BinaryIO, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger('scraper.transport')
+
+# 流式下载时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class HttpResponse:
+    """与具体HTTP库无关的响应对象（响应头名称统一为小写）"""
+
+    def __init__(self, status_code: int, url: str, headers: Dict[str, str], content: bytes, text: str):
+        self.status_code = status_code
+        self.url = url
+        self.headers = {name.lower(): value for name, value in headers.items()}
+        self.content = content
+        self.text = text
+
+    def __repr__(self):
+        return f'<HttpResponse {self.status_code} {self.url}>'
+
+
+class HttpTransport:
+    """传输层接口"""
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: float = 30, sink: Optional[BinaryIO] = None, **kwargs) -> HttpResponse:
+        """
+        发送请求
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            headers: 请求头
+            timeout: 超时秒数
+            sink: 可写的二进制文件；指定时状态码200的响应体边接收边写入该文件，
+                  返回的 content / text 为空，大文件不需要整个放在内存中
+            **kwargs: params / data / json / verify 等参数
+
+        Returns:
+            HttpResponse对象，网络错误时抛出异常
+        """
+        raise NotImplementedError
+
+    def fetch_many(self, urls: List[str], **kwargs) -> List[Optional[HttpResponse]]:
+        """批量GET，失败的URL对应None"""
+        responses = []
+        for url in urls:
+            try:
+                responses.append(self.request('GET', url, **kwargs))
+            except Exception as e:
+                logger.warning(f'请求失败 {url}: {str(e)}')
+                responses.append(None)
+        return responses
+
+    def close(self):
+        """关闭连接"""
+
+
+class RequestsTransport(HttpTransport):
+    """基于 requests.Session 的同步传输"""
+
+    def __init__(self, pool_connections: int = 20, per_host_connections: int = 6):
+        """
+        Args:
+            pool_connections: 缓存连接池的主机数
+            per_host_connections: 每个主机的最大连接数
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=per_host_connections,
+                              pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: float = 30, sink: Optional[BinaryIO] = None, **kwargs) -> HttpResponse:
+        if sink is None:
+            response = self.session.request(method=method, url=url, headers=headers, timeout=timeout, **kwargs)
+            return HttpResponse(response.status_code, response.url, dict(response.headers),
+                                response.content, response.text)
+
+        with self.session.request(method=method, url=url, headers=headers, timeout=timeout,
+                                  stream=True, **kwargs) as response:
+            if response.status_code == 200:
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    sink.write(chunk)
+            return HttpResponse(response.status_code, response.url, dict(response.headers), b'', '')
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpTransport(HttpTransport):
+    """
+    基于 httpx.AsyncClient 的异步传输
+
+    在独立线程中运行一个事件循环，同步调用通过 run_coroutine_threadsafe 提交到该循环，
+    因此线程池中的多个抓取任务共享同一组长连接；异步代码可以直接 await fetch()
+    """
+
+    def __init__(self, max_connections: int = 100, per_host_connections: int = 6,
+                 http2: bool = True):
+        """
+        Args:
+            max_connections: 总连接数上限
+            per_host_connections: 每个主机同时进行的请求数上限
+            http2: 是否启用HTTP/2（未安装 h2 时自动降级为HTTP/1.1）
+        """
+        import httpx  # noqa: F401  未安装时在创建时报错，由 create_transport 降级
+
+        self.max_connections = max_connections
+        self.per_host_connections = per_host_connections
+        self.http2 = http2 and _h2_available()
+        self._clients = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """懒启动后台事件循环"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name='scraper-transport', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _client(self, verify: bool):
+        """按是否校验证书取客户端（只在事件循环线程中调用）"""
+        import httpx
+
+        client = self._clients.get(verify)
+        if client is None:
+            client = self._clients[verify] = httpx.AsyncClient(
+                http2=self.http2,
+                verify=verify,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+        return client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """按主机的并发上限（只在事件循环线程中调用）"""
+        host = urlparse(url).netloc.lower()
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.per_host_connections)
+        return semaphore
+
+    async def fetch(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                    timeout: float = 30, verify: bool = True, sink: Optional[BinaryIO] = None,
+                    **kwargs) -> HttpResponse:
+        """异步发送请求（必须在本传输的事件循环中执行）"""
+        async with self._host_limit(url):
+            if sink is None:
+                response = await self._client(verify).request(method, url, headers=headers,
+                                                              timeout=timeout, **kwargs)
+                return HttpResponse(response.status_code, str(response.url), dict(response.headers),
+                                    response.content, response.text)
+
+            # 响应体分块写入 sink（通常是 SpooledTemporaryFile，小文件只写内存）
+            async with self._client(verify).stream(method, url, headers=headers,
+                                                   timeout=timeout, **kwargs) as response:
+                if response.status_code == 200:
+                    async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                        sink.write(chunk)
+                return HttpResponse(response.status_code, str(response.url), dict(response.headers), b'', '')
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                timeout: float = 30, sink: Optional[BinaryIO] = None, **kwargs) -> HttpResponse:
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self.fetch(method, url, headers=headers, timeout=timeout, sink=sink, **kwargs), loop
+        )
+        return future.result()
+
+    def fetch_many(self, urls: List[str], **kwargs) -> List[Optional[HttpResponse]]:
+        """并发GET多个URL，同时在途的请求数只受连接数上限约束"""
+        async def gather():
+            results = await asyncio.gather(
+                *(self.fetch('GET', url, **kwargs) for url in urls), return_exceptions=True
+            )
+            responses = []
+            for url, result in zip(urls, results):
+                if isinstance(result, Exception):
+                    logger.warning(f'请求失败 {url}: {str(result)}')
+                    result = None
+                responses.append(result)
+            return responses
+
+        return asyncio.run_coroutine_threadsafe(gather(), self._ensure_loop()).result()
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def shutdown():
+            for client in self._clients.values():
+                await client.aclose()
+            self._clients.clear()
+            self._host_limits.clear()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+_transports: Dict[str, HttpTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def create_transport(backend: str = 'async', **options: Any) -> HttpTransport:
+    """
+    创建传输层
+
+    Args:
+        backend: 'async'（httpx）或 'requests'；未安装httpx时 'async' 降级为 'requests'
+        **options: 传给具体实现的参数
+
+    Returns:
+        HttpTransport实例
+    """
+    if backend == 'async':
+        try:
+            return AsyncHttpTransport(**options)
+        except ImportError:
+            logger.warning('未安装httpx，使用requests同步传输')
+            backend = 'requests'
+    if backend == 'requests':
+        return RequestsTransport(**options)
+    raise ValueError(f'不支持的传输方式: {backend}')
+
+
+def get_transport(backend: str = 'async') -> HttpTransport:
+    """获取进程内共享的传输层，同一进程的所有爬虫复用连接池"""
+    with _transports_lock:
+        transport = _transports.get(backend)
+        if transport is None:
+            transport = _transports[backend] = create_transport(backend)
+        return transport
+
+
+@atexit.register
+def _close_transports():
+    for transport in _transports.values():
+        try:
+            transport.close()
+        except Exception:
+            pass
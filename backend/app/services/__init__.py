@@ -2,5 +2,6 @@
 服务模块初始化
 """
 from .scheduler import scheduler, ScraperScheduler
+from .jobqueue import JobWorkerPool
 
-__all__ = ['scheduler', 'ScraperScheduler']
+__all__ = ['scheduler', 'ScraperScheduler', 'JobWorkerPool']
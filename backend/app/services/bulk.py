@@ -0,0 +1,340 @@
+"""
+批量写入服务
+按模型的自然键（NATURAL_KEY）批量插入或更新数据，供爬虫保存数据和批量导入共用
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Date, Float, Integer, insert, update, select
+from sqlalchemy.dialects import postgresql, sqlite
+from ..models.platform import key_sentinel, natural_key_expressions
+from .cache import bump_data_version
+from .rollup import mark_rollup_months
+
+
+# 不参与比较和更新的字段
+_SYSTEM_FIELDS = ('id', 'created_at', 'updated_at')
+
+
+def _normalize(model, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    只保留模型字段，Date字段统一为date类型，NaN/NaT（pandas、Excel读出的空值）统一为None，
+    保证与数据库读出的值可比较
+    """
+    columns = model.__table__.columns
+    normalized = {}
+    for field, value in record.items():
+        if field not in columns or field in _SYSTEM_FIELDS:
+            continue
+        if value is not None and value != value:
+            value = None
+        elif isinstance(value, datetime) and isinstance(columns[field].type, Date):
+            value = value.date()
+        normalized[field] = value
+    return normalized
+
+
+def natural_key(model, record: Dict[str, Any]) -> tuple:
+    """
+    记录的自然键（可为空的字段为NULL时换成唯一索引中的替代值）
+
+    与唯一索引的 COALESCE 规则一致：产品类别为 NULL 和为空字符串的记录视为同一条
+    """
+    columns = model.__table__.c
+    key = []
+    for field in model.NATURAL_KEY:
+        value = record.get(field)
+        key.append(key_sentinel(columns[field]) if value is None else value)
+    return tuple(key)
+
+
+def dedupe_records(model, records: Iterable[Dict[str, Any]],
+                   defaults: Optional[Dict[str, Any]] = None) -> 'OrderedDict[tuple, Dict[str, Any]]':
+    """
+    批内按自然键去重
+
+    同一自然键出现多次时合并为一条，后出现的非空字段覆盖先出现的
+
+    Returns:
+        自然键 -> 合并后的记录
+    """
+    merged = OrderedDict()
+
+    for record in records:
+        # 先归一化（NaN变为None），空字段再用默认值补齐
+        values = {field: value for field, value in _normalize(model, record).items() if value is not None}
+        record = {**_normalize(model, defaults or {}), **values}
+        key = natural_key(model, record)
+        if key in merged:
+            merged[key].update(record)
+        else:
+            merged[key] = record
+
+    return merged
+
+
+def _load_existing(session, model, keys: List[tuple], chunk_size: int) -> Dict[tuple, Dict[str, Any]]:
+    """
+    用集合查询一次取出批次中已存在的记录
+
+    按名称和月份分块做 IN 查询（条件与自然键唯一索引的表达式相同，走该索引），
+    再在内存中按完整自然键（NULL换成替代值）匹配
+    """
+    table = model.__table__
+    columns = [column for column in table.columns if column.name not in ('created_at', 'updated_at')]
+
+    name_column, month_key = natural_key_expressions(model)[:2]
+    names = sorted({key[0] for key in keys if key[0] is not None})
+    months = sorted({key[1] for key in keys})
+
+    wanted = set(keys)
+    existing = {}
+    for start in range(0, len(names), chunk_size):
+        rows = session.execute(
+            select(*columns).where(
+                name_column.in_(names[start:start + chunk_size]),
+                month_key.in_(months)
+            )
+        ).mappings()
+        for row in rows:
+            key = natural_key(model, row)
+            if key in wanted:
+                existing[key] = dict(row)
+
+    return existing
+
+
+def _changes(record: Dict[str, Any], current: Dict[str, Any], key_fields) -> Dict[str, Any]:
+    """记录中与数据库现有值不同的非空字段（自然键字段除外）"""
+    return {
+        field: value for field, value in record.items()
+        if field not in key_fields and value is not None and current.get(field) != value
+    }
+
+
+def _insert_ignoring_conflicts(session, model):
+    """
+    自然键冲突时跳过的INSERT（SQLite / PostgreSQL 的 ON CONFLICT DO NOTHING），
+    用 RETURNING 返回实际插入的记录的自然键
+
+    其他数据库退回普通INSERT（不带 RETURNING），并发写入同一自然键时仍可能报 IntegrityError
+
+    Returns:
+        (INSERT语句, 是否带 RETURNING)
+    """
+    # 使用表级（Core）INSERT
+    table = model.__table__
+    dialect = session.get_bind(mapper=model).dialect
+    if dialect.name == 'sqlite':
+        statement = sqlite.insert(table).on_conflict_do_nothing()
+    elif dialect.name == 'postgresql':
+        statement = postgresql.insert(table).on_conflict_do_nothing()
+    else:
+        return insert(table), False
+    if not dialect.insert_executemany_returning:
+        # SQLite 3.35 之前不支持 RETURNING
+        return statement, False
+    return statement.returning(*(table.c[field] for field in model.NATURAL_KEY)), True
+
+
+def upsert_records(session, model, records: Iterable[Dict[str, Any]],
+                   defaults: Optional[Dict[str, Any]] = None,
+                   update_existing: bool = True,
+                   chunk_size: int = 500) -> Dict[str, int]:
+    """
+    按自然键批量插入或更新
+
+    1. 批内去重
+    2. 集合查询取出已有记录（每 chunk_size 个名称一次查询，而不是每条记录一次）
+    3. 新记录一次 executemany 插入；已有记录只更新发生变化的非空字段
+    4. 有新增或更新时递增该表的数据版本号，使统计缓存失效，并标记涉及的月份在提交前重算月度汇总
+
+    选择“先查后写”而不是 INSERT ... ON CONFLICT DO UPDATE，是为了在SQLite和PostgreSQL上
+    都能准确区分新增、更新和未变化的记录数。多个工作进程同时写入同一自然键时，
+    查询之后被其他进程抢先插入的记录由 ON CONFLICT DO NOTHING 跳过，RETURNING 只返回实际插入的自然键，
+    跳过的记录重新读取后按已有记录处理（有变化则更新，否则计为未变化），不会因唯一索引冲突丢掉整批数据
+
+    Args:
+        session: 数据库会话（不提交，由调用方决定事务边界）
+        model: 定义了 NATURAL_KEY 的模型类
+        records: 记录字典列表
+        defaults: 缺失字段的默认值
+        update_existing: 是否更新已存在的记录（False时已存在的记录计为未变化）
+        chunk_size: 查询已有记录时每批的名称数
+
+    Returns:
+        {'inserted': 新增数, 'updated': 更新数, 'unchanged': 未变化数}
+    """
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    merged = dedupe_records(model, records, defaults)
+    if not merged:
+        return stats
+
+    existing = _load_existing(session, model, list(merged.keys()), chunk_size)
+    key_fields = set(model.NATURAL_KEY)
+    now = datetime.now()
+
+    inserts = OrderedDict()
+    updates = []
+    changed_months = set()
+    for key, record in merged.items():
+        current = existing.get(key)
+        if current is None:
+            inserts[key] = record
+            changed_months.add(record.get('report_month'))
+            continue
+
+        changes = _changes(record, current, key_fields)
+        if update_existing and changes:
+            updates.append({'id': current['id'], **changes, 'updated_at': now})
+            changed_months.add(record.get('report_month'))
+        else:
+            stats['unchanged'] += 1
+
+    if inserts:
+        # executemany 要求每组参数的字段相同，按字段组合分批插入
+        statement, returning = _insert_ignoring_conflicts(session, model)
+        groups = OrderedDict()
+        for record in inserts.values():
+            groups.setdefault(tuple(record), []).append(record)
+
+        if returning:
+            inserted_keys = set()
+            for group in groups.values():
+                inserted_keys.update(natural_key(model, row) for row in session.execute(statement, group).mappings())
+        else:
+            inserted_keys = set(inserts)
+            for group in groups.values():
+                session.execute(statement, group)
+        stats['inserted'] = len(inserted_keys)
+
+        # 查询之后被其他进程抢先插入的自然键：读取其现有值，按已有记录处理（有变化则更新，否则计为未变化）
+        skipped = OrderedDict((key, record) for key, record in inserts.items() if key not in inserted_keys)
+        if skipped:
+            present = _load_existing(session, model, list(skipped), chunk_size)
+            for key, record in skipped.items():
+                current = present.get(key)
+                changes = _changes(record, current, key_fields) if current is not None else {}
+                if update_existing and changes:
+                    updates.append({'id': current['id'], **changes, 'updated_at': now})
+                else:
+                    stats['unchanged'] += 1
+    if updates:
+        session.execute(update(model), updates)
+        stats['updated'] = len(updates)
+    if stats['inserted'] or updates:
+        bump_data_version(session, model.__tablename__)
+        mark_rollup_months(session, model, changed_months)
+
+    return stats
+
+
+def parse_payload(model, data_list: List[Dict[str, Any]],
+                  max_errors: int = 20) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    按列向量化校验和解析批量导入的JSON数据
+
+    整列一次性转换（月份用 pd.to_datetime，数值用 pd.to_numeric），
+    而不是逐条调用 strptime / float
+
+    Args:
+        model: 模型类
+        data_list: 请求中的记录列表
+        max_errors: 最多返回的错误条数
+
+    Returns:
+        (解析后的记录列表, 错误列表)，错误项为 {'index': 行号, 'field': 字段, 'value': 原值}
+    """
+    import pandas as pd
+
+    if not data_list:
+        return [], []
+
+    columns = model.__table__.columns
+    fields = [column.name for column in columns if column.name not in _SYSTEM_FIELDS]
+    df = pd.DataFrame.from_records(data_list).reindex(columns=fields)
+
+    invalid = pd.Series(False, index=df.index)
+    errors = []
+
+    def _collect(field, mask):
+        nonlocal invalid
+        invalid |= mask
+        for index in mask[mask].index[:max(0, max_errors - len(errors))]:
+            errors.append({'index': int(index), 'field': field, 'value': data_list[index].get(field)})
+
+    for field in fields:
+        column_type = columns[field].type
+        raw = df[field]
+        present = raw.notna() & (raw.astype(str).str.strip() != '')
+
+        if isinstance(column_type, Date):
+            parsed = pd.to_datetime(raw.where(present), format='%Y-%m', errors='coerce')
+            _collect(field, present & parsed.isna())
+            df[field] = parsed.dt.date.astype(object).where(parsed.notna(), None)
+        elif isinstance(column_type, (Float, Integer)):
+            parsed = pd.to_numeric(raw.where(present), errors='coerce')
+            bad = present & parsed.isna()
+            if isinstance(column_type, Integer):
+                bad |= parsed.notna() & (parsed % 1 != 0)
+            _collect(field, bad)
+            if isinstance(column_type, Integer):
+                parsed = parsed.where(~bad).astype('Int64')
+            df[field] = parsed.astype(object).where(parsed.notna(), None)
+        else:
+            df[field] = raw.astype(object).where(present, None)
+
+    # 自然键的第一个字段（名称）必填
+    name_field = model.NATURAL_KEY[0]
+    _collect(name_field, df[name_field].isna())
+
+    if invalid.any():
+        return [], errors
+
+    return df.to_dict('records'), []
+
+
+def import_records(session, model, records: List[Dict[str, Any]],
+                   defaults: Optional[Dict[str, Any]] = None,
+                   update_existing: bool = False,
+                   chunk_size: int = 5000,
+                   progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, Any]:
+    """
+    分块批量导入，每块单独提交事务
+
+    大批量导入不会长时间持有一个大事务；某一块失败时只回滚该块，之前的块已提交
+
+    Args:
+        session: 数据库会话
+        model: 定义了 NATURAL_KEY 的模型类
+        records: 已解析的记录列表
+        defaults: 缺失字段的默认值
+        update_existing: 自然键已存在时是否更新（False时跳过，计为未变化）
+        chunk_size: 每块记录数
+        progress: 每块提交后的回调，参数为该块的统计
+
+    Returns:
+        {'inserted', 'updated', 'unchanged', 'chunks': 每块统计列表}
+    """
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'chunks': []}
+
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        try:
+            stats = upsert_records(session, model, chunk, defaults=defaults,
+                                   update_existing=update_existing)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        chunk_stats = {'offset': start, 'count': len(chunk), **stats}
+        for key, count in stats.items():
+            totals[key] += count
+        totals['chunks'].append(chunk_stats)
+
+        if progress:
+            progress(chunk_stats)
+
+    return totals
@@ -0,0 +1,298 @@
+"""
+响应缓存
+只读统计接口（平台/银行概览、管理后台统计）的结果按 接口 + 查询参数 + 数据版本 缓存：
+
+- 进程内LRU + TTL，命中时不查询业务表
+- 可选共享后端（Redis，配置 RESPONSE_CACHE_REDIS_URL），多个worker和实例共用一份结果
+- 写入 platforms/banks 的事务中同时递增 data_versions 表的版本号（bump_data_version），
+  版本变化后缓存键随之变化，旧结果不再命中，由LRU/TTL淘汰
+
+各进程每 DATA_VERSION_CHECK_INTERVAL 秒最多读取一次版本号，
+其他进程（调度进程中的爬虫、其他worker）写入后，最多延迟这么久才能看到新数据
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from flask import current_app, request
+from sqlalchemy import select, update
+
+from ..models import DataVersion
+
+
+logger = logging.getLogger('cache')
+
+
+def bump_data_version(session, *tables: str):
+    """
+    递增数据版本号（不提交，与数据写入在同一事务中生效）
+
+    Args:
+        session: 数据库会话
+        *tables: 写入的表名
+    """
+    now = datetime.now()
+    for name in tables:
+        result = session.execute(
+            update(DataVersion)
+            .where(DataVersion.name == name)
+            .values(version=DataVersion.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            session.add(DataVersion(name=name, version=1, updated_at=now))
+    # 本进程下次读取时立即刷新版本号
+    data_versions.expire()
+
+
+def ensure_data_versions(session, tables: Iterable[str]):
+    """创建缺失的版本号记录（启动时调用，避免并发写入时重复插入）"""
+    existing = set(session.execute(select(DataVersion.name)).scalars())
+    for name in tables:
+        if name not in existing:
+            session.add(DataVersion(name=name, version=0, updated_at=datetime.now()))
+    session.commit()
+
+
+class DataVersions:
+    """
+    进程内缓存的数据版本号和最后写入时间，每隔 interval 秒从数据库刷新一次
+
+    按会话实际读取的库（主库或只读副本）分别缓存：@read_replica 请求的版本号只来自副本，
+    与从副本读出的数据一致，副本延迟时不会把旧数据配上主库的新版本号（缓存键和ETag）
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, Dict[str, Tuple[int, Optional[datetime]]]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bind_key(session) -> str:
+        """读取版本号时使用的数据库（与 RoutingSession 的路由规则一致）"""
+        bind = session.get_bind(mapper=DataVersion.__mapper__, clause=select(DataVersion.version))
+        return str(getattr(bind, 'url', bind))
+
+    def _load(self, session, interval: float) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        bind_key = self._bind_key(session)
+        with self._lock:
+            checked_at = self._checked_at.get(bind_key)
+            fresh = checked_at is not None and time.monotonic() - checked_at < interval
+            rows = self._rows.get(bind_key, {})
+
+        if not fresh:
+            rows = {
+                name: (version, updated_at) for name, version, updated_at in session.execute(
+                    select(DataVersion.name, DataVersion.version, DataVersion.updated_at)
+                ).all()
+            }
+            with self._lock:
+                self._rows[bind_key] = rows
+                self._checked_at[bind_key] = time.monotonic()
+        return rows
+
+    def get(self, session, tables: Tuple[str, ...], interval: float) -> Tuple[int, ...]:
+        """
+        获取各表当前的版本号
+
+        Args:
+            session: 数据库会话
+            tables: 表名
+            interval: 两次读取数据库之间的最小间隔（秒）
+        """
+        rows = self._load(session, interval)
+        return tuple(rows.get(name, (0, None))[0] for name in tables)
+
+    def last_modified(self, session, tables: Tuple[str, ...], interval: float) -> Optional[datetime]:
+        """各表中最晚的写入时间（本地时间），都没有记录时返回None"""
+        rows = self._load(session, interval)
+        times = [rows[name][1] for name in tables if name in rows and rows[name][1] is not None]
+        return max(times) if times else None
+
+    def expire(self):
+        """使缓存的版本号失效（主库和副本）"""
+        with self._lock:
+            self._checked_at.clear()
+
+
+data_versions = DataVersions()
+
+
+class LocalCache:
+    """进程内LRU缓存，每个条目带过期时间"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Redis共享缓存（需安装 redis），连接失败时只记录日志，按未命中处理"""
+
+    KEY_PREFIX = 'response-cache:'
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._client.get(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f'读取共享缓存失败: {str(e)}')
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        try:
+            self._client.set(self.KEY_PREFIX + key, value, ex=max(1, int(ttl)))
+        except Exception as e:
+            logger.warning(f'写入共享缓存失败: {str(e)}')
+
+
+class ResponseCache:
+    """两级缓存：进程内LRU在前，可选的共享后端在后"""
+
+    def __init__(self):
+        self.ttl = 0.0
+        self.version_interval = 1.0
+        self.local = LocalCache()
+        self.shared: Optional[RedisCache] = None
+
+    def init_app(self, app):
+        """
+        按应用配置初始化
+
+        Args:
+            app: Flask应用实例
+        """
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', 300)
+        self.version_interval = app.config.get('DATA_VERSION_CHECK_INTERVAL', 1)
+        self.local = LocalCache(app.config.get('RESPONSE_CACHE_MAXSIZE', 256))
+        self.shared = None
+
+        redis_url = app.config.get('RESPONSE_CACHE_REDIS_URL')
+        if redis_url and self.enabled:
+            try:
+                self.shared = RedisCache(redis_url)
+            except ImportError:
+                app.logger.warning('未安装redis，响应缓存只使用进程内缓存')
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def key(self, session, name: str, tables: Tuple[str, ...]) -> str:
+        """缓存键：名称 + 涉及的表的当前版本号"""
+        versions = data_versions.get(session, tables, self.version_interval)
+        return f'{name}|' + ','.join(f'{table}:{version}' for table, version in zip(tables, versions))
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value, self.ttl)
+        return value
+
+    def set(self, key: str, value: bytes):
+        self.local.set(key, value, self.ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, self.ttl)
+
+    def clear(self):
+        """清空进程内缓存"""
+        self.local.clear()
+
+
+response_cache = ResponseCache()
+
+
+def cached_json(name: str, tables: Tuple[str, ...], compute: Callable[[], Any]) -> Any:
+    """
+    缓存可JSON序列化的计算结果（响应中只有一部分可以缓存时使用）
+
+    Args:
+        name: 缓存名称
+        tables: 计算读取的表名
+        compute: 未命中时调用的计算函数
+    """
+    if not response_cache.enabled:
+        return compute()
+
+    from .. import db
+
+    key = response_cache.key(db.session, name, tables)
+    body = response_cache.get(key)
+    if body is not None:
+        return json.loads(body)
+
+    value = compute()
+    response_cache.set(key, json.dumps(value, ensure_ascii=False).encode('utf-8'))
+    return value
+
+
+def cached_response(*tables: str):
+    """
+    缓存只读接口的JSON响应
+
+    缓存键包含路由、查询参数和各表的数据版本号；只缓存状态码200的响应，
+    响应头 X-Cache 标明是否命中
+
+    Args:
+        *tables: 接口读取的表名，任一表的数据版本变化后缓存失效
+    """
+    def decorator(view: Callable):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not response_cache.enabled:
+                return view(*args, **kwargs)
+
+            from .. import db
+
+            params = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+            key = response_cache.key(db.session, f'{request.endpoint}?{params}{kwargs or ""}', tables)
+
+            body = response_cache.get(key)
+            if body is not None:
+                response = current_app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                response_cache.set(key, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
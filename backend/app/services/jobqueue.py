@@ -0,0 +1,501 @@
+"""
+爬虫任务队列
+定时任务和手动触发只往 scrape_jobs 表写一条任务（立即返回），由独立的工作进程池按优先级领取执行；
+任务状态、进度和结果持久化在数据库中（本地使用SQLite即可），Web进程不再同步运行爬虫
+
+- enqueue: 入队，优先级默认取对应 DataSource.priority，同类任务已在排队或运行时不重复入队
+- claim_next: 工作进程原子地领取优先级最高的任务，每次领取的领取次数（attempt）作为本次执行的令牌
+- execute: 运行任务并持久化进度、心跳和结果，每次运行的分阶段指标写入 scrape_runs
+- JobWorkerPool: 管理若干个工作进程
+"""
+import json
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from ..models import DataSource, ScrapeJob, ScrapeRun
+from .locks import acquire_job_lock, release_job_lock, process_identity
+
+
+logger = logging.getLogger('jobqueue')
+
+# 任务类型 -> 爬虫配置（name 同时是 DataSource 中的数据源名称）
+SCRAPER_JOBS = OrderedDict([
+    ('research_scraper', {
+        'name': '研究报告爬虫',
+        'source_type': 'research',
+        'scraper': 'ResearchScraper',
+        'options': {},
+        'run': {'max_reports': 3}
+    }),
+    ('corporate_scraper', {
+        'name': '上市公司财报爬虫',
+        'source_type': 'corporate',
+        'scraper': 'CorporateScraper',
+        'options': {'company': '蚂蚁集团'},
+        'run': {'max_reports': 3}
+    }),
+    ('official_scraper', {
+        'name': '官方监管数据爬虫',
+        'source_type': 'official',
+        'scraper': 'OfficialScraper',
+        'options': {'source': '中国人民银行'},
+        'run': {'max_files': 5}
+    }),
+    ('media_scraper', {
+        'name': '财经媒体爬虫',
+        'source_type': 'media',
+        'scraper': 'MediaScraper',
+        'options': {'source': '新浪财经'},
+        'run': {'keywords': ['消费金融'], 'days': 3, 'max_articles': 10}
+    }),
+])
+
+# 进度写库的最小间隔（秒），阶段变化时立即写入
+PROGRESS_FLUSH_INTERVAL = 1.0
+# 运行中任务的心跳间隔（秒）
+HEARTBEAT_INTERVAL = 30
+
+
+def job_types() -> List[Dict[str, str]]:
+    """所有可入队的任务类型"""
+    return [{'job_type': job_type, 'name': spec['name']} for job_type, spec in SCRAPER_JOBS.items()]
+
+
+def source_priority(session, job_type: str) -> int:
+    """任务优先级：对应数据源的 DataSource.priority，未配置时为1"""
+    spec = SCRAPER_JOBS[job_type]
+    priority = session.execute(
+        select(DataSource.priority).where(DataSource.name == spec['name']).limit(1)
+    ).scalar()
+    return priority if priority is not None else 1
+
+
+def enqueue(session, job_type: str, params: Optional[Dict[str, Any]] = None,
+            priority: Optional[int] = None, trigger: str = 'manual') -> Tuple[ScrapeJob, bool]:
+    """
+    任务入队（不等待执行）
+
+    Args:
+        session: 数据库会话
+        job_type: 任务类型，见 SCRAPER_JOBS
+        params: 运行参数 {'options': 爬虫构造参数, 'run': 爬取参数}，覆盖默认配置
+        priority: 优先级，默认取数据源优先级
+        trigger: 触发方式（schedule/manual）
+
+    Returns:
+        (任务, 是否新建)；同类任务已在排队或运行时返回已有任务
+
+    Raises:
+        ValueError: 任务类型或参数无效
+    """
+    if job_type not in SCRAPER_JOBS:
+        raise ValueError(f'不支持的任务类型: {job_type}')
+    params = params or {}
+    if not isinstance(params, dict) or set(params) - {'options', 'run'}:
+        raise ValueError('params 只能包含 options 和 run')
+
+    existing = session.execute(
+        select(ScrapeJob)
+        .where(ScrapeJob.job_type == job_type, ScrapeJob.status.in_(ScrapeJob.ACTIVE_STATUSES))
+        .order_by(ScrapeJob.id)
+        .limit(1)
+    ).scalar()
+    if existing:
+        return existing, False
+
+    job = ScrapeJob(
+        job_type=job_type,
+        params=json.dumps(params, ensure_ascii=False) if params else None,
+        priority=priority if priority is not None else source_priority(session, job_type),
+        status=ScrapeJob.QUEUED,
+        progress=0,
+        trigger=trigger,
+        created_at=datetime.now()
+    )
+    session.add(job)
+    session.commit()
+    logger.info(f'任务入队: {job_type} (ID: {job.id}, 优先级: {job.priority})')
+    return job, True
+
+
+def cancel(session, job_id: int) -> ScrapeJob:
+    """
+    取消排队中的任务
+
+    Raises:
+        LookupError: 任务不存在
+        ValueError: 任务已开始或已结束
+    """
+    job = session.get(ScrapeJob, job_id)
+    if job is None:
+        raise LookupError(f'任务不存在: {job_id}')
+
+    result = session.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.id == job_id, ScrapeJob.status == ScrapeJob.QUEUED)
+        .values(status=ScrapeJob.CANCELLED, finished_at=datetime.now(), message='已取消')
+    )
+    session.commit()
+    if result.rowcount != 1:
+        session.refresh(job)
+        raise ValueError(f'任务状态为 {job.status}，只能取消排队中的任务')
+    session.refresh(job)
+    return job
+
+
+def claim_next(engine, worker: str) -> Optional[Tuple[int, int]]:
+    """
+    领取优先级最高的排队任务
+
+    先查出候选任务，再用带状态和领取次数条件的UPDATE抢占（领取次数加1）；被其他工作进程抢先时换下一个
+
+    Returns:
+        (任务ID, 本次领取的领取次数)，队列为空时返回None
+    """
+    attempt_column = func.coalesce(ScrapeJob.attempt, 0)
+    with Session(engine) as session:
+        while True:
+            candidate = session.execute(
+                select(ScrapeJob.id, attempt_column)
+                .where(ScrapeJob.status == ScrapeJob.QUEUED)
+                .order_by(ScrapeJob.priority, ScrapeJob.created_at, ScrapeJob.id)
+                .limit(1)
+            ).first()
+            if candidate is None:
+                return None
+
+            job_id, attempt = candidate
+            now = datetime.now()
+            result = session.execute(
+                update(ScrapeJob)
+                .where(ScrapeJob.id == job_id, ScrapeJob.status == ScrapeJob.QUEUED, attempt_column == attempt)
+                .values(status=ScrapeJob.RUNNING, worker=worker, attempt=attempt + 1, started_at=now,
+                        heartbeat_at=now, stage='start', message='已开始')
+            )
+            session.commit()
+            if result.rowcount == 1:
+                return job_id, attempt + 1
+
+
+def requeue_stale(engine, stale_seconds: int) -> int:
+    """
+    把心跳超时的运行中任务重新排队（工作进程崩溃或被强制结束）
+
+    Returns:
+        重新排队的任务数
+    """
+    deadline = datetime.now() - timedelta(seconds=stale_seconds)
+    with Session(engine) as session:
+        result = session.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.status == ScrapeJob.RUNNING, ScrapeJob.heartbeat_at < deadline)
+            .values(status=ScrapeJob.QUEUED, worker=None, progress=0, stage=None,
+                    message='工作进程中断，重新排队')
+        )
+        session.commit()
+    if result.rowcount:
+        logger.warning(f'{result.rowcount} 个任务心跳超时，已重新排队')
+    return result.rowcount
+
+
+def job_lock_owner(job_id: int, attempt: int) -> str:
+    """
+    任务锁的持有者标识
+
+    包含领取次数：任务重新排队后由其他工作进程领取时是新的持有者，只能在旧的锁过期后获取，
+    心跳写入失败、被误判为中断的旧执行仍在续期时，新的执行拿不到锁，不会同时运行同一个爬虫
+    """
+    return f'job:{job_id}:{attempt}'
+
+
+class _ProgressWriter:
+    """
+    把爬虫进度写回任务记录（按时间节流），并在后台线程中定时为任务锁续期、刷新心跳
+
+    所有写入都带领取次数条件：任务被重新领取后，旧的执行不会覆盖新执行的进度和状态
+    """
+
+    def __init__(self, engine, job_id: int, attempt: int, lock_name: Optional[str] = None, lock_ttl: int = 300):
+        self.engine = engine
+        self.job_id = job_id
+        self.attempt = attempt
+        self.lock_name = lock_name
+        self.lock_ttl = lock_ttl
+        self._stage = None
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, name=f'job-{job_id}-heartbeat', daemon=True)
+
+    def _write(self, **values) -> bool:
+        """写入本次领取的任务记录，返回False表示任务已被重新领取"""
+        return _update_attempt(self.engine, self.job_id, self.attempt, **values)
+
+    def __call__(self, stage: str, percent: float, message: str = ''):
+        with self._lock:
+            now = time.monotonic()
+            if stage == self._stage and now - self._flushed_at < PROGRESS_FLUSH_INTERVAL:
+                return
+            self._stage = stage
+            self._flushed_at = now
+        self._write(stage=stage, progress=min(100.0, max(0.0, percent)), message=message[:500],
+                    heartbeat_at=datetime.now())
+
+    def _heartbeat(self):
+        while not self._stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                # 先续期再写心跳：心跳超时（任务重新排队）时锁一定已经过期
+                if self.lock_name and not acquire_job_lock(
+                        self.engine, self.lock_name, self.lock_ttl, job_lock_owner(self.job_id, self.attempt)):
+                    logger.warning(f'任务 {self.job_id} 的任务锁已被其他执行接管')
+                if not self._write(heartbeat_at=datetime.now()):
+                    logger.warning(f'任务 {self.job_id} 已被重新领取（第 {self.attempt} 次领取已失效），停止心跳')
+                    return
+            except Exception as e:
+                logger.warning(f'任务 {self.job_id} 心跳写入失败: {str(e)}')
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+
+def _update_attempt(engine, job_id: int, attempt: int, **values) -> bool:
+    """更新任务记录（只在仍是第 attempt 次领取时生效），返回是否更新成功"""
+    with Session(engine) as session:
+        result = session.execute(
+            update(ScrapeJob).where(ScrapeJob.id == job_id, ScrapeJob.attempt == attempt).values(**values)
+        )
+        session.commit()
+    return result.rowcount == 1
+
+
+def update_data_source_status(session, job_type: str, result: Dict[str, Any]):
+    """
+    更新数据源状态
+
+    Args:
+        session: 数据库会话
+        job_type: 任务类型
+        result: 爬取结果
+    """
+    spec = SCRAPER_JOBS[job_type]
+    try:
+        data_source = session.query(DataSource).filter_by(name=spec['name']).first()
+
+        if not data_source:
+            # 创建新数据源记录
+            data_source = DataSource(
+                name=spec['name'],
+                source_type=spec['source_type'],
+                update_frequency='weekly',
+                is_active=1,
+                priority=1
+            )
+            session.add(data_source)
+
+        # 更新状态
+        data_source.last_scrape_at = datetime.now()
+        data_source.scrape_status = result.get('status', 'unknown')
+
+        session.commit()
+
+    except Exception as e:
+        session.rollback()
+        logger.error(f'更新数据源状态失败: {str(e)}')
+
+
+def record_run(session, job_type: str, result: Dict[str, Any], job_id: Optional[int] = None,
+               trigger: Optional[str] = None):
+    """
+    保存一次爬虫运行的记录（写入失败只记录日志，不影响任务结果）
+
+    Args:
+        session: 数据库会话
+        job_type: 任务类型
+        result: BaseScraper.run 的返回结果
+        job_id: 所属任务ID
+        trigger: 触发方式
+    """
+    try:
+        session.add(ScrapeRun.from_result(job_type, result, job_id=job_id, trigger=trigger))
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f'保存运行记录失败: {str(e)}')
+
+
+def execute(app, job_id: int, worker: str, attempt: int):
+    """
+    运行一个已领取的任务
+
+    同类任务在其他实例上运行时（任务锁被占用）直接结束为 cancelled。
+    任务锁的有效期为 JOB_STALE_SECONDS，运行期间随心跳续期；工作进程崩溃后锁在心跳超时前过期，
+    重新排队的任务被再次领取时可以获取。进度和结果只写入本次领取（attempt）的任务记录
+
+    Args:
+        app: Flask应用实例
+        job_id: 任务ID
+        worker: 工作进程标识
+        attempt: claim_next 返回的领取次数
+    """
+    from .. import db
+    from ..scrapers import ScraperFactory
+
+    with app.app_context():
+        engine = db.engine
+        job = db.session.get(ScrapeJob, job_id)
+        job_type = job.job_type
+        trigger = job.trigger
+        spec = SCRAPER_JOBS.get(job_type)
+        params = json.loads(job.params) if job.params else {}
+        db.session.close()
+
+        def finish(status: str, **values):
+            if not _update_attempt(engine, job_id, attempt, status=status, finished_at=datetime.now(), **values):
+                logger.warning(f'[任务 {job_id}] 已被重新领取，第 {attempt} 次执行的结果 {status} 不再写入任务记录')
+
+        if spec is None:
+            finish(ScrapeJob.FAILED, error=f'不支持的任务类型: {job_type}')
+            return
+
+        owner = job_lock_owner(job_id, attempt)
+        ttl = app.config.get('JOB_STALE_SECONDS', 300)
+        if not acquire_job_lock(engine, job_type, ttl, owner):
+            finish(ScrapeJob.CANCELLED, message='同类任务正在其他实例中运行')
+            return
+        # 心跳不早于锁的获取时间，心跳超时重新排队时锁已过期
+        _update_attempt(engine, job_id, attempt, heartbeat_at=datetime.now())
+
+        logger.info(f'[任务 {job_id}] 开始执行{spec["name"]}')
+        try:
+            options = {**spec['options'], **params.get('options', {})}
+            run_kwargs = {**spec['run'], **params.get('run', {})}
+            scraper = ScraperFactory.create(spec['scraper'], **options)
+
+            with _ProgressWriter(engine, job_id, attempt, job_type, ttl) as progress:
+                scraper.progress_callback = progress
+                result = scraper.run(db.session, **run_kwargs)
+
+            record_run(db.session, job_type, result, job_id=job_id, trigger=trigger)
+            update_data_source_status(db.session, job_type, result)
+
+            values = {'stage': 'done', 'result': json.dumps(result, ensure_ascii=False, default=str),
+                      'error': result.get('error')}
+            if result.get('status') == 'success':
+                finish(ScrapeJob.SUCCESS, progress=100, **values)
+            else:
+                finish(ScrapeJob.FAILED, **values)
+            logger.info(f'[任务 {job_id}] {spec["name"]}完成: {result}')
+        except Exception as e:
+            db.session.rollback()
+            finish(ScrapeJob.FAILED, error=f'{str(e)}\n{traceback.format_exc()}')
+            logger.error(f'[任务 {job_id}] {spec["name"]}失败: {str(e)}\n{traceback.format_exc()}')
+        finally:
+            db.session.remove()
+            release_job_lock(engine, job_type, owner)
+
+
+def run_worker(app, worker: str, stop_event, poll_interval: float = 5, stale_seconds: int = 300):
+    """
+    工作进程主循环：领取并执行任务，队列为空时等待 poll_interval 秒
+
+    Args:
+        app: Flask应用实例
+        worker: 工作进程标识
+        stop_event: 停止信号（threading.Event 或 multiprocessing.Event）
+        poll_interval: 空闲时轮询间隔
+        stale_seconds: 心跳超时秒数
+    """
+    from .. import db
+
+    with app.app_context():
+        engine = db.engine
+
+    logger.info(f'工作进程已启动: {worker}')
+    while not stop_event.is_set():
+        try:
+            claimed = claim_next(engine, worker)
+            if claimed is None:
+                requeue_stale(engine, stale_seconds)
+                stop_event.wait(poll_interval)
+                continue
+            job_id, attempt = claimed
+            execute(app, job_id, worker, attempt)
+        except Exception as e:
+            logger.error(f'工作进程 {worker} 出错: {str(e)}\n{traceback.format_exc()}')
+            stop_event.wait(poll_interval)
+    logger.info(f'工作进程已停止: {worker}')
+
+
+def _worker_main(config_name: str, index: int, stop_event):
+    """工作进程入口（spawn方式启动，在子进程中重新创建应用）"""
+    # Ctrl+C 由父进程统一处理，子进程等待停止信号后在任务间隙退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from .. import create_app
+
+    app = create_app(config_name)
+    logging.basicConfig(level=app.config['LOG_LEVEL'], format=app.config['LOG_FORMAT'],
+                        datefmt=app.config['LOG_DATE_FORMAT'])
+    run_worker(app, f'{process_identity()}#{index}', stop_event,
+               app.config.get('JOB_POLL_INTERVAL', 5), app.config.get('JOB_STALE_SECONDS', 300))
+
+
+class JobWorkerPool:
+    """
+    任务工作进程池
+
+    每个工作进程各自轮询队列，爬虫的CPU和内存开销与Web进程、调度进程隔离
+    """
+
+    def __init__(self, config_name: str, workers: int = 2, shutdown_timeout: float = 60):
+        """
+        Args:
+            config_name: 子进程创建应用时使用的配置名称
+            workers: 工作进程数
+            shutdown_timeout: 停止时等待当前任务结束的秒数，超时后强制结束（任务会在心跳超时后重新排队）
+        """
+        self.config_name = config_name
+        self.workers = max(1, workers)
+        self.shutdown_timeout = shutdown_timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._stop_event = self._context.Event()
+        self._processes = []
+
+    def start(self):
+        """启动工作进程"""
+        if self._processes:
+            return
+        self._stop_event.clear()
+        for index in range(self.workers):
+            process = self._context.Process(target=_worker_main, name=f'scrape-worker-{index}',
+                                            args=(self.config_name, index, self._stop_event), daemon=True)
+            process.start()
+            self._processes.append(process)
+        logger.info(f'已启动 {self.workers} 个任务工作进程')
+
+    def stop(self):
+        """通知工作进程在当前任务结束后退出，超时则强制结束"""
+        self._stop_event.set()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f'{process.name} 未在 {self.shutdown_timeout} 秒内退出，强制结束')
+                process.terminate()
+                process.join()
+        self._processes = []
@@ -0,0 +1,173 @@
+"""
+进程锁与任务锁
+- LeaderLock: 基于文件锁的选主，同一台机器上只有一个进程能持有，进程退出时由操作系统自动释放
+- file_lock: 同一台机器上多个进程互斥执行一段代码（如发布数据快照）
+- acquire_job_lock / release_job_lock: 基于 job_locks 表的分布式任务锁（带过期时间），
+  多个实例共享数据库时同一任务同时只运行一次
+"""
+import os
+import socket
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.lock import JobLock
+
+
+def process_identity() -> str:
+    """当前进程的标识（主机名:进程号）"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class LeaderLock:
+    """
+    文件锁选主
+
+    非阻塞地对锁文件加排他锁，拿到锁的进程即为主进程；
+    锁与打开的文件描述符绑定，进程崩溃或退出后其他进程可以立即接管
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 锁文件路径
+        """
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        """当前进程是否持有锁"""
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """尝试获取锁，已被其他进程持有时立即返回False"""
+        if self._file is not None:
+            return True
+
+        lock_file = open(self.path, 'a+')
+        try:
+            _lock_file(lock_file)
+        except OSError:
+            lock_file.close()
+            return False
+
+        # 记录持有者，便于排查
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(process_identity())
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        """释放锁"""
+        if self._file is None:
+            return
+        try:
+            _unlock_file(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """
+    文件排他锁
+
+    Args:
+        path: 锁文件路径
+        blocking: 是否等待其他进程释放锁
+
+    Yields:
+        是否拿到锁（blocking=False 且锁被占用时为False）
+    """
+    lock_file = open(path, 'a+')
+    try:
+        try:
+            _lock_file(lock_file, blocking)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            _unlock_file(lock_file)
+    finally:
+        lock_file.close()
+
+
+try:
+    import fcntl
+
+    def _lock_file(lock_file, blocking=False):
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(lock_file):
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_file(lock_file, blocking=False):
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(lock_file):
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def acquire_job_lock(engine, name: str, ttl: int, owner: Optional[str] = None) -> bool:
+    """
+    获取任务锁
+
+    锁不存在时插入，已过期或本进程持有时接管；插入冲突说明其他实例刚刚拿到锁
+
+    Args:
+        engine: SQLAlchemy引擎
+        name: 任务名称
+        ttl: 锁的有效秒数（应大于任务的最长运行时间）
+        owner: 持有者标识，默认为当前进程
+
+    Returns:
+        是否获取成功
+    """
+    owner = owner or process_identity()
+    now = datetime.now()
+    locked_until = now + timedelta(seconds=ttl)
+
+    with Session(engine) as session:
+        result = session.execute(
+            update(JobLock)
+            .where(JobLock.name == name, or_(JobLock.locked_until < now, JobLock.owner == owner))
+            .values(owner=owner, acquired_at=now, locked_until=locked_until)
+        )
+        if result.rowcount == 1:
+            session.commit()
+            return True
+
+        session.add(JobLock(name=name, owner=owner, acquired_at=now, locked_until=locked_until))
+        try:
+            session.commit()
+            return True
+        except IntegrityError:
+            session.rollback()
+            return False
+
+
+def release_job_lock(engine, name: str, owner: Optional[str] = None):
+    """释放本进程持有的任务锁（把过期时间改为当前时间）"""
+    owner = owner or process_identity()
+    with Session(engine) as session:
+        session.execute(
+            update(JobLock)
+            .where(JobLock.name == name, JobLock.owner == owner)
+            .values(locked_until=datetime.now())
+        )
+        session.commit()
@@ -0,0 +1,561 @@
+"""
+列式只读模型
+把 platforms / banks 整表加载为按列存放的NumPy数组（字符串列做字典编码：整数编码 + 去重后的字符串表），
+查询接口的筛选、排序、分页和概览统计直接在数组上用向量化的掩码计算，
+不经过SQL往返，也不创建ORM对象。
+
+- 可选功能（READ_MODEL_ENABLED），未开启时各接口照常走数据库
+- 启动时加载；每次使用前按数据版本号（DATA_VERSION_CHECK_INTERVAL 秒检查一次）判断是否需要重新加载，
+  重新加载期间其他请求回退到数据库查询
+- 快照不可变，排序后的行号按 (排序字段, 方向) 缓存在快照上
+- 无法用快照回答的请求（如游标对应的行已被修改）返回None，由接口回退到SQL查询
+- 配置 READ_MODEL_SNAPSHOT_DIR 时各进程共用快照文件（见 services/snapshot.py）：
+  第一个发现数据版本变化的进程从数据库加载并发布新文件，其他进程只需重新映射
+"""
+import logging
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from flask import request
+from sqlalchemy import Date, DateTime, Integer, String, select
+
+from .cache import data_versions
+from .locks import file_lock
+from .snapshot import database_fingerprint, open_snapshot, read_header, write_snapshot
+
+
+logger = logging.getLogger('readmodel')
+
+# 加载时每批读取的行数
+LOAD_CHUNK_ROWS = 50000
+# 发布快照时预先计算的排序（数据接口默认按报告月份倒序）
+SNAPSHOT_ORDERS = (('report_month', True),)
+
+
+def _column_kind(column) -> str:
+    """列的存储方式：str（字典编码）/ date / datetime / float / int"""
+    if isinstance(column.type, String):
+        return 'str'
+    if isinstance(column.type, DateTime):
+        return 'datetime'
+    if isinstance(column.type, Date):
+        return 'date'
+    if isinstance(column.type, Integer) and not column.nullable:
+        return 'int'
+    # 可空整数和浮点数都用float64存放，NULL为NaN
+    return 'float'
+
+
+class RollupRow:
+    """与月度汇总行字段相同的分组统计结果，供概览接口共用同一套输出逻辑"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class ColumnarTable:
+    """
+    一张表的列式快照
+
+    Attributes:
+        model: 模型类
+        version: 加载时的数据版本号
+        columns: 列名 -> 数组（字符串列为int32编码，-1表示NULL）
+        dictionaries: 字符串列名 -> 编码对应的字符串数组
+    """
+
+    def __init__(self, model, version: int, columns: Dict[str, np.ndarray], dictionaries: Dict[str, np.ndarray]):
+        self.model = model
+        self.version = version
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.kinds = {column.name: _column_kind(column) for column in model.__table__.columns}
+        self._orders: Dict[tuple, np.ndarray] = {}
+        self._positions: Dict[tuple, np.ndarray] = {}
+        self._rollups: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, session, model, version: int) -> 'ColumnarTable':
+        """
+        从数据库加载整表（按id排序）
+
+        Args:
+            session: 数据库会话
+            model: 模型类
+            version: 当前数据版本号
+        """
+        table_columns = list(model.__table__.columns)
+        values: Dict[str, List[Any]] = {column.name: [] for column in table_columns}
+
+        result = session.execute(select(*table_columns).order_by(model.id).execution_options(yield_per=LOAD_CHUNK_ROWS))
+        for partition in result.partitions():
+            for name, column_values in zip(values, zip(*partition)):
+                values[name].extend(column_values)
+
+        columns, dictionaries = {}, {}
+        for column in table_columns:
+            data = values.pop(column.name)
+            kind = _column_kind(column)
+            if kind == 'str':
+                codes, uniques = pd.factorize(pd.Series(data, dtype=object), use_na_sentinel=True)
+                columns[column.name] = codes.astype(np.int32)
+                dictionaries[column.name] = np.asarray(uniques, dtype=object)
+            elif kind == 'date':
+                columns[column.name] = np.array(data, dtype='datetime64[D]')
+            elif kind == 'datetime':
+                columns[column.name] = np.array(data, dtype='datetime64[us]')
+            elif kind == 'int':
+                columns[column.name] = np.array(data, dtype=np.int64)
+            else:
+                columns[column.name] = np.array(data, dtype=np.float64)
+
+        return cls(model, version, columns, dictionaries)
+
+    @classmethod
+    def from_snapshot(cls, model, snapshot) -> Optional['ColumnarTable']:
+        """
+        使用映射的快照文件中的数组（只读，不复制）
+
+        Returns:
+            快照；文件中的列与模型不一致（如升级后新增了字段）时返回None
+        """
+        expected = {column.name: _column_kind(column) for column in model.__table__.columns}
+        if set(snapshot.columns) != set(expected) or set(snapshot.dictionaries) != {
+            name for name, kind in expected.items() if kind == 'str'
+        }:
+            return None
+        dtypes = {'str': 'i', 'int': 'i', 'float': 'f', 'date': 'M', 'datetime': 'M'}
+        if any(snapshot.columns[name].dtype.kind != dtypes[kind] for name, kind in expected.items()):
+            return None
+
+        table = cls(model, snapshot.version, snapshot.columns, snapshot.dictionaries)
+        table._orders.update(snapshot.orders)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.columns['id'])
+
+    @property
+    def nbytes(self) -> int:
+        """数组占用的内存（不含字符串表）"""
+        return sum(array.nbytes for array in self.columns.values())
+
+    # 筛选
+
+    def _isnull(self, name: str) -> np.ndarray:
+        values = self.columns[name]
+        kind = self.kinds[name]
+        if kind == 'str':
+            return values < 0
+        if kind in ('date', 'datetime'):
+            return np.isnat(values)
+        if kind == 'float':
+            return np.isnan(values)
+        return np.zeros(len(values), dtype=bool)
+
+    def _code(self, name: str, value: str) -> Optional[int]:
+        """字符串在字典中的编码，不存在时返回None"""
+        matches = np.flatnonzero(self.dictionaries[name] == value)
+        return int(matches[0]) if len(matches) else None
+
+    def mask(self, start=None, end=None, **equals) -> np.ndarray:
+        """
+        按条件生成行掩码
+
+        Args:
+            start: 报告月份下限（含）
+            end: 报告月份上限（含）
+            **equals: 字符串列等值筛选（值为空时忽略）
+
+        Returns:
+            布尔数组
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in equals.items():
+            if not value:
+                continue
+            code = self._code(name, value)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.columns[name] == code
+
+        months = self.columns['report_month']
+        # NaT 参与比较的结果为False，与SQL中NULL不满足范围条件一致
+        if start is not None:
+            mask &= months >= np.datetime64(_as_date(start), 'D')
+        if end is not None:
+            mask &= months <= np.datetime64(_as_date(end), 'D')
+        return mask
+
+    # 排序
+
+    def _sort_keys(self, name: str, descending: bool):
+        """lexsort的排序键：(id, 值, NULL分组)，升序NULL在前、降序NULL在后，与SQL分页的排序一致"""
+        values = self.columns[name]
+        kind = self.kinds[name]
+        isnull = self._isnull(name)
+
+        if kind == 'str':
+            # 字典编码换成字符串的排序名次
+            ranks = np.empty(len(self.dictionaries[name]), dtype=np.int64)
+            ranks[np.argsort(self.dictionaries[name].astype(str), kind='stable')] = np.arange(len(ranks))
+            keys = np.where(isnull, 0, ranks[np.maximum(values, 0)] if len(ranks) else 0)
+        elif kind in ('date', 'datetime'):
+            keys = np.where(isnull, 0, values.view(np.int64))
+        else:
+            keys = np.where(isnull, 0, values)
+
+        ids = self.columns['id']
+        if descending:
+            return -ids, -keys, isnull
+        return ids, keys, ~isnull
+
+    def order(self, name: str, descending: bool) -> np.ndarray:
+        """整表按 (字段, id) 排序后的行号（按需计算并缓存）"""
+        key = (name, descending)
+        order = self._orders.get(key)
+        if order is None:
+            with self._lock:
+                order = self._orders.get(key)
+                if order is None:
+                    order = np.lexsort(self._sort_keys(name, descending))
+                    self._orders[key] = order
+        return order
+
+    def _position(self, name: str, descending: bool) -> np.ndarray:
+        """行号 -> 在排序结果中的位置"""
+        key = (name, descending)
+        positions = self._positions.get(key)
+        if positions is None:
+            order = self.order(name, descending)
+            positions = np.empty(len(order), dtype=np.int64)
+            positions[order] = np.arange(len(order))
+            self._positions[key] = positions
+        return positions
+
+    def ordered(self, mask: np.ndarray, name: str, descending: bool = False) -> np.ndarray:
+        """掩码选中的行按 (字段, id) 排序后的行号"""
+        order = self.order(name, descending)
+        return order[mask[order]]
+
+    # 取值
+
+    def find_id(self, row_id: int) -> Optional[int]:
+        """按id查找行号（快照按id排序）"""
+        ids = self.columns['id']
+        index = int(np.searchsorted(ids, row_id))
+        if index < len(ids) and ids[index] == row_id:
+            return index
+        return None
+
+    def value(self, name: str, index: int) -> Any:
+        """单个值（Python类型，NULL为None）"""
+        values = self.columns[name]
+        kind = self.kinds[name]
+        if kind == 'str':
+            code = values[index]
+            return self.dictionaries[name][code] if code >= 0 else None
+        if kind in ('date', 'datetime'):
+            # datetime64[D] 转为 date，datetime64[us] 转为 datetime
+            return None if np.isnat(values[index]) else values[index].item()
+        if kind == 'int':
+            return int(values[index])
+        value = values[index]
+        return None if np.isnan(value) else _as_python_number(self.model.__table__.columns[name], value)
+
+    def rows(self, indexes: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        选中行转换为字典，格式与模型的 to_dict 一致
+
+        Args:
+            indexes: 行号数组
+        """
+        fields = {}
+        for name, values in self.columns.items():
+            kind = self.kinds[name]
+            selected = values[indexes]
+            if kind == 'str':
+                dictionary = self.dictionaries[name]
+                fields[name] = [dictionary[code] if code >= 0 else None for code in selected.tolist()]
+            elif kind == 'date':
+                fields[name] = [None if text == 'NaT' else text
+                                for text in np.datetime_as_string(selected, unit='M').tolist()]
+            elif kind == 'datetime':
+                fields[name] = [None if text == 'NaT' else text.replace('T', ' ')
+                                for text in np.datetime_as_string(selected, unit='s').tolist()]
+            elif kind == 'int':
+                fields[name] = selected.tolist()
+            else:
+                column = self.model.__table__.columns[name]
+                fields[name] = [None if value != value else _as_python_number(column, value)
+                                for value in selected.tolist()]
+
+        names = list(fields)
+        return [dict(zip(names, row)) for row in zip(*fields.values())]
+
+    # 分页与统计
+
+    def paginate(self, mask: np.ndarray, default_sort: str = 'report_month') -> Optional[Dict[str, Any]]:
+        """
+        按请求参数分页，参数和返回格式与 pagination.paginate 相同
+
+        Returns:
+            响应中的data字典；游标对应的行在快照中不存在或已变化时返回None（由调用方回退到SQL查询）
+        """
+        from ..api.pagination import decode_cursor, encode_cursor, _sort_column
+
+        sort_by = request.args.get('sort_by', default_sort)
+        sort_order = request.args.get('sort_order', 'desc')
+        per_page = int(request.args.get('per_page', 20))
+        after = request.args.get('after')
+        cursor_mode = bool(after) or request.args.get('cursor') in ('1', 'true')
+
+        if per_page < 1:
+            raise ValueError('per_page必须大于0')
+
+        column = _sort_column(self.model, sort_by)
+        descending = sort_order == 'desc'
+
+        if not cursor_mode:
+            page = int(request.args.get('page', 1))
+            ordered = self.ordered(mask, sort_by, descending)
+            total = len(ordered)
+            offset = max(page - 1, 0) * per_page
+            return {
+                'items': self.rows(ordered[offset:offset + per_page]),
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'pages': (total + per_page - 1) // per_page
+            }
+
+        order = self.order(sort_by, descending)
+        start = 0
+        if after:
+            value, row_id = decode_cursor(after, sort_by, sort_order, column)
+            index = self.find_id(row_id)
+            if index is None or self.value(sort_by, index) != value:
+                return None
+            start = int(self._position(sort_by, descending)[index]) + 1
+
+        tail = order[start:]
+        rows = tail[mask[tail]][:per_page + 1]
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+
+        next_cursor = None
+        if has_more and len(rows):
+            last = int(rows[-1])
+            next_cursor = encode_cursor(sort_by, sort_order, self.value(sort_by, last), self.value('id', last))
+
+        result = {
+            'items': self.rows(rows),
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+        if request.args.get('with_total') in ('1', 'true'):
+            result['total'] = int(mask.sum())
+        return result
+
+    def latest_rollups(self, dimensions: Sequence[str], measures: Dict[str, str]) -> tuple:
+        """
+        最新月份按维度分组的合计，结果与 rollup.latest_rollups 的汇总行字段相同
+
+        Args:
+            dimensions: 分组的字符串列
+            measures: 汇总字段名 -> 求和的数值列
+
+        Returns:
+            (最新月份, [RollupRow])，没有数据时为 (None, [])
+        """
+        # 快照不会修改，同一组参数只计算一次
+        key = (tuple(dimensions), tuple(measures.items()))
+        cached = self._rollups.get(key)
+        if cached is None:
+            cached = self._rollups[key] = self._latest_rollups(dimensions, measures)
+        return cached
+
+    def _latest_rollups(self, dimensions: Sequence[str], measures: Dict[str, str]) -> tuple:
+        months = self.columns['report_month']
+        valid = ~np.isnat(months)
+        if not valid.any():
+            return None, []
+        latest = months[valid].max()
+        selected = np.flatnonzero(months == latest)
+
+        codes = np.stack([self.columns[name][selected] for name in dimensions], axis=1)
+        groups, inverse = np.unique(codes, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        counts = np.bincount(inverse, minlength=len(groups))
+        sums = {
+            field: np.bincount(inverse, weights=np.nan_to_num(self.columns[source][selected]), minlength=len(groups))
+            for field, source in measures.items()
+        }
+
+        rows = []
+        for group_index, group in enumerate(groups):
+            fields = {
+                name: self.dictionaries[name][code] if code >= 0 else None
+                for name, code in zip(dimensions, group.tolist())
+            }
+            fields.update({field: float(values[group_index]) for field, values in sums.items()})
+            fields['record_count'] = int(counts[group_index])
+            rows.append(RollupRow(report_month=latest.item(), **fields))
+        return latest.item(), rows
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _as_python_number(column, value: float):
+    """float64中存放的整数列还原为int"""
+    return int(value) if isinstance(column.type, Integer) else float(value)
+
+
+class ReadModels:
+    """各表的列式快照，按数据版本号自动重新加载"""
+
+    def __init__(self):
+        self.enabled = False
+        self.version_interval = 1.0
+        self.snapshot_dir: Optional[str] = None
+        self.source = ''
+        self._tables: Dict[str, ColumnarTable] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        按应用配置初始化
+
+        Args:
+            app: Flask应用实例
+        """
+        self.enabled = app.config.get('READ_MODEL_ENABLED', False)
+        self.version_interval = app.config.get('DATA_VERSION_CHECK_INTERVAL', 1)
+        self._tables = {}
+
+        # 内存数据库每个进程各自一份，不能共用快照文件
+        from ..database import is_sqlite_memory
+        uri = app.config['SQLALCHEMY_DATABASE_URI']
+        self.snapshot_dir = app.config.get('READ_MODEL_SNAPSHOT_DIR') or None
+        if self.snapshot_dir and is_sqlite_memory(uri):
+            self.snapshot_dir = None
+        if self.snapshot_dir:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+        self.source = database_fingerprint(uri)
+
+    def _loading_lock(self, table: str) -> threading.Lock:
+        with self._lock:
+            return self._loading.setdefault(table, threading.Lock())
+
+    def get(self, session, model) -> Optional[ColumnarTable]:
+        """
+        获取模型的最新快照
+
+        数据版本变化时由一个线程重新加载；其他线程（以及其他进程正在发布共享快照时）在已有旧快照时返回None，
+        由接口回退到数据库查询，不在新的数据版本号（ETag、响应缓存）下返回旧数据；没有旧快照时等待加载完成
+
+        Args:
+            session: 数据库会话
+            model: 模型类
+
+        Returns:
+            快照；未启用或正在重新加载时返回None
+        """
+        if not self.enabled:
+            return None
+
+        name = model.__tablename__
+        version = data_versions.get(session, (name,), self.version_interval)[0]
+        current = self._tables.get(name)
+        if current is not None and current.version == version:
+            return current
+
+        lock = self._loading_lock(name)
+        if not lock.acquire(blocking=current is None):
+            return None
+        try:
+            current = self._tables.get(name)
+            if current is None or current.version != version:
+                if self.snapshot_dir:
+                    current = self._load_shared(session, model, version, current)
+                else:
+                    current = ColumnarTable.load(session, model, version)
+                    logger.info(f'已加载 {name} 列式快照: 版本 {version}，{len(current)} 行，'
+                                f'{current.nbytes / 1024 / 1024:.1f} MB')
+                if current is not None:
+                    self._tables[name] = current
+            return current
+        finally:
+            lock.release()
+
+    def _snapshot_path(self, table: str) -> str:
+        return os.path.join(self.snapshot_dir, f'{table}.snapshot')
+
+    def _open_shared(self, session, model, version: int) -> Optional[ColumnarTable]:
+        """映射版本号与数据库一致的快照文件，没有时返回None"""
+        path = self._snapshot_path(model.__tablename__)
+        header = read_header(path)
+        if header is None or header.get('source') != self.source:
+            return None
+        if header.get('version', -1) > version:
+            # 其他进程已发布更新的版本，本进程缓存的版本号还没刷新
+            data_versions.expire()
+            version = data_versions.get(session, (model.__tablename__,), self.version_interval)[0]
+        if header.get('version') != version:
+            return None
+        snapshot = open_snapshot(path)
+        if snapshot is None or snapshot.version != version:
+            return None
+        return ColumnarTable.from_snapshot(model, snapshot)
+
+    def _load_shared(self, session, model, version: int,
+                     current: Optional[ColumnarTable]) -> Optional[ColumnarTable]:
+        """
+        从共享快照文件加载，文件过期时由拿到发布锁的进程从数据库加载并发布
+
+        其他进程正在发布时：已有旧快照则返回None（本次请求回退到数据库查询），没有则等待发布完成
+        """
+        name = model.__tablename__
+        table = self._open_shared(session, model, version)
+        if table is not None:
+            logger.info(f'已映射 {name} 共享快照: 版本 {table.version}，{len(table)} 行')
+            return table
+
+        with file_lock(self._snapshot_path(name) + '.lock', blocking=current is None) as locked:
+            if not locked:
+                return None
+            # 等待锁期间其他进程可能已经发布
+            table = self._open_shared(session, model, version)
+            if table is not None:
+                logger.info(f'已映射 {name} 共享快照: 版本 {table.version}，{len(table)} 行')
+                return table
+
+            loaded = ColumnarTable.load(session, model, version)
+            orders = {key: loaded.order(*key) for key in SNAPSHOT_ORDERS}
+            try:
+                write_snapshot(self._snapshot_path(name), name, version, self.source,
+                               loaded.columns, loaded.dictionaries, orders)
+            except OSError as e:
+                logger.warning(f'{name} 共享快照写入失败，本进程使用独立副本: {e}')
+                return loaded
+            table = self._open_shared(session, model, version)
+            logger.info(f'已发布 {name} 共享快照: 版本 {version}，{len(loaded)} 行，'
+                        f'{loaded.nbytes / 1024 / 1024:.1f} MB')
+            return table or loaded
+
+    def load_all(self, session, models: Iterable):
+        """启动时预先加载"""
+        for model in models:
+            self.get(session, model)
+
+
+read_models = ReadModels()
@@ -0,0 +1,242 @@
+"""
+月度汇总维护
+写入 platforms / banks 的事务提交前，把受影响月份的汇总行按明细重算一遍
+（删除该月汇总行，再 INSERT ... SELECT ... GROUP BY 该月明细），
+每次写入的开销只与涉及月份的数据量有关，与历史数据总量无关。
+
+受影响的月份这样收集：
+
+- ORM写入（管理后台增删改、示例数据）：会话 before_flush 事件读取新增、修改、删除对象的报告月份
+  （修改报告月份时新旧两个月都重算）
+- 批量写入（upsert_records、按日期范围删除）不经过ORM对象，调用 mark_rollup_months / mark_rollup_range 标记
+
+会话提交前（before_commit）重算标记的月份，回滚时丢弃标记
+"""
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from ..models import Platform, Bank, PlatformMonthlyRollup, BankMonthlyRollup
+
+
+logger = logging.getLogger('rollup')
+
+# 会话 info 中保存待重算月份的键
+_PENDING_KEY = 'rollup_months'
+
+
+class RollupSpec:
+    """一张明细表对应的汇总表：分组维度和汇总字段"""
+
+    def __init__(self, source, rollup, dimensions, measures):
+        self.source = source
+        self.rollup = rollup
+        self.dimensions = dimensions
+        self.measures = measures
+
+    def select_rows(self, months: Optional[List[date]] = None):
+        """按月份和维度汇总明细的查询，列顺序与 columns() 一致"""
+        source = self.source
+        group_by = [source.report_month] + [getattr(source, name) for name in self.dimensions]
+        query = select(*group_by, *self.measures.values()).where(source.report_month.isnot(None))
+        if months is not None:
+            query = query.where(source.report_month.in_(months))
+        return query.group_by(*group_by)
+
+    def columns(self) -> List[str]:
+        return ['report_month', *self.dimensions, *self.measures]
+
+
+ROLLUPS: Dict[str, RollupSpec] = {
+    Platform.__tablename__: RollupSpec(
+        Platform, PlatformMonthlyRollup,
+        dimensions=('company_group', 'platform_type', 'loan_type'),
+        measures={
+            'total_balance': func.coalesce(func.sum(Platform.loan_balance), 0),
+            'total_issued': func.coalesce(func.sum(Platform.loan_issued), 0),
+            'record_count': func.count(Platform.id),
+        }
+    ),
+    Bank.__tablename__: RollupSpec(
+        Bank, BankMonthlyRollup,
+        dimensions=('bank_type',),
+        measures={
+            'total_loan': func.coalesce(func.sum(Bank.total_internet_loan), 0),
+            'total_coop_platforms': func.coalesce(func.sum(Bank.coop_platform_count), 0),
+            'record_count': func.count(Bank.id),
+        }
+    ),
+}
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """报告月份统一为date类型"""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def mark_rollup_months(session, model, months: Iterable[Any]):
+    """
+    标记需要重算汇总的月份（提交前重算）
+
+    Args:
+        session: 数据库会话
+        model: 明细模型（Platform/Bank）
+        months: 写入数据涉及的报告月份
+    """
+    if model.__tablename__ not in ROLLUPS:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, {}).setdefault(model.__tablename__, set())
+    pending.update(month for month in map(_as_date, months) if month is not None)
+
+
+def mark_rollup_range(session, model, start, end):
+    """
+    标记日期范围内已有数据的月份（批量删除前调用）
+
+    Args:
+        session: 数据库会话
+        model: 明细模型（Platform/Bank）
+        start: 开始月份
+        end: 结束月份
+    """
+    months = session.execute(
+        select(model.report_month).where(
+            model.report_month >= start,
+            model.report_month <= end
+        ).distinct()
+    ).scalars()
+    mark_rollup_months(session, model, months)
+
+
+def refresh_rollups(session, table: str, months: Optional[Iterable[date]] = None) -> int:
+    """
+    按明细重算汇总行（不提交）
+
+    Args:
+        session: 数据库会话
+        table: 明细表名
+        months: 要重算的月份，为None时重建全部汇总
+
+    Returns:
+        写入的汇总行数
+    """
+    spec = ROLLUPS[table]
+    rollup = spec.rollup
+    months = sorted(set(months)) if months is not None else None
+    if months == []:
+        return 0
+
+    clear = delete(rollup)
+    if months is not None:
+        clear = clear.where(rollup.report_month.in_(months))
+    session.execute(clear)
+
+    result = session.execute(
+        insert(rollup).from_select(spec.columns(), spec.select_rows(months))
+    )
+    return result.rowcount or 0
+
+
+def latest_rollups(session, rollup, start=None, end=None, **filters):
+    """
+    最新月份的汇总行
+
+    Args:
+        session: 数据库会话
+        rollup: 汇总模型
+        start: 开始月份（可选）
+        end: 结束月份（可选）
+        **filters: 维度筛选（值为空时忽略）
+
+    Returns:
+        (最新月份, 该月的汇总行列表)，没有数据时为 (None, [])
+    """
+    conditions = [getattr(rollup, name) == value for name, value in filters.items() if value]
+    if start is not None:
+        conditions.append(rollup.report_month >= start)
+    if end is not None:
+        conditions.append(rollup.report_month <= end)
+
+    latest = session.execute(select(func.max(rollup.report_month)).where(*conditions)).scalar()
+    if latest is None:
+        return None, []
+    rows = session.execute(
+        select(rollup).where(rollup.report_month == latest, *conditions)
+    ).scalars().all()
+    return latest, rows
+
+
+def group_rollups(rows, dimension: str, *measures: str) -> List[tuple]:
+    """
+    按一个维度合并汇总行（维度为NULL的排在最后）
+
+    Returns:
+        [(维度值, 各汇总字段合计...)]
+    """
+    grouped = {}
+    for row in rows:
+        key = getattr(row, dimension)
+        totals = grouped.setdefault(key, [0] * len(measures))
+        for index, measure in enumerate(measures):
+            totals[index] += getattr(row, measure) or 0
+    return [(key, *grouped[key]) for key in sorted(grouped, key=lambda key: (key is None, key or ''))]
+
+
+def ensure_rollups(session):
+    """汇总表为空而明细表有数据时（升级后首次启动）重建汇总"""
+    for table, spec in ROLLUPS.items():
+        has_rollup = session.execute(select(spec.rollup.id).limit(1)).first()
+        has_source = session.execute(
+            select(spec.source.id).where(spec.source.report_month.isnot(None)).limit(1)
+        ).first()
+        if has_source and not has_rollup:
+            count = refresh_rollups(session, table)
+            logger.info(f'已重建 {table} 的月度汇总: {count} 行')
+    session.commit()
+
+
+def _collect_flush_months(session, flush_context, instances):
+    """flush前收集新增、修改、删除的明细对象的报告月份"""
+    for obj in list(session.new) + list(session.deleted):
+        if obj.__class__.__tablename__ in ROLLUPS:
+            mark_rollup_months(session, obj.__class__, [obj.report_month])
+
+    for obj in session.dirty:
+        if obj.__class__.__tablename__ not in ROLLUPS or not session.is_modified(obj):
+            continue
+        history = inspect(obj).attrs.report_month.history
+        mark_rollup_months(session, obj.__class__, [*history.added, *history.unchanged, *history.deleted])
+
+
+def _refresh_pending(session):
+    """提交前重算标记的月份"""
+    # 先写入未flush的对象，flush过程中会继续标记月份
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for table, months in pending.items():
+        refresh_rollups(session, table, months)
+
+
+def _discard_pending(session, *args):
+    session.info.pop(_PENDING_KEY, None)
+
+
+_registered = False
+
+
+def register_rollup_events():
+    """在所有会话上注册汇总维护事件（每个进程一次）"""
+    global _registered
+    if _registered:
+        return
+    event.listen(Session, 'before_flush', _collect_flush_months)
+    event.listen(Session, 'before_commit', _refresh_pending)
+    event.listen(Session, 'after_rollback', _discard_pending)
+    _registered = True
@@ -4,10 +4,15 @@
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+import functools
 import logging
+import threading
 from datetime import datetime
 import os
-import traceback
+
+from ..config import DATA_DIR
+from . import jobqueue
+from .locks import LeaderLock, process_identity
 
 
 class ScraperScheduler:
@@ -24,6 +29,9 @@ class ScraperScheduler:
         self.app = app
         self.logger = logging.getLogger('scheduler')
         self.scrapers_enabled = True  # 可通过环境变量控制
+        # 选主文件锁，只有持有锁的进程运行定时任务
+        self.leader_lock = None
+        self._stop_event = threading.Event()
 
     def init_app(self, app):
         """
@@ -36,6 +44,7 @@ class ScraperScheduler:
 
         # 检查是否启用爬虫
         self.scrapers_enabled = app.config.get('ENABLE_SCRAPERS', True)
+        self.leader_lock = LeaderLock(app.config.get('SCHEDULER_LOCK_FILE') or str(DATA_DIR / 'scheduler.lock'))
 
         if not self.scrapers_enabled:
             self.logger.info('爬虫功能已禁用（通过配置）')
@@ -62,7 +71,7 @@ class ScraperScheduler:
 
         # 1. 研究报告爬虫 - 每周一10点执行
         self.scheduler.add_job(
-            func=self._run_research_scraper,
+            func=functools.partial(self.enqueue_job, 'research_scraper'),
             trigger=CronTrigger(day_of_week='mon', hour=10, minute=0),
             id='research_scraper',
             name='研究报告爬虫',
@@ -71,7 +80,7 @@ class ScraperScheduler:
 
         # 2. 上市公司财报爬虫 - 每季度第一个月5号10点执行
         self.scheduler.add_job(
-            func=self._run_corporate_scraper,
+            func=functools.partial(self.enqueue_job, 'corporate_scraper'),
             trigger=CronTrigger(month='1,4,7,10', day=5, hour=10, minute=0),
             id='corporate_scraper',
             name='上市公司财报爬虫',
@@ -80,7 +89,7 @@ class ScraperScheduler:
 
         # 3. 官方监管数据爬虫 - 每月15日10点执行
         self.scheduler.add_job(
-            func=self._run_official_scraper,
+            func=functools.partial(self.enqueue_job, 'official_scraper'),
             trigger=CronTrigger(day=15, hour=10, minute=0),
             id='official_scraper',
             name='官方监管数据爬虫',
@@ -89,7 +98,7 @@ class ScraperScheduler:
 
         # 4. 财经媒体爬虫 - 每天9点执行
         self.scheduler.add_job(
-            func=self._run_media_scraper,
+            func=functools.partial(self.enqueue_job, 'media_scraper'),
             trigger=CronTrigger(hour=9, minute=0),
             id='media_scraper',
             name='财经媒体爬虫',
@@ -98,173 +107,111 @@ class ScraperScheduler:
 
         self.logger.info('定时任务已添加')
 
-    def _run_research_scraper(self):
-        """运行研究报告爬虫"""
-        if not self.scrapers_enabled:
-            return
-
-        with self.app.app_context():
-            self.logger.info('[定时任务] 开始执行研究报告爬虫')
-            try:
-                from app.scrapers.research import ResearchScraper
-                from app import db
-
-                scraper = ResearchScraper()
-                result = scraper.run(db.session, max_reports=3)
-
-                # 更新数据源状态
-                self._update_data_source_status('研究报告爬虫', result)
-
-                self.logger.info(f'[定时任务] 研究报告爬虫完成: {result}')
-            except ImportError as e:
-                self.logger.warning(f'[定时任务] 研究报告爬虫模块导入失败: {str(e)}')
-            except Exception as e:
-                self.logger.error(f'[定时任务] 研究报告爬虫失败: {str(e)}\n{traceback.format_exc()}')
-
-    def _run_corporate_scraper(self):
-        """运行上市公司财报爬虫"""
-        if not self.scrapers_enabled:
-            return
-
-        with self.app.app_context():
-            self.logger.info('[定时任务] 开始执行上市公司财报爬虫')
-            try:
-                from app.scrapers.corporate import CorporateScraper
-                from app import db
-
-                # 爬取蚂蚁集团财报
-                scraper = CorporateScraper(company='蚂蚁集团')
-                result = scraper.run(db.session, max_reports=3)
-
-                # 更新数据源状态
-                self._update_data_source_status('上市公司财报爬虫', result)
-
-                self.logger.info(f'[定时任务] 上市公司财报爬虫完成: {result}')
-            except ImportError as e:
-                self.logger.warning(f'[定时任务] 上市公司财报爬虫模块导入失败: {str(e)}')
-            except Exception as e:
-                self.logger.error(f'[定时任务] 上市公司财报爬虫失败: {str(e)}\n{traceback.format_exc()}')
-
-    def _run_official_scraper(self):
-        """运行官方监管数据爬虫"""
-        if not self.scrapers_enabled:
-            return
-
-        with self.app.app_context():
-            self.logger.info('[定时任务] 开始执行官方监管数据爬虫')
-            try:
-                from app.scrapers.official import OfficialScraper
-                from app import db
-
-                scraper = OfficialScraper(source='中国人民银行')
-                result = scraper.run(db.session, max_files=5)
-
-                # 更新数据源状态
-                self._update_data_source_status('官方监管数据爬虫', result)
+    def enqueue_job(self, job_id: str, trigger: str = 'schedule', params=None, priority=None):
+        """
+        把任务放入爬虫任务队列，由工作进程执行（立即返回，不等待爬取完成）
 
-                self.logger.info(f'[定时任务] 官方监管数据爬虫完成: {result}')
-            except ImportError as e:
-                self.logger.warning(f'[定时任务] 官方监管数据爬虫模块导入失败: {str(e)}')
-            except Exception as e:
-                self.logger.error(f'[定时任务] 官方监管数据爬虫失败: {str(e)}\n{traceback.format_exc()}')
+        Args:
+            job_id: 任务ID（即任务类型，见 jobqueue.SCRAPER_JOBS）
+            trigger: 触发方式（schedule/manual）
+            params: 运行参数
+            priority: 优先级，默认取数据源优先级
 
-    def _run_media_scraper(self):
-        """运行财经媒体爬虫"""
-        if not self.scrapers_enabled:
-            return
+        Returns:
+            (任务字典, 是否新建)
+        """
+        from app import db
 
         with self.app.app_context():
-            self.logger.info('[定时任务] 开始执行财经媒体爬虫')
             try:
-                from app.scrapers.media import MediaScraper
-                from app import db
-
-                scraper = MediaScraper(source='新浪财经')
-                result = scraper.run(db.session, keywords=['消费金融'], days=3, max_articles=10)
-
-                # 更新数据源状态
-                self._update_data_source_status('财经媒体爬虫', result)
-
-                self.logger.info(f'[定时任务] 财经媒体爬虫完成: {result}')
-            except ImportError as e:
-                self.logger.warning(f'[定时任务] 财经媒体爬虫模块导入失败: {str(e)}')
-            except Exception as e:
-                self.logger.error(f'[定时任务] 财经媒体爬虫失败: {str(e)}\n{traceback.format_exc()}')
-
-    def _update_data_source_status(self, source_name: str, result: dict):
+                job, created = jobqueue.enqueue(db.session, job_id, params=params,
+                                                priority=priority, trigger=trigger)
+                if created:
+                    self.logger.info(f'[定时任务] {job_id} 已入队 (任务ID: {job.id})')
+                else:
+                    self.logger.info(f'[定时任务] {job_id} 已在队列中 (任务ID: {job.id}, 状态: {job.status})')
+                return job.to_dict(), created
+            finally:
+                db.session.remove()
+
+    def start(self) -> bool:
         """
-        更新数据源状态
+        启动调度器
 
-        Args:
-            source_name: 数据源名称
-            result: 爬取结果
-        """
-        try:
-            from app import db
-            from app.models.source import DataSource
+        先获取选主文件锁，同一台机器上只有一个进程（如多个gunicorn worker中的一个）真正运行定时任务
 
-            data_source = db.session.query(DataSource).filter_by(name=source_name).first()
-
-            if not data_source:
-                # 创建新数据源记录
-                data_source = DataSource(
-                    name=source_name,
-                    source_type='research' if '研究报告' in source_name else 'official',
-                    update_frequency='weekly',
-                    is_active=1,
-                    priority=1
-                )
-                db.session.add(data_source)
+        Returns:
+            本进程是否成功启动调度器
+        """
+        if not self.scheduler:
+            self.logger.info('调度器未启动（未初始化或爬虫功能已禁用）')
+            return False
+        if self.scheduler.running:
+            return True
 
-            # 更新状态
-            data_source.last_scrape_at = datetime.now()
-            data_source.scrape_status = result.get('status', 'unknown')
+        if not self.leader_lock.acquire():
+            self.logger.info(f'调度器未启动：其他进程已持有调度锁 {self.leader_lock.path}')
+            return False
 
-            db.session.commit()
+        self.scheduler.start()
+        self.logger.info(f'定时任务调度器已启动（{process_identity()}）')
 
-        except Exception as e:
-            self.logger.error(f'更新数据源状态失败: {str(e)}')
-
-    def start(self):
-        """启动调度器"""
-        if self.scheduler and not self.scheduler.running:
-            self.scheduler.start()
-            self.logger.info('定时任务调度器已启动')
-
-            # 打印已添加的任务
-            jobs = self.scheduler.get_jobs()
-            self.logger.info(f'已添加 {len(jobs)} 个定时任务:')
-            for job in jobs:
-                self.logger.info(f'  - {job.name} (ID: {job.id}, 下次运行: {job.next_run_time})')
-        else:
-            self.logger.info('调度器未启动（可能未初始化或已在运行）')
+        # 打印已添加的任务
+        jobs = self.scheduler.get_jobs()
+        self.logger.info(f'已添加 {len(jobs)} 个定时任务:')
+        for job in jobs:
+            self.logger.info(f'  - {job.name} (ID: {job.id}, 下次运行: {job.next_run_time})')
+        return True
 
     def stop(self):
         """停止调度器"""
+        self._stop_event.set()
         if self.scheduler and self.scheduler.running:
             self.scheduler.shutdown()
             self.logger.info('定时任务调度器已停止')
+        if self.leader_lock:
+            self.leader_lock.release()
+
+    def run_forever(self):
+        """
+        以独立调度进程运行（见 run_scheduler.py），阻塞直到 stop() 被调用
+
+        拿不到调度锁时作为备用进程，每隔 SCHEDULER_LEADER_RETRY 秒重试，主进程退出后自动接管
+        """
+        if not self.scheduler:
+            self.logger.info('爬虫功能已禁用，调度进程退出')
+            return
+
+        retry = self.app.config.get('SCHEDULER_LEADER_RETRY', 30)
+        self._stop_event.clear()
+        while not self._stop_event.is_set():
+            if self.start():
+                self._stop_event.wait()
+                break
+            self._stop_event.wait(retry)
 
-    def run_job_now(self, job_id: str):
+    def run_job_now(self, job_id: str, params=None, priority=None):
         """
-        立即运行指定任务
+        立即运行指定任务（放入任务队列后立即返回，不占用调用方线程）
 
         Args:
             job_id: 任务ID
+            params: 运行参数
+            priority: 优先级
 
         Returns:
-            执行结果
+            入队结果
         """
         if not self.scheduler:
             return {'error': '调度器未初始化'}
 
-        job = self.scheduler.get_job(job_id)
-        if not job:
+        if not self.scheduler.get_job(job_id):
             return {'error': f'任务不存在: {job_id}'}
 
         try:
-            job.func()
-            return {'success': True, 'message': f'任务 {job_id} 执行完成'}
+            job, created = self.enqueue_job(job_id, trigger='manual', params=params, priority=priority)
+            message = f'任务 {job_id} 已加入队列' if created else f'任务 {job_id} 已在队列中'
+            return {'success': True, 'message': message, 'job': job}
         except Exception as e:
             return {'error': str(e)}
 
@@ -280,10 +227,14 @@ class ScraperScheduler:
 
         jobs = []
         for job in self.scheduler.get_jobs():
+            # 调度器未在本进程启动时（如Web进程），按触发器计算下次运行时间
+            next_run_time = getattr(job, 'next_run_time', None)
+            if next_run_time is None and not self.scheduler.running:
+                next_run_time = job.trigger.get_next_fire_time(None, datetime.now(job.trigger.timezone))
             jobs.append({
                 'id': job.id,
                 'name': job.name,
-                'next_run_time': job.next_run_time.strftime('%Y-%m-%d %H:%M:%S') if job.next_run_time else None
+                'next_run_time': next_run_time.strftime('%Y-%m-%d %H:%M:%S') if next_run_time else None
             })
 
         return jobs
@@ -0,0 +1,213 @@
+"""
+共享数据快照文件
+把列式只读模型（readmodel.ColumnarTable）的数组写成一个二进制文件，同一台机器上的各gunicorn worker
+以只读方式内存映射同一个文件：数据只在操作系统页缓存中存一份，重新加载只需重新映射。
+
+文件格式（小端）：
+
+    8字节标识 | 8字节头部长度 | JSON头部 | 补齐到64字节 | 数据区
+
+- JSON头部记录表名、数据版本号、数据来源（数据库地址的摘要）、行数，
+  以及各数组在数据区中的偏移和类型
+- 定长列（int32字符串编码、int64、float64、datetime64）按行数原样存放，映射后直接作为NumPy数组使用
+- 字符串字典存为 int64偏移数组（个数+1）+ 拼接的UTF-8字节，映射后解码为字符串数组（只有去重后的值，很小）
+- 可附带预先计算的排序行号（如数据接口默认的按报告月份倒序），各worker不必各自排序
+
+发布时先写入同目录下的临时文件，再用 os.replace 原子替换：正在读取旧文件的进程继续使用旧的映射，
+之后打开的进程看到完整的新文件。
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.engine import make_url
+
+
+logger = logging.getLogger('readmodel')
+
+MAGIC = b'LNSNAP01'
+# 各数组在文件中的对齐字节数
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sQ')
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def database_fingerprint(uri: str) -> str:
+    """数据库地址的摘要（不含密码），用于识别快照来自哪个数据库"""
+    rendered = make_url(uri).render_as_string(hide_password=True)
+    return hashlib.sha1(rendered.encode('utf-8')).hexdigest()[:16]
+
+
+def _encode_dictionary(values: np.ndarray) -> Tuple[np.ndarray, bytes]:
+    """字符串数组编码为 (偏移数组, 拼接的UTF-8字节)"""
+    encoded = [str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+    if encoded:
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return offsets, b''.join(encoded)
+
+
+class Snapshot:
+    """
+    映射到内存的快照文件
+
+    Attributes:
+        table: 表名
+        version: 数据版本号
+        source: 数据库地址摘要
+        columns: 列名 -> 只读数组（直接引用映射的文件）
+        dictionaries: 字符串列名 -> 字符串数组
+        orders: (列名, 是否倒序) -> 排序后的行号（只读数组）
+    """
+
+    def __init__(self, header: Dict[str, Any], columns, dictionaries, orders):
+        self.table = header['table']
+        self.version = header['version']
+        self.source = header['source']
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.orders = orders
+
+
+def read_header(path: str) -> Optional[Dict[str, Any]]:
+    """
+    只读取快照文件的头部（判断版本是否需要更新）
+
+    Returns:
+        头部字典；文件不存在或格式不对时返回None
+    """
+    try:
+        with open(path, 'rb') as snapshot_file:
+            prefix = snapshot_file.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size:
+                return None
+            magic, header_size = _PREFIX.unpack(prefix)
+            if magic != MAGIC:
+                return None
+            header = json.loads(snapshot_file.read(header_size).decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+    header['data_offset'] = _align(_PREFIX.size + header_size)
+    return header
+
+
+def open_snapshot(path: str) -> Optional[Snapshot]:
+    """
+    只读映射快照文件
+
+    映射在返回的数组不再被引用后才会释放；文件被新快照替换后，已有的映射仍指向旧文件的内容
+
+    Returns:
+        快照；文件不存在或格式不对时返回None
+    """
+    header = read_header(path)
+    if header is None:
+        return None
+
+    with open(path, 'rb') as snapshot_file:
+        buffer = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    base = header['data_offset']
+    rows = header['rows']
+    try:
+        columns = {
+            item['name']: np.frombuffer(buffer, dtype=np.dtype(item['dtype']), count=rows, offset=base + item['offset'])
+            for item in header['columns']
+        }
+        dictionaries = {}
+        for item in header['dictionaries']:
+            offsets = np.frombuffer(buffer, dtype='<i8', count=item['count'] + 1, offset=base + item['offsets'])
+            data = buffer[base + item['data']:base + item['data'] + int(offsets[-1])]
+            dictionaries[item['name']] = np.array(
+                [data[offsets[index]:offsets[index + 1]].decode('utf-8') for index in range(item['count'])],
+                dtype=object
+            )
+        orders = {
+            (item['name'], item['descending']): np.frombuffer(buffer, dtype='<i8', count=rows,
+                                                              offset=base + item['offset'])
+            for item in header['orders']
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f'快照文件 {path} 无法读取: {e}')
+        return None
+    return Snapshot(header, columns, dictionaries, orders)
+
+
+def write_snapshot(path: str, table: str, version: int, source: str,
+                   columns: Dict[str, np.ndarray], dictionaries: Dict[str, np.ndarray],
+                   orders: Optional[Dict[Tuple[str, bool], np.ndarray]] = None):
+    """
+    写入快照文件（写临时文件后原子替换）
+
+    Args:
+        path: 快照文件路径
+        table: 表名
+        version: 数据版本号
+        source: 数据库地址摘要
+        columns: 列名 -> 定长数组（各列行数相同）
+        dictionaries: 字符串列名 -> 字符串数组
+        orders: (列名, 是否倒序) -> 排序后的行号
+    """
+    rows = len(next(iter(columns.values()))) if columns else 0
+    blocks = []
+    offset = 0
+
+    def add_block(data) -> int:
+        nonlocal offset
+        start = _align(offset)
+        blocks.append((start, data))
+        offset = start + len(data)
+        return start
+
+    header = {'table': table, 'version': version, 'source': source, 'rows': rows,
+              'columns': [], 'dictionaries': [], 'orders': []}
+    for name, values in columns.items():
+        values = np.ascontiguousarray(values)
+        header['columns'].append({
+            'name': name, 'dtype': values.dtype.str, 'offset': add_block(values.view(np.uint8))
+        })
+    for name, values in dictionaries.items():
+        offsets, data = _encode_dictionary(values)
+        header['dictionaries'].append({
+            'name': name,
+            'count': len(values),
+            'offsets': add_block(offsets.view(np.uint8)),
+            'data': add_block(data),
+        })
+    for (name, descending), order in (orders or {}).items():
+        order = np.ascontiguousarray(order, dtype='<i8')
+        header['orders'].append({
+            'name': name, 'descending': descending, 'offset': add_block(order.view(np.uint8))
+        })
+
+    encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_offset = _align(_PREFIX.size + len(encoded))
+
+    directory = os.path.dirname(path) or '.'
+    descriptor, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as snapshot_file:
+            snapshot_file.write(_PREFIX.pack(MAGIC, len(encoded)))
+            snapshot_file.write(encoded)
+            for start, data in blocks:
+                snapshot_file.seek(data_offset + start)
+                snapshot_file.write(data)
+            snapshot_file.truncate(data_offset + offset)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        # mkstemp 创建的文件只有所有者可读
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
@@ -0,0 +1,195 @@
+"""
+流式生成Excel（xlsx）
+xlsx 是一个zip包，工作表是其中的XML文件。这里直接用 zipfile 往不可回退的输出流中写zip条目
+（条目大小写在数据描述符中），每写完一批行就可以把已压缩的字节发送出去：
+第一个字节在读到第一批数据后立即发出，内存中只保留一批行，也不需要临时文件。
+
+只支持导出需要的功能：多个工作表，单元格为字符串、数字或空，不带样式
+"""
+import re
+import zipfile
+from datetime import date, datetime
+from typing import Any, Iterable, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+
+# XML 1.0 不允许的控制字符
+_ILLEGAL_CHARACTERS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{index}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}'
+    '<Relationship Id="rId{styles}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_FOOTER = '</sheetData></worksheet>'
+
+
+class _Sink:
+    """只支持写入的输出流：zipfile 检测到无法 tell/seek 时改用数据描述符，按顺序写出整个zip"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def _cell(value: Any) -> str:
+    """单元格XML（数字写为数值，日期和其他值写为内联字符串，None为空）"""
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        if value != value or value in (float('inf'), float('-inf')):
+            return '<c/>'
+        return f'<c><v>{value!r}</v></c>'
+    if isinstance(value, datetime):
+        value = value.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(value, date):
+        value = value.isoformat()
+    text = escape(_ILLEGAL_CHARACTERS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+class StreamingWorkbook:
+    """
+    边写边输出的工作簿
+
+    用法：
+        workbook = StreamingWorkbook()
+        sheet = workbook.create_sheet('数据')
+        sheet.append([...])
+        yield workbook.take()      # 取出目前已生成的字节
+        ...
+        yield workbook.close()     # 写入工作簿目录和zip中央目录
+    """
+
+    def __init__(self, compresslevel: int = 6):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, 'w', compression=zipfile.ZIP_DEFLATED,
+                                    compresslevel=compresslevel)
+        self._titles: List[str] = []
+        self._sheet: Optional['StreamingSheet'] = None
+
+    def create_sheet(self, title: str) -> 'StreamingSheet':
+        """新建工作表（之前的工作表随之结束，不能再追加行）"""
+        self._close_sheet()
+        self._titles.append(title[:31])
+        entry = self._zip.open(f'xl/worksheets/sheet{len(self._titles)}.xml', 'w')
+        self._sheet = StreamingSheet(entry)
+        return self._sheet
+
+    def _close_sheet(self):
+        if self._sheet is not None:
+            self._sheet.close()
+            self._sheet = None
+
+    def take(self) -> bytes:
+        """取出已生成的zip字节"""
+        if self._sheet is not None:
+            self._sheet.flush()
+        data = b''.join(self._sink.chunks)
+        self._sink.chunks.clear()
+        return data
+
+    def close(self) -> bytes:
+        """结束工作簿，返回剩余的字节"""
+        self._close_sheet()
+        count = len(self._titles)
+        self._zip.writestr('[Content_Types].xml', _CONTENT_TYPES.format(
+            sheets=''.join(_SHEET_CONTENT_TYPE.format(index=index) for index in range(1, count + 1))
+        ))
+        self._zip.writestr('_rels/.rels', _ROOT_RELS)
+        self._zip.writestr('xl/workbook.xml', _WORKBOOK.format(sheets=''.join(
+            f'<sheet name={quoteattr(title)} sheetId="{index}" r:id="rId{index}"/>'
+            for index, title in enumerate(self._titles, 1)
+        )))
+        self._zip.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(
+            sheets=''.join(
+                f'<Relationship Id="rId{index}" '
+                f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{index}.xml"/>'
+                for index in range(1, count + 1)
+            ),
+            styles=count + 1
+        ))
+        self._zip.writestr('xl/styles.xml', _STYLES)
+        self._zip.close()
+        return self.take()
+
+
+class StreamingSheet:
+    """只能按顺序追加行的工作表（行先缓存在列表中，取出字节时再整批压缩写入）"""
+
+    def __init__(self, entry):
+        self._entry = entry
+        self._rows: List[str] = [_SHEET_HEADER]
+
+    def append(self, row: Iterable[Any]):
+        """追加一行"""
+        self._rows.append(f'<row>{"".join(_cell(value) for value in row)}</row>')
+
+    def flush(self):
+        """把缓存的行写入zip条目"""
+        if self._rows:
+            self._entry.write(''.join(self._rows).encode('utf-8'))
+            self._rows.clear()
+
+    def close(self):
+        self._rows.append(_SHEET_FOOTER)
+        self.flush()
+        self._entry.close()
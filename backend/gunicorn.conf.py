@@ -0,0 +1,27 @@
+"""
+gunicorn配置（gunicorn启动时自动加载当前目录下的 gunicorn.conf.py，命令行参数优先）
+
+多个worker进程通过 PROMETHEUS_MULTIPROC_DIR 目录共享监控指标，
+任意一个worker响应 /metrics 时都会汇总所有worker的数据
+"""
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus_multiproc'))
+
+
+def on_starting(server):
+    """主进程启动时清空上次运行遗留的指标文件"""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """worker退出时标记其指标文件，避免重启后的worker重复计入实时指标"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
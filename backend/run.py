@@ -14,9 +14,14 @@ from app.models import Platform, Bank, DataSource
 # 创建应用实例
 app = create_app(os.getenv('FLASK_CONFIG') or 'default')
 
-# 初始化调度器
-from app.services import scheduler
+# 初始化调度器（Web进程默认只注册任务、不运行；定时任务由 run_scheduler.py 独立进程入队并执行，
+# 设置 SCHEDULER_AUTOSTART=true 时由拿到调度锁的一个worker运行调度器和爬虫工作进程）
+from app.services import scheduler, JobWorkerPool
 scheduler.init_app(app)
+job_pool = JobWorkerPool(os.getenv('FLASK_CONFIG') or 'default', app.config.get('JOB_WORKERS', 2),
+                         app.config.get('JOB_SHUTDOWN_TIMEOUT', 60))
+if app.config.get('SCHEDULER_AUTOSTART') and scheduler.start():
+    job_pool.start()
 
 
 @app.shell_context_processor
@@ -41,9 +46,10 @@ def init_db():
 def seed_data():
     """插入示例数据"""
     from datetime import datetime
+    from app.services.cache import bump_data_version
 
     # 检查是否已有数据
-    if Platform.query.first():
+    if db.session.query(Platform).first():
         print('数据库已有数据，跳过插入')
         return
 
@@ -146,6 +152,8 @@ def seed_data():
     for bank in banks:
         db.session.add(bank)
 
+    # 与 /seed 接口一样递增数据版本号，使已缓存的统计、ETag和只读模型失效
+    bump_data_version(db.session, Platform.__tablename__, Bank.__tablename__)
     db.session.commit()
     print(f'已插入 {len(platforms)} 条平台数据和 {len(banks)} 条银行数据')
 
@@ -159,8 +167,9 @@ if __name__ == '__main__':
     print('按 Ctrl+C 停止服务器')
     print('=' * 50)
 
-    # 启动调度器
-    scheduler.start()
+    # 启动调度器，拿到调度锁的进程同时启动爬虫工作进程
+    if scheduler.start():
+        job_pool.start()
 
     try:
         app.run(
@@ -169,5 +178,6 @@ if __name__ == '__main__':
             debug=True
         )
     finally:
-        # 停止调度器
+        # 停止调度器和工作进程
         scheduler.stop()
+        job_pool.stop()
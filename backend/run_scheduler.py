@@ -0,0 +1,63 @@
+"""
+定时任务调度进程
+与gunicorn的Web进程分开运行，Web worker只处理HTTP请求。
+调度器到点把任务放入爬虫任务队列，本进程启动的工作进程池（JOB_WORKERS 个）领取并执行。
+同时启动多个调度进程时，只有拿到调度锁的一个负责定时入队，其余作为备用，主进程退出后自动接管；
+所有进程的工作进程都会从同一个队列领取任务
+
+用法:
+    python run_scheduler.py [--workers N]
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from app import create_app
+from app.services import scheduler, JobWorkerPool
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='定时任务调度进程')
+    parser.add_argument('--workers', type=int, default=None, help='爬虫工作进程数（默认 JOB_WORKERS）')
+    args = parser.parse_args()
+
+    config_name = os.getenv('FLASK_CONFIG') or 'default'
+    app = create_app(config_name)
+
+    # 调度器和爬虫使用各自的logger，在独立进程中输出到控制台
+    logging.basicConfig(level=app.config['LOG_LEVEL'], format=app.config['LOG_FORMAT'],
+                        datefmt=app.config['LOG_DATE_FORMAT'])
+    scheduler.init_app(app)
+
+    def handle_signal(signum, frame):
+        app.logger.info(f'收到信号 {signum}，停止调度进程')
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    pool = None
+    if app.config.get('ENABLE_SCRAPERS', True):
+        pool = JobWorkerPool(config_name, args.workers or app.config.get('JOB_WORKERS', 2),
+                             app.config.get('JOB_SHUTDOWN_TIMEOUT', 60))
+        pool.start()
+
+    app.logger.info('调度进程启动')
+    try:
+        scheduler.run_forever()
+    finally:
+        scheduler.stop()
+        if pool:
+            pool.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""测试公共夹具"""
+import pytest
+
+from app import create_app, db
+from app.api.pagination import count_cache
+from app.config import TestingConfig, config
+from app.models import Platform
+from app.services.cache import bump_data_version, data_versions, response_cache
+from app.services.readmodel import read_models
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """
+    测试应用（整个测试会话共用一个：API蓝图只能注册一次）
+
+    使用临时文件数据库，任务队列等通过 db.engine 另开连接的代码能看到同一份数据
+    """
+    path = tmp_path_factory.mktemp('db') / 'test.db'
+
+    class FileTestingConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    config['pytest'] = FileTestingConfig
+    app = create_app('pytest')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _reset_caches():
+    """每个测试前后清空进程内缓存，测试之间不共用缓存的版本号、总数和响应"""
+    data_versions.expire()
+    count_cache.clear()
+    response_cache.clear()
+    yield
+    data_versions.expire()
+    count_cache.clear()
+    response_cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def session(app):
+    """应用上下文中的数据库会话"""
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
+
+
+@pytest.fixture
+def read_model(app, monkeypatch):
+    """启用列式只读模型"""
+    monkeypatch.setattr(read_models, 'enabled', True)
+    return read_models
+
+
+@pytest.fixture
+def add_platforms(session):
+    """
+    写入平台数据并在测试结束后删除（与管理接口一样递增数据版本号，提交时维护月度汇总）
+
+    Returns:
+        函数，参数为字段字典列表，返回写入的平台ID列表
+    """
+    created = []
+
+    def add(rows):
+        platforms = [Platform(**row) for row in rows]
+        session.add_all(platforms)
+        bump_data_version(session, Platform.__tablename__)
+        session.commit()
+        created.extend(platforms)
+        return [platform.id for platform in platforms]
+
+    yield add
+    session.rollback()
+    for platform in created:
+        session.delete(platform)
+    if created:
+        bump_data_version(session, Platform.__tablename__)
+        session.commit()
@@ -0,0 +1,144 @@
+"""按自然键批量写入测试"""
+import math
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Base, DataVersion, Platform
+from app.services import bulk
+
+
+MONTH = date(2024, 1, 1)
+
+
+def record(name, balance=None, **fields):
+    return {'name': name, 'report_month': MONTH, 'loan_balance': balance, **fields}
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def version(session):
+    return session.execute(select(DataVersion.version).where(DataVersion.name == Platform.__tablename__)).scalar()
+
+
+def test_counts_inserts_updates_and_unchanged(session):
+    stats = bulk.upsert_records(session, Platform, [record('A', 1.0), record('B', 2.0)])
+    session.commit()
+    assert stats == {'inserted': 2, 'updated': 0, 'unchanged': 0}
+
+    stats = bulk.upsert_records(session, Platform, [record('A', 1.0), record('B', 3.0), record('C', 4.0)])
+    session.commit()
+    assert stats == {'inserted': 1, 'updated': 1, 'unchanged': 1}
+    balances = dict(session.execute(select(Platform.name, Platform.loan_balance)).all())
+    assert balances == {'A': 1.0, 'B': 3.0, 'C': 4.0}
+
+
+def test_dedupes_within_batch(session):
+    stats = bulk.upsert_records(session, Platform, [record('A', 1.0), record('A', None, company_group='蚂蚁')])
+    session.commit()
+    assert stats['inserted'] == 1
+    row = session.execute(select(Platform)).scalar_one()
+    assert (row.loan_balance, row.company_group) == (1.0, '蚂蚁')
+
+
+def test_update_existing_false_leaves_rows(session):
+    bulk.upsert_records(session, Platform, [record('A', 1.0)])
+    session.commit()
+    stats = bulk.upsert_records(session, Platform, [record('A', 2.0)], update_existing=False)
+    assert stats == {'inserted': 0, 'updated': 0, 'unchanged': 1}
+    assert session.execute(select(Platform.loan_balance)).scalar() == 1.0
+
+
+def test_nan_is_stored_as_null_and_never_overwrites(session):
+    stats = bulk.upsert_records(session, Platform, [record('A', math.nan), record('B', 2.0)])
+    session.commit()
+    assert stats['inserted'] == 2
+    assert session.execute(select(Platform.loan_balance).where(Platform.name == 'A')).scalar() is None
+
+    # NaN（Excel空单元格）不覆盖已有值，也不算作变化
+    stats = bulk.upsert_records(session, Platform, [record('B', float('nan'))])
+    assert stats == {'inserted': 0, 'updated': 0, 'unchanged': 1}
+    assert session.execute(select(Platform.loan_balance).where(Platform.name == 'B')).scalar() == 2.0
+
+
+def test_null_key_fields_match_existing_rows(session):
+    bulk.upsert_records(session, Platform, [record('A', 1.0, platform_type=None)])
+    session.commit()
+
+    # 产品类别为 NULL 与为空字符串视为同一自然键
+    stats = bulk.upsert_records(session, Platform, [record('A', 1.0, platform_type=None),
+                                                    record('A', 5.0, platform_type='')])
+    session.commit()
+    assert stats == {'inserted': 0, 'updated': 1, 'unchanged': 0}
+    assert session.query(Platform).count() == 1
+
+
+def test_unique_index_rejects_duplicate_null_keys(session):
+    session.execute(insert(Platform.__table__), [record('A', 1.0)])
+    session.commit()
+    with pytest.raises(IntegrityError):
+        session.execute(insert(Platform.__table__), [record('A', 2.0, platform_type='')])
+    session.rollback()
+
+
+def test_rows_inserted_concurrently_are_not_counted(session, monkeypatch):
+    original = bulk._load_existing
+    calls = []
+
+    def racing(session, model, keys, chunk_size):
+        existing = original(session, model, keys, chunk_size)
+        if not calls:
+            # 查询之后、插入之前另一个进程写入了 A（值相同）和 B（值不同）
+            calls.append(1)
+            session.execute(insert(Platform.__table__), [record('A', 1.0), record('B', 9.0)])
+        return existing
+
+    monkeypatch.setattr(bulk, '_load_existing', racing)
+    stats = bulk.upsert_records(session, Platform, [record('A', 1.0), record('B', 2.0), record('C', 3.0)])
+    session.commit()
+
+    assert stats == {'inserted': 1, 'updated': 1, 'unchanged': 1}
+    balances = dict(session.execute(select(Platform.name, Platform.loan_balance)).all())
+    assert balances == {'A': 1.0, 'B': 2.0, 'C': 3.0}
+
+
+def test_data_version_bumped_only_on_change(session):
+    bulk.upsert_records(session, Platform, [record('A', 1.0)])
+    session.commit()
+    before = version(session)
+    assert before >= 1
+
+    bulk.upsert_records(session, Platform, [record('A', 1.0)])
+    session.commit()
+    assert version(session) == before
+
+    bulk.upsert_records(session, Platform, [record('A', 2.0)])
+    session.commit()
+    assert version(session) == before + 1
+
+
+def test_import_records_commits_in_chunks(session):
+    records = [record(f'P{index}', float(index)) for index in range(5)]
+    seen = []
+    totals = bulk.import_records(session, Platform, records, chunk_size=2, progress=seen.append)
+
+    assert (totals['inserted'], totals['updated'], totals['unchanged']) == (5, 0, 0)
+    assert [chunk['offset'] for chunk in totals['chunks']] == [0, 2, 4]
+    assert [chunk['count'] for chunk in seen] == [2, 2, 1]
+
+    records[0]['loan_balance'] = 100.0
+    totals = bulk.import_records(session, Platform, records, chunk_size=2)
+    assert (totals['inserted'], totals['updated'], totals['unchanged']) == (0, 0, 5)
+
+    totals = bulk.import_records(session, Platform, records, chunk_size=2, update_existing=True)
+    assert (totals['inserted'], totals['updated'], totals['unchanged']) == (0, 1, 4)
@@ -0,0 +1,47 @@
+"""条件请求测试：数据版本未变化时返回304"""
+from datetime import date
+
+
+URL = '/api/v1/platforms/data'
+
+
+def test_matching_etag_returns_304(client):
+    response = client.get(URL)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag.startswith('W/"platforms.')
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_if_modified_since_returns_304(client, add_platforms):
+    add_platforms([{'name': '条件请求', 'report_month': date(2024, 1, 1)}])
+    response = client.get(URL)
+    last_modified = response.headers['Last-Modified']
+
+    assert client.get(URL, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+
+def test_write_changes_etag(client, add_platforms):
+    etag = client.get(URL).headers['ETag']
+
+    add_platforms([{'name': '条件请求', 'report_month': date(2024, 1, 1)}])
+
+    response = client.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_other_table_etag_does_not_match(client):
+    etag = client.get(URL).headers['ETag']
+    assert client.get('/api/v1/banks/stats/overview', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_error_responses_have_no_etag(client):
+    response = client.get('/api/v1/platforms/999999')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
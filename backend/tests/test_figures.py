@@ -0,0 +1,18 @@
+"""金额单位换算回归测试"""
+import pytest
+
+from app.scrapers.figures import scan
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('花呗贷款余额1.7万亿元', 17000.0),
+    ('贷款余额1.7万亿', 17000.0),
+    ('贷款余额3,200亿元', 3200.0),
+    ('贷款余额3200亿', 3200.0),
+    ('贷款余额500千万元', 50.0),
+    ('贷款余额500千万', 50.0),
+    ('贷款余额8000万元', 0.8),
+    ('贷款余额8000万', 0.8),
+])
+def test_amount_units(text, expected):
+    assert scan(text).first('balance') == pytest.approx(expected)
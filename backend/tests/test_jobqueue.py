@@ -0,0 +1,116 @@
+"""任务队列测试：领取、心跳超时重新排队和按领取次数写入"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app import db
+from app.models import JobLock, ScrapeJob, ScrapeRun
+from app.scrapers import ScraperFactory
+from app.scrapers.base import BaseScraper
+from app.services import jobqueue
+from app.services.locks import acquire_job_lock
+
+
+class FakeScraper(BaseScraper):
+    def __init__(self, **kwargs):
+        super().__init__('测试爬虫', 'http://example.com')
+
+    def scrape(self, **kwargs):
+        return []
+
+
+@pytest.fixture
+def engine(app, session, monkeypatch):
+    monkeypatch.setitem(ScraperFactory._scrapers, 'FakeScraper', FakeScraper)
+    for job_type in ('fake', 'fake_other'):
+        monkeypatch.setitem(jobqueue.SCRAPER_JOBS, job_type, {
+            'name': f'测试任务 {job_type}', 'source_type': 'test', 'scraper': 'FakeScraper',
+            'options': {}, 'run': {}
+        })
+    yield db.engine
+    session.rollback()
+    for model in (ScrapeJob, JobLock, ScrapeRun):
+        session.execute(delete(model))
+    session.commit()
+
+
+def make_stale(engine, job_id):
+    with engine.begin() as connection:
+        connection.execute(update(ScrapeJob).where(ScrapeJob.id == job_id)
+                           .values(heartbeat_at=datetime.now() - timedelta(hours=1)))
+
+
+def load(session, job_id):
+    session.expire_all()
+    return session.get(ScrapeJob, job_id)
+
+
+def test_enqueue_returns_active_job(engine, session):
+    job, created = jobqueue.enqueue(session, 'fake')
+    again, created_again = jobqueue.enqueue(session, 'fake')
+    assert (created, created_again) == (True, False)
+    assert again.id == job.id
+
+    with pytest.raises(ValueError):
+        jobqueue.enqueue(session, 'fake', params={'unknown': 1})
+
+
+def test_claims_by_priority_once(engine, session):
+    low, _ = jobqueue.enqueue(session, 'fake', priority=5)
+    high, _ = jobqueue.enqueue(session, 'fake_other', priority=1)
+
+    assert jobqueue.claim_next(engine, 'w1') == (high.id, 1)
+    assert jobqueue.claim_next(engine, 'w2') == (low.id, 1)
+    assert jobqueue.claim_next(engine, 'w3') is None
+    assert load(session, high.id).worker == 'w1'
+
+
+def test_requeued_job_is_claimed_with_new_attempt(app, engine, session):
+    job, _ = jobqueue.enqueue(session, 'fake')
+    assert jobqueue.claim_next(engine, 'w1') == (job.id, 1)
+
+    # 心跳未超时不会重新排队
+    assert jobqueue.requeue_stale(engine, 300) == 0
+    make_stale(engine, job.id)
+    assert jobqueue.requeue_stale(engine, 300) == 1
+    assert load(session, job.id).status == ScrapeJob.QUEUED
+
+    assert jobqueue.claim_next(engine, 'w2') == (job.id, 2)
+    jobqueue.execute(app, job.id, 'w2', 2)
+
+    job = load(session, job.id)
+    assert (job.status, job.attempt, job.worker, job.progress) == (ScrapeJob.SUCCESS, 2, 'w2', 100)
+
+    # 被误判为中断的第1次执行结束时不覆盖结果
+    assert not jobqueue._update_attempt(engine, job.id, 1, status=ScrapeJob.FAILED)
+    assert load(session, job.id).status == ScrapeJob.SUCCESS
+
+
+def test_previous_attempt_still_holding_lock_blocks_execution(app, engine, session):
+    job, _ = jobqueue.enqueue(session, 'fake')
+    jobqueue.claim_next(engine, 'w1')
+    assert acquire_job_lock(engine, 'fake', 300, jobqueue.job_lock_owner(job.id, 1))
+
+    make_stale(engine, job.id)
+    jobqueue.requeue_stale(engine, 300)
+    assert jobqueue.claim_next(engine, 'w2') == (job.id, 2)
+    jobqueue.execute(app, job.id, 'w2', 2)
+
+    assert load(session, job.id).status == ScrapeJob.CANCELLED
+
+
+def test_expired_lock_of_crashed_attempt_is_taken_over(app, engine, session):
+    job, _ = jobqueue.enqueue(session, 'fake')
+    jobqueue.claim_next(engine, 'w1')
+    assert acquire_job_lock(engine, 'fake', 300, jobqueue.job_lock_owner(job.id, 1))
+    with engine.begin() as connection:
+        connection.execute(update(JobLock).values(locked_until=datetime.now() - timedelta(seconds=1)))
+
+    make_stale(engine, job.id)
+    jobqueue.requeue_stale(engine, 300)
+    attempt = jobqueue.claim_next(engine, 'w2')[1]
+    jobqueue.execute(app, job.id, 'w2', attempt)
+
+    job = load(session, job.id)
+    assert (job.status, job.attempt) == (ScrapeJob.SUCCESS, 2)
@@ -0,0 +1,69 @@
+"""分页测试：游标分页与页码分页结果一致"""
+from datetime import date
+
+import pytest
+
+from app.api.pagination import encode_cursor
+
+
+GROUP = '分页测试'
+URL = '/api/v1/platforms/data'
+
+
+@pytest.fixture
+def rows(add_platforms):
+    # 余额有重复值和NULL，检验 id 决胜键和NULL的位置
+    balances = [5.0, 3.0, None, 3.0, 8.0, None, 3.0, 1.0]
+    return add_platforms([
+        {'name': f'分页{index}', 'company_group': GROUP, 'report_month': date(2024, index % 3 + 1, 1),
+         'loan_balance': balance}
+        for index, balance in enumerate(balances)
+    ])
+
+
+def walk(client, query):
+    ids, after = [], None
+    while True:
+        response = client.get(URL, query_string={**query, **({'after': after} if after else {})})
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        ids.extend(item['id'] for item in data['items'])
+        after = data['next_cursor']
+        assert data['has_more'] == bool(after)
+        if not after:
+            return ids
+
+
+@pytest.mark.parametrize('sort_by, sort_order', [
+    ('loan_balance', 'desc'),
+    ('loan_balance', 'asc'),
+    ('report_month', 'desc'),
+    ('name', 'asc'),
+])
+def test_cursor_pages_match_offset_order(client, rows, sort_by, sort_order):
+    query = {'company_group': GROUP, 'sort_by': sort_by, 'sort_order': sort_order}
+    expected = [item['id'] for item in
+                client.get(URL, query_string={**query, 'per_page': 100}).get_json()['data']['items']]
+
+    assert sorted(expected) == sorted(rows)
+    assert walk(client, {**query, 'cursor': 1, 'per_page': 3}) == expected
+
+
+def test_offset_pages_report_total(client, rows):
+    data = client.get(URL, query_string={'company_group': GROUP, 'per_page': 3, 'page': 3}).get_json()['data']
+    assert (data['total'], data['pages'], len(data['items'])) == (8, 3, 2)
+
+
+def test_cursor_total_only_on_request(client, rows):
+    query = {'company_group': GROUP, 'cursor': 1, 'per_page': 3}
+    assert 'total' not in client.get(URL, query_string=query).get_json()['data']
+    assert client.get(URL, query_string={**query, 'with_total': 1}).get_json()['data']['total'] == 8
+
+
+def test_cursor_must_match_sort(client, rows):
+    after = encode_cursor('loan_balance', 'desc', 3.0, rows[0])
+    response = client.get(URL, query_string={'company_group': GROUP, 'sort_by': 'name', 'after': after})
+    assert response.status_code == 400
+
+    response = client.get(URL, query_string={'company_group': GROUP, 'after': 'not-a-cursor'})
+    assert response.status_code == 400
@@ -0,0 +1,70 @@
+"""月度汇总维护测试：写入后汇总表与明细表重新汇总的结果一致"""
+from datetime import date
+
+from sqlalchemy import select
+
+from app.models import Platform
+from app.services.bulk import upsert_records
+from app.services.rollup import ROLLUPS
+
+
+ADMIN_URL = '/api/v1/admin/platforms'
+
+
+def _values(row):
+    return tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+
+
+def assert_rollups_match(session):
+    session.expire_all()
+    for spec in ROLLUPS.values():
+        expected = sorted(map(_values, session.execute(spec.select_rows()).all()), key=repr)
+        actual = sorted((_values([getattr(row, name) for name in spec.columns()])
+                         for row in session.execute(select(spec.rollup)).scalars()), key=repr)
+        assert actual == expected
+
+
+def test_startup_rollups_match_seed_data(session):
+    assert_rollups_match(session)
+
+
+def test_admin_writes_maintain_rollups(client, session):
+    response = client.post(ADMIN_URL, json={
+        'name': '汇总测试', 'company_group': '汇总集团', 'platform_type': '助贷', 'loan_type': '消费类',
+        'report_month': '2030-01', 'loan_balance': 10
+    })
+    assert response.status_code == 200
+    platform_id = response.get_json()['data']['id']
+    assert_rollups_match(session)
+
+    # 改月份：旧月份和新月份都要重算
+    client.put(f'{ADMIN_URL}/{platform_id}', json={'report_month': '2030-02', 'loan_balance': 20})
+    assert_rollups_match(session)
+
+    client.put(f'{ADMIN_URL}/{platform_id}', json={'company_group': '另一集团'})
+    assert_rollups_match(session)
+
+    client.delete(f'{ADMIN_URL}/{platform_id}')
+    assert_rollups_match(session)
+
+
+def test_bulk_upsert_maintains_rollups(session):
+    records = [
+        {'name': f'汇总批量{index}', 'company_group': '汇总集团', 'report_month': date(2030, 3, 1),
+         'loan_balance': float(index)}
+        for index in range(3)
+    ]
+    try:
+        upsert_records(session, Platform, records)
+        session.commit()
+        assert_rollups_match(session)
+
+        upsert_records(session, Platform, [{**records[0], 'loan_balance': 100.0}])
+        session.commit()
+        assert_rollups_match(session)
+    finally:
+        session.rollback()
+        for platform in session.query(Platform).filter(Platform.name.like('汇总批量%')):
+            session.delete(platform)
+        session.commit()
+    assert_rollups_match(session)
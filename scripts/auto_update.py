@@ -18,6 +18,7 @@ sys.path.insert(0, str(project_root))
 
 from backend.app import create_app, db
 from backend.app.models import Platform, Bank
+from backend.app.services.rollup import mark_rollup_range
 
 
 # 配置日志
@@ -122,8 +123,8 @@ class DataUpdater:
         """
         with self.app.app_context():
             try:
-                start_date = datetime.strptime(start_month, '%Y-%m')
-                end_date = datetime.strptime(end_month, '%Y-%m')
+                start_date = datetime.strptime(start_month, '%Y-%m').date()
+                end_date = datetime.strptime(end_month, '%Y-%m').date()
 
                 deleted_count = 0
 
@@ -133,6 +134,7 @@ class DataUpdater:
                         Platform.report_month <= end_date
                     )
                     deleted_count += query.count()
+                    mark_rollup_range(db.session, Platform, start_date, end_date)
                     query.delete()
 
                 if data_type in ['bank', 'all']:
@@ -141,6 +143,7 @@ class DataUpdater:
                         Bank.report_month <= end_date
                     )
                     deleted_count += query.count()
+                    mark_rollup_range(db.session, Bank, start_date, end_date)
                     query.delete()
 
                 db.session.commit()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+财务数据提取基准测试
+生成一批模拟新闻/财报段落，比较旧的“每个平台关键词各跑一遍正则”写法
+与 app.scrapers.figures 一次扫描后按关键词取值的耗时，并核对两者提取结果
+
+用法:
+    python scripts/benchmark_figures.py --paragraphs 2000
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# 添加后端目录到路径
+backend_dir = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_dir))
+
+from app.scrapers.figures import scan
+from app.scrapers.research import ResearchScraper
+
+
+TEMPLATES = [
+    '{year}年{month}月，{platform}贷款余额：{balance}亿元，同比增长{rate}%。',
+    '据统计，{platform}余额{balance}亿元，当月发放{issued}亿元，环比{rate}%。',
+    '第{quarter}季度{platform}放款{issued}亿，存量{balance}亿元。',
+    '余额{balance}亿元的{platform}继续领跑，交易规模达{issued}亿元。',
+    '行业整体保持平稳，{platform}未披露具体规模，市场预计Q{quarter}将有所回升。',
+]
+
+
+def generate_paragraphs(count: int):
+    """生成模拟段落，每段包含1~3句带数字的描述"""
+    keywords = [keyword for keywords in ResearchScraper.PLATFORM_KEYWORDS.values() for keyword in keywords]
+    rng = random.Random(42)
+    paragraphs = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(1, 3)):
+            sentences.append(rng.choice(TEMPLATES).format(
+                year=rng.randint(2018, 2025),
+                month=rng.randint(1, 12),
+                quarter=rng.randint(1, 4),
+                platform=rng.choice(keywords),
+                balance=f'{rng.randint(1, 30000):,}.{rng.randint(0, 99)}',
+                issued=f'{rng.randint(1, 5000)}.{rng.randint(0, 9)}',
+                rate=f'{rng.uniform(-20, 50):.1f}'
+            ))
+        paragraphs.append(''.join(sentences))
+    return paragraphs
+
+
+def extract_legacy(text: str):
+    """旧写法：每个出现的关键词分别搜索余额和发放规模"""
+    results = []
+    for group, keywords in ResearchScraper.PLATFORM_MATCHER.present(text).items():
+        for keyword in keywords:
+            balance = None
+            for pattern in (
+                rf'{re.escape(keyword)}[：:\s]*(?:贷款余额|余额|存量)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)',
+                r'(?:贷款余额|余额|存量)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元).*?' + re.escape(keyword),
+            ):
+                match = re.search(pattern, text)
+                if match:
+                    balance = float(match.group(1).replace(',', ''))
+                    break
+            issued = None
+            for pattern in (
+                rf'{re.escape(keyword)}[：:\s]*(?:发放|交易|放款)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元)',
+                r'(?:发放|交易|放款)[：:\s]*([0-9,]+\.?[0-9]*)\s*(?:亿|亿元).*?' + re.escape(keyword),
+            ):
+                match = re.search(pattern, text)
+                if match:
+                    issued = float(match.group(1).replace(',', ''))
+                    break
+            month = re.search(r'(20\d{2})\s*年\s*(\d{1,2})\s*月', text)
+            quarter = re.search(r'第([1-4])季度|Q([1-4])', text)
+            results.append((keyword, balance, issued, month is not None, quarter is not None))
+    return results
+
+
+def extract_scan(text: str):
+    """新写法：一次扫描，按关键词取值"""
+    results = []
+    platforms = ResearchScraper.PLATFORM_MATCHER.present(text)
+    if not platforms:
+        return results
+    figures = scan(text)
+    for group, keywords in platforms.items():
+        for keyword in keywords:
+            results.append((
+                keyword,
+                figures.for_keyword('balance', keyword),
+                figures.for_keyword('issued', keyword),
+                bool(figures.months),
+                bool(figures.quarters)
+            ))
+    return results
+
+
+def measure(func_, paragraphs, repeat: int) -> float:
+    """多次运行取中位数（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        for text in paragraphs:
+            func_(text)
+        timings.append((time.perf_counter() - begin) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='财务数据提取基准测试')
+    parser.add_argument('--paragraphs', type=int, default=2000, help='生成的段落数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    args = parser.parse_args()
+
+    paragraphs = generate_paragraphs(args.paragraphs)
+
+    mismatched = sum(1 for text in paragraphs if extract_legacy(text) != extract_scan(text))
+    print(f'{len(paragraphs)} 个段落，提取结果不一致 {mismatched} 个')
+
+    legacy = measure(extract_legacy, paragraphs, args.repeat)
+    single_pass = measure(extract_scan, paragraphs, args.repeat)
+
+    print()
+    print(f'{"方式":<16}{"耗时(ms)":>12}')
+    print(f'{"逐关键词正则":<16}{legacy:>12.2f}')
+    print(f'{"一次扫描":<16}{single_pass:>12.2f}')
+    print(f'加速比 {legacy / single_pass if single_pass else float("inf"):.1f}x')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+索引基准测试
+在临时SQLite数据库中生成大量平台数据，分别在无索引和补建索引（走 ensure_indexes 迁移路径）
+两种情况下测量 /platforms/data、概览、时间序列和爬虫去重查询的延迟
+
+用法:
+    python scripts/benchmark_indexes.py --rows 1000000
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+import os
+from datetime import date, datetime
+from pathlib import Path
+
+# 添加后端目录到路径
+backend_dir = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, insert, func, desc
+from sqlalchemy.orm import Session
+from app.models import Base, Platform
+from app.models.migrations import ensure_indexes
+
+
+GROUPS = ['蚂蚁', '腾讯', '字节', '京东', '美团', '百度']
+PLATFORM_TYPES = ['联合贷', '助贷']
+LOAN_TYPES = ['消费类', '经营类']
+
+
+def generate_rows(engine, rows: int, chunk_size: int = 50000):
+    """生成满足自然键唯一的测试数据"""
+    combos = [(pt, lt) for pt in PLATFORM_TYPES for lt in LOAN_TYPES]
+    months = [date(2010 + i // 12, i % 12 + 1, 1) for i in range(180)]
+    names = (rows + len(months) * len(combos) - 1) // (len(months) * len(combos))
+
+    rng = random.Random(42)
+    now = datetime.now()
+    batch = []
+    count = 0
+
+    with engine.begin() as conn:
+        for n in range(names):
+            for month in months:
+                for platform_type, loan_type in combos:
+                    if count >= rows:
+                        break
+                    batch.append({
+                        'name': f'平台{n:05d}',
+                        'company_group': GROUPS[n % len(GROUPS)],
+                        'platform_type': platform_type,
+                        'loan_type': loan_type,
+                        'report_month': month,
+                        'loan_balance': rng.uniform(10, 3000),
+                        'loan_issued': rng.uniform(1, 500),
+                        'yoy_growth': rng.uniform(-20, 50),
+                        'mom_growth': rng.uniform(-5, 10),
+                        'data_source': '基准测试',
+                        'created_at': now,
+                        'updated_at': now
+                    })
+                    count += 1
+                    if len(batch) >= chunk_size:
+                        conn.execute(insert(Platform), batch)
+                        batch = []
+        if batch:
+            conn.execute(insert(Platform), batch)
+
+    return names
+
+
+def build_queries(names: int):
+    """按API实际发出的查询构造测试用例"""
+    start = date(2020, 1, 1)
+    end = date(2022, 12, 1)
+
+    def platform_data_group(session):
+        query = session.query(Platform).filter(
+            Platform.company_group == '腾讯',
+            Platform.report_month >= start,
+            Platform.report_month <= end
+        ).order_by(desc(Platform.report_month))
+        query.count()
+        return query.offset(0).limit(20).all()
+
+    def platform_data_type(session):
+        query = session.query(Platform).filter(
+            Platform.platform_type == '助贷',
+            Platform.loan_type == '经营类'
+        ).order_by(desc(Platform.report_month))
+        return query.offset(0).limit(20).all()
+
+    def overview(session):
+        latest = session.query(func.max(Platform.report_month)).scalar()
+        return session.query(
+            Platform.company_group,
+            func.sum(Platform.loan_balance),
+            func.count(Platform.id)
+        ).filter(Platform.report_month == latest).group_by(Platform.company_group).all()
+
+    def timeline(session):
+        return session.query(Platform).filter(
+            Platform.name == f'平台{names // 2:05d}'
+        ).order_by(Platform.report_month.asc()).all()
+
+    def natural_key_lookup(session):
+        rng = random.Random(7)
+        for _ in range(100):
+            session.query(Platform).filter_by(
+                name=f'平台{rng.randrange(names):05d}',
+                report_month=date(2015, 6, 1),
+                platform_type='联合贷',
+                loan_type='消费类'
+            ).first()
+
+    def admin_latest(session):
+        return session.query(Platform).order_by(desc(Platform.created_at)).offset(0).limit(20).all()
+
+    return [
+        ('/platforms/data 集团+月份区间', platform_data_group),
+        ('/platforms/data 类别+用途', platform_data_type),
+        ('/platforms/stats/overview', overview),
+        ('/platforms/<id>/timeline', timeline),
+        ('save_data 自然键查重 x100', natural_key_lookup),
+        ('/admin/platforms 默认排序', admin_latest),
+    ]
+
+
+def measure(engine, queries, repeat: int):
+    """每个查询取多次运行的中位数（毫秒）"""
+    results = {}
+    for label, func_ in queries:
+        timings = []
+        for _ in range(repeat):
+            with Session(engine) as session:
+                begin = time.perf_counter()
+                func_(session)
+                timings.append((time.perf_counter() - begin) * 1000)
+        timings.sort()
+        results[label] = timings[len(timings) // 2]
+    return results
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='平台数据索引基准测试')
+    parser.add_argument('--rows', type=int, default=1000000, help='生成的数据行数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个查询的重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f'sqlite:///{os.path.join(tmp_dir, "benchmark.db")}')
+
+        # 建表后删除索引，模拟旧版数据库
+        Base.metadata.create_all(engine, tables=[Platform.__table__])
+        with engine.begin() as conn:
+            for index in Platform.__table__.indexes:
+                index.drop(conn)
+
+        print(f'生成 {args.rows} 行数据...')
+        begin = time.perf_counter()
+        names = generate_rows(engine, args.rows)
+        print(f'数据生成耗时 {time.perf_counter() - begin:.1f} 秒')
+
+        queries = build_queries(names)
+        before = measure(engine, queries, args.repeat)
+
+        begin = time.perf_counter()
+        created = ensure_indexes(engine)
+        print(f'迁移创建 {len(created)} 个索引，耗时 {time.perf_counter() - begin:.1f} 秒')
+
+        after = measure(engine, queries, args.repeat)
+        engine.dispose()
+
+    print()
+    print(f'{"查询":<32}{"无索引(ms)":>12}{"有索引(ms)":>12}{"加速比":>10}')
+    for label, _ in queries:
+        speedup = before[label] / after[label] if after[label] else float('inf')
+        print(f'{label:<32}{before[label]:>12.2f}{after[label]:>12.2f}{speedup:>9.1f}x')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+SQLite并发基准测试
+模拟生产部署：多个gunicorn worker进程（每个多线程）持续读取 /platforms/data 和概览查询，
+同时调度进程中的爬虫不断批量写入。分别在默认配置（回滚日志）和生产配置
+（Config.SQLITE_PRAGMAS: WAL、busy_timeout、synchronous=NORMAL、mmap、cache_size + 连接池）下运行，
+对比读写吞吐、延迟和 database is locked 错误数
+
+用法:
+    python scripts/benchmark_sqlite.py --rows 200000 --readers 4 --threads 4 --duration 15
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+import shutil
+import os
+import multiprocessing
+from datetime import date
+from pathlib import Path
+
+# 添加后端目录到路径
+backend_dir = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, func, desc
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.database import engine_options, install_sqlite_pragmas
+from app.models import Base, Platform
+from app.models.migrations import ensure_indexes
+from app.services.bulk import upsert_records
+from benchmark_indexes import generate_rows, GROUPS
+
+
+PROFILES = ['default', 'production']
+
+
+def make_engine(path: str, profile: str):
+    """按配置方案创建引擎：default 为未做任何配置时的引擎，production 与应用的生产配置一致"""
+    uri = f'sqlite:///{path}'
+    if profile == 'default':
+        return create_engine(uri)
+
+    config = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+    engine = create_engine(uri, **engine_options(uri, config))
+    install_sqlite_pragmas(engine, Config.SQLITE_PRAGMAS)
+    return engine
+
+
+def percentile(values, q: float) -> float:
+    """分位数（毫秒）"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+def reader_process(path: str, profile: str, threads: int, duration: float, results):
+    """模拟一个gunicorn worker：多个线程持续执行读接口的查询"""
+    import threading
+
+    engine = make_engine(path, profile)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run(seed):
+        rng = random.Random(seed)
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            begin = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    if rng.random() < 0.7:
+                        query = session.query(Platform).filter(
+                            Platform.company_group == rng.choice(GROUPS)
+                        ).order_by(desc(Platform.report_month))
+                        query.count()
+                        query.offset(rng.randrange(5) * 20).limit(20).all()
+                    else:
+                        latest = session.query(func.max(Platform.report_month)).scalar()
+                        session.query(
+                            Platform.company_group, func.sum(Platform.loan_balance), func.count(Platform.id)
+                        ).filter(Platform.report_month == latest).group_by(Platform.company_group).all()
+                local.append(time.perf_counter() - begin)
+            except OperationalError:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    workers = [threading.Thread(target=run, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    engine.dispose()
+    results.put(('read', latencies, errors[0]))
+
+
+def writer_process(path: str, profile: str, names: int, batch_size: int, duration: float, results):
+    """模拟调度进程中的爬虫：按自然键批量更新数据并提交"""
+    engine = make_engine(path, profile)
+    rng = random.Random(1)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    while time.monotonic() < deadline:
+        month = date(2010 + rng.randrange(15), rng.randrange(12) + 1, 1)
+        records = [{
+            'name': f'平台{rng.randrange(names):05d}',
+            'report_month': month,
+            'platform_type': '联合贷',
+            'loan_type': '消费类',
+            'loan_balance': rng.uniform(10, 3000)
+        } for _ in range(batch_size)]
+
+        begin = time.perf_counter()
+        with Session(engine) as session:
+            try:
+                upsert_records(session, Platform, records)
+                session.commit()
+                latencies.append(time.perf_counter() - begin)
+            except OperationalError:
+                session.rollback()
+                errors += 1
+
+    engine.dispose()
+    results.put(('write', latencies, errors))
+
+
+def run_profile(template: str, tmp_dir: str, profile: str, names: int, args) -> dict:
+    """在数据库副本上运行一种配置方案"""
+    path = os.path.join(tmp_dir, f'{profile}.db')
+    shutil.copy(template, path)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=reader_process, args=(path, profile, args.threads, args.duration, results))
+        for _ in range(args.readers)
+    ]
+    processes.append(context.Process(
+        target=writer_process, args=(path, profile, names, args.batch, args.duration, results)
+    ))
+    for process in processes:
+        process.start()
+
+    reads, read_errors, writes, write_errors = [], 0, [], 0
+    for _ in processes:
+        kind, latencies, errors = results.get()
+        if kind == 'read':
+            reads.extend(latencies)
+            read_errors += errors
+        else:
+            writes.extend(latencies)
+            write_errors += errors
+    for process in processes:
+        process.join()
+
+    return {
+        'reads_per_sec': len(reads) / args.duration,
+        'read_p50': percentile(reads, 0.5),
+        'read_p99': percentile(reads, 0.99),
+        'read_errors': read_errors,
+        'writes_per_sec': len(writes) / args.duration,
+        'write_p99': percentile(writes, 0.99),
+        'write_errors': write_errors,
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='SQLite并发读写基准测试')
+    parser.add_argument('--rows', type=int, default=200000, help='生成的数据行数')
+    parser.add_argument('--readers', type=int, default=4, help='读进程数（模拟gunicorn worker）')
+    parser.add_argument('--threads', type=int, default=4, help='每个读进程的线程数')
+    parser.add_argument('--batch', type=int, default=500, help='每次写入的记录数')
+    parser.add_argument('--duration', type=float, default=15, help='每种配置的运行秒数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        template = os.path.join(tmp_dir, 'template.db')
+        engine = create_engine(f'sqlite:///{template}')
+        Base.metadata.create_all(engine)
+        print(f'生成 {args.rows} 行数据...')
+        names = generate_rows(engine, args.rows)
+        ensure_indexes(engine)
+        engine.dispose()
+
+        results = {}
+        for profile in PROFILES:
+            print(f'运行 {profile} 配置 {args.duration:.0f} 秒（{args.readers} 个读进程 x {args.threads} 线程 + 1 个写进程）...')
+            results[profile] = run_profile(template, tmp_dir, profile, names, args)
+
+    print()
+    print(f'{"指标":<20}' + ''.join(f'{profile:>14}' for profile in PROFILES))
+    rows = [
+        ('读 QPS', 'reads_per_sec', '{:.0f}'),
+        ('读 p50 (ms)', 'read_p50', '{:.1f}'),
+        ('读 p99 (ms)', 'read_p99', '{:.1f}'),
+        ('读 locked 错误', 'read_errors', '{}'),
+        ('写 批次/秒', 'writes_per_sec', '{:.1f}'),
+        ('写 p99 (ms)', 'write_p99', '{:.1f}'),
+        ('写 locked 错误', 'write_errors', '{}'),
+    ]
+    for label, key, fmt in rows:
+        print(f'{label:<20}' + ''.join(f'{fmt.format(results[profile][key]):>14}' for profile in PROFILES))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+清理自然键重复的数据
+旧版数据库中 platforms / banks 可能有自然键（名称 + 报告月份 + 类型）重复的行，
+此时应用启动时无法创建唯一索引并报错。本脚本删除重复行（每组保留id最大、即最后写入的一条），
+并重建受影响表的月度汇总。删除不可恢复，请先备份数据库
+
+用法:
+    python scripts/dedupe_records.py --dry-run     # 只统计将要删除的行数
+    python scripts/dedupe_records.py               # 删除重复数据
+    python scripts/dedupe_records.py --config production
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加后端目录到路径
+backend_dir = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+from app.config import config, BASE_DIR
+from app.database import resolve_sqlite_uri
+from app.models import DataVersion
+from app.models.migrations import remove_duplicates, ensure_indexes
+from app.services.cache import bump_data_version
+from app.services.rollup import ROLLUPS, refresh_rollups
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='清理自然键重复的数据')
+    parser.add_argument('--config', default='production', choices=sorted(config), help='配置名称')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不删除')
+    args = parser.parse_args()
+
+    uri = resolve_sqlite_uri(config[args.config].SQLALCHEMY_DATABASE_URI, str(BASE_DIR))
+    engine = create_engine(uri)
+
+    removed = remove_duplicates(engine, dry_run=args.dry_run)
+    for table, count in removed.items():
+        print(f'{table}: {"将删除" if args.dry_run else "已删除"} {count} 条重复数据')
+
+    if args.dry_run or not any(removed.values()):
+        engine.dispose()
+        return 0
+
+    inspector = inspect(engine)
+    with Session(engine) as session:
+        for table, count in removed.items():
+            if not count:
+                continue
+            if inspector.has_table(ROLLUPS[table].rollup.__tablename__):
+                refresh_rollups(session, table)
+            if inspector.has_table(DataVersion.__tablename__):
+                bump_data_version(session, table)
+        session.commit()
+
+    created = ensure_indexes(engine)
+    if created:
+        print(f'已创建索引: {", ".join(created)}')
+    engine.dispose()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())